@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from .intel_store import normalize_entity
+
+BLOCKLIST_DIR = os.getenv(
+    "SCAMSAFE_BLOCKLIST_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocklists")
+)
+
+# One filter file per entity kind: <dir>/<kind>.bloom
+BLOCKLIST_KINDS = ("upi", "phone", "domain")
+
+_MAGIC = b"SSBF"
+_HEADER = struct.Struct("<4sBxxxQIQ")  # magic, version, num_bits, num_hashes, item_count
+_VERSION = 1
+
+
+def _hash_pair(key: str):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = struct.unpack("<QQ", digest)
+    return h1, h2 | 1  # odd step so probes cycle through all bits
+
+
+class BloomFilter:
+    """
+    Read-only Bloom filter over a memory-mapped file. The OS pages bits in on
+    demand, so a multi-million entry blocklist costs a few MB of page cache
+    and nothing on the Python heap. Lookups are k bit probes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.num_bits, self.num_hashes, self.count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a blocklist filter")
+        if len(self._map) < _HEADER.size + (self.num_bits + 7) // 8:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __contains__(self, key: str) -> bool:
+        h1, h2 = _hash_pair(key)
+        bits, data, offset = self.num_bits, self._map, _HEADER.size
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % bits
+            if not data[offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def close(self):
+        self._map.close()
+
+
+def build_filter(keys: Iterable[str], capacity: int, path: str, fp_rate: float = 1e-4) -> Dict:
+    """Writes a filter sized for `capacity` keys at the target false-positive rate."""
+    capacity = max(capacity, 1)
+    num_bits = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+    num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+    bits = bytearray((num_bits + 7) // 8)
+    count = 0
+    for key in keys:
+        h1, h2 = _hash_pair(key)
+        for i in range(num_hashes):
+            bit = (h1 + i * h2) % num_bits
+            bits[bit >> 3] |= 1 << (bit & 7)
+        count += 1
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, num_bits, num_hashes, count))
+        f.write(bits)
+    os.replace(tmp, path)
+    return {"path": path, "items": count, "bytes": _HEADER.size + len(bits), "num_hashes": num_hashes}
+
+
+def normalize_key(kind: str, value: str) -> Optional[str]:
+    """Blocklist key for a raw entity; the builder and the checks share this."""
+    if kind == "upi":
+        return normalize_entity("upiIds", value)
+    if kind == "phone":
+        digits = normalize_entity("phoneNumbers", value)
+        return digits if len(digits) == 10 else None
+    if kind == "domain":
+        host = value.strip().lower()
+        if "://" in host or "/" in host:
+            host = urlsplit(host if "://" in host else "//" + host).hostname or ""
+        host = host.rstrip(".")
+        return host[4:] if host.startswith("www.") else host or None
+    raise ValueError(f"unknown blocklist kind {kind!r}")
+
+
+def _parent_domains(host: str) -> List[str]:
+    # sub.evil.co.in -> [sub.evil.co.in, evil.co.in, co.in]; single labels skipped
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels) - 1)]
+
+
+class Blocklist:
+    """Known mule UPI handles, phone numbers and phishing domains."""
+
+    # extractor match kind -> blocklist kind
+    ENTITY_KINDS = {"upi_id": "upi", "phone": "phone", "url": "domain"}
+
+    def __init__(self, directory: str = BLOCKLIST_DIR):
+        self.directory = directory
+        self.filters: Dict[str, BloomFilter] = {}
+        for kind in BLOCKLIST_KINDS:
+            path = os.path.join(directory, f"{kind}.bloom")
+            if os.path.exists(path):
+                self.filters[kind] = BloomFilter(path)
+        self.checks = 0
+        self.hits = 0
+
+    def __bool__(self):
+        return bool(self.filters)
+
+    def contains(self, kind: str, value: str) -> bool:
+        bloom = self.filters.get(kind)
+        if bloom is None:
+            return False
+        key = normalize_key(kind, value)
+        if not key:
+            return False
+        self.checks += 1
+        candidates = _parent_domains(key) if kind == "domain" else [key]
+        if any(candidate in bloom for candidate in candidates):
+            self.hits += 1
+            return True
+        return False
+
+    def check_matches(self, matches) -> List[str]:
+        """Blocklisted values among extractor IntelMatches."""
+        return [m.value for m in matches
+                if m.kind in self.ENTITY_KINDS and self.contains(self.ENTITY_KINDS[m.kind], m.value)]
+
+    def stats(self) -> Dict:
+        return {
+            "filters": {kind: f.count for kind, f in self.filters.items()},
+            "checks": self.checks,
+            "hits": self.hits,
+        }
+
+
+def _read_keys(path: str, kind: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                key = normalize_key(kind, line)
+                if key:
+                    yield key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a blocklist Bloom filter from a text file (one entry per line)")
+    parser.add_argument("kind", choices=BLOCKLIST_KINDS)
+    parser.add_argument("input", help="UPI handles, phone numbers or domains/URLs, one per line")
+    parser.add_argument("--output", help=f"defaults to {BLOCKLIST_DIR}/<kind>.bloom")
+    parser.add_argument("--fp-rate", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(BLOCKLIST_DIR, f"{args.kind}.bloom")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    capacity = sum(1 for _ in _read_keys(args.input, args.kind))  # first pass sizes the filter
+    info = build_filter(_read_keys(args.input, args.kind), capacity, output, args.fp_rate)
+    print(f"built {info['path']}: {info['items']} entries, {info['bytes']} bytes, k={info['num_hashes']}")
+
+
+if __name__ == "__main__":
+    # python -m scamsafe_bot.blocklist upi mule_upi_ids.txt
+    main()
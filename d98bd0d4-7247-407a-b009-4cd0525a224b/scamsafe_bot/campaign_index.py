@@ -0,0 +1,205 @@
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Campaigns kept; past this the least recently seen one is forgotten
+MAX_CAMPAIGNS = int(os.getenv("SCAMSAFE_MAX_CAMPAIGNS", "50000"))
+
+# Intel values kept per campaign and category; past this the oldest
+# values are forgotten (mule accounts rotate)
+MAX_INTEL_PER_CAMPAIGN = int(os.getenv("SCAMSAFE_MAX_INTEL_PER_CAMPAIGN", "200"))
+
+# Entity spans that vary between victims of one campaign are replaced by
+# placeholders before shingling, so a new UPI ID or amount doesn't look
+# like a new template.
+_VARIANT_PATTERNS = [
+    (re.compile(r"upi://\S+|https?://\S+|www\.\S+|bit\.ly/\S+|tinyurl\.com/\S+"), " <url> "),
+    (re.compile(r"[\w.\-]+@[a-z]+"), " <upi> "),
+    (re.compile(r"₹|rs\.?(?=\s*\d)"), " <cur> "),
+    (re.compile(r"\b\d[\d,.\-]*"), " <num> "),
+]
+_TOKEN = re.compile(r"<\w+>|\w+")
+
+_MERSENNE = (1 << 61) - 1
+_ROTATION_OFFSET = 1 << 61  # keeps borrowed values distinct from real ones
+
+
+def campaign_shingles(message: str) -> set:
+    """Word 2-gram shingles of the message with variant entities masked."""
+    text = message.lower()
+    for pattern, placeholder in _VARIANT_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    tokens = _TOKEN.findall(text)
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def _shingle_hash(shingle: str) -> int:
+    # Not hash(): str hashes are salted per process, and signatures must
+    # agree across workers and restarts
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class CampaignIndex:
+    """
+    MinHash/LSH index grouping near-duplicate scam messages into campaigns.
+    Each band of the signature maps to one campaign ID, so lookups cost
+    O(bands) dict probes no matter how many messages have been indexed;
+    candidates are confirmed against the campaign's signature.
+
+    Bounded: past max_campaigns the least recently seen campaign is
+    dropped with its band keys, a campaign absorbs template drift
+    through at most keys_per_campaign band keys, and keeps the
+    intel_per_campaign newest values of each intel category.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.6, seed: int = 1770005528,
+                 max_campaigns: int = MAX_CAMPAIGNS, keys_per_campaign: Optional[int] = None,
+                 intel_per_campaign: int = MAX_INTEL_PER_CAMPAIGN):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_campaigns = max_campaigns
+        self.keys_per_campaign = keys_per_campaign or bands * 8
+        self.intel_per_campaign = intel_per_campaign
+
+        rng = random.Random(seed)
+        self._mix_a = rng.randrange(1, _MERSENNE)
+        self._mix_b = rng.randrange(0, _MERSENNE)
+        self._buckets: List[Dict[tuple, str]] = [{} for _ in range(bands)]
+        self._campaigns: "OrderedDict[str, Dict]" = OrderedDict()  # least recently seen first
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.evicted = 0
+        self.messages_indexed = 0
+        self.lookups = 0
+        self.matches = 0
+
+    def signature(self, message: str) -> List[int]:
+        """
+        One-permutation MinHash: each shingle is hashed once and binned, the
+        minimum per bin is kept, and empty bins borrow from the next filled
+        bin (rotation densification). O(shingles + num_perm) instead of
+        O(shingles * num_perm) for classic k-permutation MinHash.
+        """
+        k = self.num_perm
+        sig = [None] * k
+        for shingle in campaign_shingles(message):
+            h = (self._mix_a * (_shingle_hash(shingle) & _MERSENNE) + self._mix_b) % _MERSENNE
+            slot, value = h % k, h // k
+            if sig[slot] is None or value < sig[slot]:
+                sig[slot] = value
+        filled = [i for i in range(k) if sig[i] is not None]
+        if not filled:
+            return [0] * k
+        for i in range(k):
+            if sig[i] is None:
+                j = next((f for f in filled if f > i), filled[0])
+                sig[i] = sig[j] + ((j - i) % k) * _ROTATION_OFFSET
+        return sig
+
+    def _band_keys(self, sig: List[int]):
+        rows = self.rows
+        return [tuple(sig[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+
+    def _similarity(self, sig_a: List[int], sig_b: List[int]) -> float:
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / self.num_perm
+
+    def _best_match(self, sig: List[int]):
+        best_id, best_sim = None, 0.0
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            campaign_id = band.get(key)
+            if campaign_id is None or campaign_id == best_id:
+                continue
+            sim = self._similarity(sig, self._campaigns[campaign_id]["signature"])
+            if sim > best_sim:
+                best_id, best_sim = campaign_id, sim
+        if best_id is not None and best_sim >= self.threshold:
+            return best_id, best_sim
+        return None, best_sim
+
+    def lookup(self, message: str, sig: Optional[List[int]] = None) -> Optional[Dict]:
+        """
+        Returns {campaign_id, similarity, verdict, intel, size} for the
+        campaign this message belongs to, or None if it looks new.
+        """
+        sig = sig or self.signature(message)
+        with self._lock:
+            self.lookups += 1
+            campaign_id, sim = self._best_match(sig)
+            if campaign_id is None:
+                return None
+            self.matches += 1
+            self._campaigns.move_to_end(campaign_id)
+            campaign = self._campaigns[campaign_id]
+            return {
+                "campaign_id": campaign_id,
+                "similarity": round(sim, 3),
+                "verdict": dict(campaign["verdict"]) if campaign["verdict"] else None,
+                "intel": {k: list(v) for k, v in campaign["intel"].items()},
+                "size": campaign["size"],
+            }
+
+    def add(self, message: str, verdict: Optional[Dict] = None, intel: Optional[Dict] = None,
+            sig: Optional[List[int]] = None) -> str:
+        """
+        Indexes a message, joining its campaign or starting a new one.
+        A verdict, if given, replaces the campaign's; intel lists are merged.
+        Returns the campaign ID.
+        """
+        sig = sig or self.signature(message)
+        with self._lock:
+            self.messages_indexed += 1
+            campaign_id, _ = self._best_match(sig)
+            if campaign_id is None:
+                campaign_id = f"cmp-{self._next_id:06d}"
+                self._next_id += 1
+                self._campaigns[campaign_id] = {"signature": sig, "verdict": None, "intel": {}, "size": 0, "keys": []}
+            else:
+                self._campaigns.move_to_end(campaign_id)
+            campaign = self._campaigns[campaign_id]
+            campaign["size"] += 1
+            if verdict:
+                campaign["verdict"] = dict(verdict)
+            for category, values in (intel or {}).items():
+                merged = campaign["intel"].setdefault(category, {})
+                merged.update(dict.fromkeys(values))  # ordered set, oldest first
+                while len(merged) > self.intel_per_campaign:
+                    del merged[next(iter(merged))]
+            # Existing keys keep pointing at their first campaign; new keys
+            # let the campaign absorb gradual template drift.
+            for i, key in enumerate(self._band_keys(sig)):
+                if len(campaign["keys"]) >= self.keys_per_campaign:
+                    break
+                if key not in self._buckets[i]:
+                    self._buckets[i][key] = campaign_id
+                    campaign["keys"].append((i, key))
+            while len(self._campaigns) > self.max_campaigns:
+                self._evict()
+            return campaign_id
+
+    def _evict(self):
+        # Caller holds the lock
+        campaign_id, campaign = self._campaigns.popitem(last=False)
+        for i, key in campaign["keys"]:
+            del self._buckets[i][key]
+        self.evicted += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "campaigns": len(self._campaigns),
+                "messages_indexed": self.messages_indexed,
+                "band_keys": sum(len(b) for b in self._buckets),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "evicted": self.evicted,
+            }
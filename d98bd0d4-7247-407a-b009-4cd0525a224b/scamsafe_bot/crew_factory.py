@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class StartupTimings:
+    """
+    Wall-clock cost of the expensive startup steps (imports, crew builds),
+    in the order they ran. For a per-module import breakdown run the
+    server once under `python -X importtime`.
+    """
+
+    def __init__(self):
+        self._steps: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self._steps[name] = self._steps.get(name, 0.0) + ms
+        print(f"⏱️ {name}: {ms:.1f}ms")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(ms, 1) for name, ms in self._steps.items()}
+
+
+startup_timings = StartupTimings()
+
+
+class WarmPool(Generic[T]):
+    """
+    Reusable instances built lazily by `factory` (e.g. a full set of crews).
+
+    An instance is checked out by one request at a time, so objects that
+    keep per-run state (crewai tasks and crews do) are never shared by two
+    concurrent turns. prewarm() builds instances ahead of traffic, normally
+    from a background thread after startup. Past max_size, checkout()
+    builds a throwaway instance rather than waiting.
+    """
+
+    def __init__(self, factory: Callable[[], T], warm: int = 2, max_size: int = 8, name: str = "instance"):
+        self.factory = factory
+        self.warm = warm
+        self.max_size = max_size
+        self.name = name
+        self._idle: List[T] = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.pooled = 0
+        self.checkouts = 0
+        self.cold_builds = 0
+
+    def _build(self, slot: int = 0) -> T:
+        # Pooled builds are timed per slot (at most max_size steps); throwaway
+        # overflow builds all accumulate under one step
+        step = f"build {self.name} #{slot}" if slot else f"build {self.name} (overflow)"
+        with startup_timings.step(step):
+            instance = self.factory()
+        with self._lock:
+            self.created += 1
+        return instance
+
+    def prewarm(self):
+        """Fills the idle list up to `warm` instances."""
+        while True:
+            with self._lock:
+                if self.pooled >= self.warm:
+                    return
+                self.pooled += 1
+                slot = self.pooled
+            try:
+                instance = self._build(slot)
+            except Exception:
+                with self._lock:
+                    self.pooled -= 1
+                raise
+            with self._lock:
+                self._idle.append(instance)
+
+    def prewarm_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.prewarm, name=f"prewarm-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    @contextmanager
+    def checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            instance = self._idle.pop() if self._idle else None
+            keep = instance is not None or self.pooled < self.max_size
+            slot = 0
+            if instance is None and keep:
+                self.pooled += 1
+                slot = self.pooled
+            if instance is None:
+                self.cold_builds += 1
+        if instance is None:
+            try:
+                instance = self._build(slot)
+            except Exception:
+                if keep:
+                    with self._lock:
+                        self.pooled -= 1
+                raise
+        try:
+            yield instance
+        finally:
+            if keep:
+                with self._lock:
+                    self._idle.append(instance)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pooled": self.pooled,
+                "idle": len(self._idle),
+                "created": self.created,
+                "checkouts": self.checkouts,
+                "cold_builds": self.cold_builds,
+            }
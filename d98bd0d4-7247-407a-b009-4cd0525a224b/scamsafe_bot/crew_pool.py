@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the admission queue is full."""
+
+
+class QueueTimeout(Exception):
+    """The job waited in the queue past max_queue_wait and was dropped unrun."""
+
+
+class CrewPool:
+    """
+    Bounded thread pool for blocking crew runs (LLM calls, callbacks).
+
+    At most `workers` jobs run at once and at most `max_queue` wait behind
+    them; past that, submit() fails immediately with PoolSaturated instead
+    of piling up. A queued job that waited longer than max_queue_wait is
+    dropped when it reaches a worker (QueueTimeout), since its caller has
+    most likely given up by then.
+    """
+
+    def __init__(self, workers: int = 8, max_queue: int = 32, max_queue_wait: float = 30.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _run(self, enqueued: float, fn: Callable, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            if time.monotonic() - enqueued > self.max_queue_wait:
+                self.timed_out += 1
+                raise QueueTimeout(f"queued for more than {self.max_queue_wait:.0f}s")
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def _release(self, future):
+        # Runs for finished and cancelled (never started) jobs alike
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Queues fn(*args, **kwargs); returns a concurrent Future or raises PoolSaturated."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f"{self.workers} running, {self.max_queue} queued")
+        with self._lock:
+            self.queued += 1
+        try:
+            future = self._executor.submit(self._run, time.monotonic(), fn, args, kwargs)
+        except RuntimeError:
+            # Executor shut down
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise PoolSaturated("pool is shut down")
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Awaitable submit() for async handlers; the event loop stays free."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
@@ -0,0 +1,70 @@
+import os
+import threading
+from typing import Dict, Optional
+
+from .detector import ScamDetector
+
+# Detection tiers, cheapest first. Everything but "llm" skips the detector agent.
+TIERS = ("blocklist", "cache", "campaign", "regex_scam", "regex_benign", "llm")
+
+FASTPATH_SCAM_SCORE = float(os.getenv("SCAMSAFE_FASTPATH_SCAM_SCORE", "0.9"))
+FASTPATH_BENIGN_SCORE = float(os.getenv("SCAMSAFE_FASTPATH_BENIGN_SCORE", "0.0"))
+
+
+class DetectionGate:
+    """
+    Settles clear-cut messages with the local regex scorer so only the
+    ambiguous middle band pays for an LLM detection round-trip.
+
+    A raw weighted score >= scam_score is a confident scam (e.g. UPI ID +
+    bit.ly + "KYC urgent"); <= benign_score (default: no indicator at all)
+    is confidently benign. Also counts every turn's detection tier so the
+    share of traffic on each is visible in stats().
+    """
+
+    def __init__(self, detector: Optional[ScamDetector] = None,
+                 scam_score: float = FASTPATH_SCAM_SCORE, benign_score: float = FASTPATH_BENIGN_SCORE):
+        if benign_score >= scam_score:
+            raise ValueError("benign_score must be below scam_score")
+        self.detector = detector or ScamDetector()
+        self.scam_score = scam_score
+        self.benign_score = benign_score
+        self._counts = dict.fromkeys(TIERS, 0)
+        self._lock = threading.Lock()
+
+    def classify(self, message: str) -> Optional[Dict]:
+        """
+        Detection verdict from the regex tier, or None if the message is in
+        the ambiguous band and needs the LLM detector. Counts the tier.
+        """
+        features = self.detector.features(message)
+        score = features["score"]
+        if score >= self.scam_score:
+            tier, is_scam, confidence = "regex_scam", True, min(score, 0.99)
+        elif score <= self.benign_score:
+            tier, is_scam, confidence = "regex_benign", False, 0.1
+        else:
+            self.record("llm")
+            return None
+        self.record(tier)
+        return {
+            "is_scam": is_scam,
+            "confidence": round(confidence, 2),
+            "risk_factors": features["matches"],
+            "tier": tier
+        }
+
+    def record(self, tier: str):
+        with self._lock:
+            self._counts[tier] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "thresholds": {"scam_score": self.scam_score, "benign_score": self.benign_score},
+            "turns": total,
+            "tiers": counts,
+            "fractions": {tier: round(n / total, 4) if total else 0.0 for tier, n in counts.items()},
+        }
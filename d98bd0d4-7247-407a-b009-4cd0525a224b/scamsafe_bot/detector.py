@@ -1,11 +1,37 @@
 
-import re
 import random
+from bisect import bisect_right
 from .utils import simulate_latency
 from .prompts import PHASE_1_SYSTEM_PROMPT
+from .rule_packs import RulePackManager, pack_path
+from .verdict_cache import VerdictCache
+from .blocklist import Blocklist
+from .intel_extractor import extract_intel
+
+# Weighted keyword tables live in rules/detector.json and are compiled once
+# into a single automaton; edits are hot-swapped while the server runs.
+DETECTOR_RULES = RulePackManager(pack_path("detector"))
+
+# Mule UPI / phone / phishing-domain filters (empty if none were built)
+BLOCKLIST = Blocklist()
+
+# Joins batch messages for a single scan; unknown to the automaton, so it
+# resets matching state and no hit can span two messages.
+BATCH_SEPARATOR = "\x00"
+
+_ASCII_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_UPI_HANDLE_CHARS = _ASCII_LETTERS | frozenset("0123456789.-_")
 
 class ScamDetector:
-    def __init__(self):
+    def __init__(self, cache=None, rules=None, blocklist=None):
+        # Campaign texts repeat verbatim across victims; verdicts are cached
+        # by normalized-message hash (see verdict_cache.py)
+        self.cache = cache if cache is not None else VerdictCache()
+        self.rules = rules or DETECTOR_RULES
+        self.blocklist = blocklist if blocklist is not None else BLOCKLIST
+        # Verdicts from the previous rule pack are stale after a swap
+        # (held weakly, so short-lived detectors don't pile up listeners)
+        self.rules.on_swap(self._rules_swapped)
         self.risk_patterns = [
             r"urgent", r"immediately", r"blocked", r"suspended",
             r"click here", r"bit\.ly", r"verify", r"kyc",
@@ -13,58 +39,101 @@ class ScamDetector:
             r"lottery", r"won", r"prize"
         ]
         
+    def _rules_swapped(self, pack):
+        self.cache.clear()
+
     def assess_threat(self, message):
         """
         Analyzes the message for scam indicators with weighted scoring.
         Returns a JSON-compatible dict.
         """
-        simulate_latency()
-        
-        message_lower = message.lower()
-        score = 0.0
-        matches = []
+        cached = self.cache.get(message)
+        if cached is not None:
+            return cached
         
-        # Weighted Keywords
-        # 1. Financial/Official Scams
-        critical_keywords = [r"urgent", r"immediately", r"blocked", r"suspended", r"kyc", r"sbi", r"hdfc", r"otp"]
+        # A known mule account / phishing domain settles it without scoring
+        blocklisted = self.blocklisted(message)
+        if blocklisted:
+            verdict = self._blocklist_verdict(blocklisted)
+            self.cache.put(message, verdict)
+            return verdict
         
-        # 2. Emergency/Distress Scams (New Category)
-        emergency_keywords = [r"wedding", r"hospital", r"bounced", r"sister", r"emergency", r"help needed", r"stuck", r"god bless"]
+        simulate_latency()
         
-        # 3. Payment/Action Scams
-        payment_keywords = [r"gpay", r"paytm", r"phonepe", r"transfer", r"rupees", r"account details", r"send money"]
+        pack = self.rules.current
+        verdict = self._verdict(*self._score(pack, message))
+        if pack is self.rules.current:
+            self.cache.put(message, verdict)
+        return verdict
+
+    def assess_batch(self, messages):
+        """
+        Scores many messages in one call. Returns verdict dicts in input order,
+        identical to calling assess_threat on each message: cached verdicts
+        and blocklist hits are settled first, and the rest are scored.
+        Pays the simulated latency once per batch (if anything is scored),
+        and runs the automaton once over those messages joined by a
+        separator no keyword contains.
+        """
+        verdicts = [self.cache.get(message) for message in messages]
+        to_score = []
+        for i, message in enumerate(messages):
+            if verdicts[i] is not None:
+                continue
+            blocklisted = self.blocklisted(message)
+            if blocklisted:
+                verdicts[i] = self._blocklist_verdict(blocklisted)
+                self.cache.put(message, verdicts[i])
+            else:
+                to_score.append(i)
+        if not to_score:
+            return verdicts
         
-        suspicious_keywords = [r"click here", r"bit\.ly", r"verify", r"lottery", r"won", r"prize", r"refund"]
+        simulate_latency()
         
-        for pattern in critical_keywords:
-            if re.search(pattern, message_lower):
-                score += 0.3
-                matches.append(pattern)
-
-        for pattern in emergency_keywords:
-            if re.search(pattern, message_lower):
-                score += 0.3  # High risk for emotional manipulation
-                matches.append(pattern)
-
-        for pattern in payment_keywords:
-            if re.search(pattern, message_lower):
-                score += 0.2
-                matches.append(pattern)
-                
-        for pattern in suspicious_keywords:
-            if re.search(pattern, message_lower):
-                score += 0.15
-                matches.append(pattern)
+        pack = self.rules.current
+        lowered = [messages[i].lower() for i in to_score]
+        starts = []
+        pos = 0
+        for text in lowered:
+            starts.append(pos)
+            pos += len(text) + len(BATCH_SEPARATOR)
+        joined = BATCH_SEPARATOR.join(lowered)
         
-        # Check for URLs or UPIs (Strong indicators)
-        if re.search(r"http|www\.|bit\.ly", message_lower):
-            score += 0.2
-            matches.append("contains_url")
-            
-        if re.search(r"[a-zA-Z0-9.\-_]+@[a-zA-Z]+", message):  # Simple UPI check
-            score += 0.2
-            matches.append("contains_upi")
+        hit_ids = [set() for _ in lowered]
+        for offset, term_id in pack.matcher.scan(joined):
+            hit_ids[bisect_right(starts, offset) - 1].add(term_id)
         
+        fresh = pack is self.rules.current
+        for i, ids in zip(to_score, hit_ids):
+            verdicts[i] = self._verdict(*self._sum_hits(pack, self._checked(pack, ids, messages[i])))
+            if fresh:
+                self.cache.put(messages[i], verdicts[i])
+        return verdicts
+
+    def blocklisted(self, message):
+        """Extracted UPI IDs / phones / URL domains found in the blocklist filters."""
+        if not self.blocklist:
+            return []
+        return self.blocklist.check_matches(extract_intel(message))
+
+    def features(self, message):
+        """
+        Raw per-message features for incremental scorers (no latency, no cache):
+        the weighted score, matched indicators and distinct hits per category.
+        """
+        pack = self.rules.current
+        score, matches = self._score(pack, message)
+        categories = {}
+        for label in matches:
+            category = pack.label_category[label]
+            categories[category] = categories.get(category, 0) + 1
+        blocklisted = self.blocklisted(message)
+        if blocklisted:
+            categories["blocklist"] = len(blocklisted)
+        return {"score": score, "matches": matches, "categories": categories, "blocklisted": blocklisted}
+
+    def _verdict(self, score, matches):
         # Normalize Score
         is_scam = score > 0.3
         confidence = min(score, 0.99) if is_scam else 0.1
@@ -75,3 +144,77 @@ class ScamDetector:
             "type": "financial_scam" if is_scam else "safe",
             "reason": f"Detected indicators: {matches}" if matches else "No suspicious patterns found."
         }
+
+    def _blocklist_verdict(self, blocklisted):
+        return {
+            "is_scam": True,
+            "confidence": 0.99,
+            "type": "financial_scam",
+            "reason": f"Blocklisted indicators: {blocklisted}"
+        }
+
+    def scan(self, message_lower):
+        """
+        Single pass over the lowercased message.
+        Returns [(offset, category, label)] for every indicator hit.
+        """
+        pack = self.rules.current
+        return [(offset,) + pack.matcher.terms[term_id] for offset, term_id in self._hits(pack, message_lower)]
+
+    # The pack is passed down explicitly so one call never mixes two versions
+
+    def _hits(self, pack, message_lower):
+        terms = pack.matcher.terms
+        for offset, term_id in pack.matcher.scan(message_lower):
+            if terms[term_id][0] == "upi" and not _looks_like_upi(message_lower, offset):
+                continue
+            yield offset, term_id
+
+    def _score(self, pack, message):
+        ids = {term_id for _, term_id in pack.matcher.scan(message.lower())}
+        return self._sum_hits(pack, self._checked(pack, ids, message))
+
+    def _checked(self, pack, term_ids, message):
+        # '@' counts as a UPI ID only if the original text has one (see _has_upi)
+        terms = pack.matcher.terms
+        upi_ids = {term_id for term_id in term_ids if terms[term_id][0] == "upi"}
+        if upi_ids and not _has_upi(message):
+            return term_ids - upi_ids
+        return term_ids
+
+    def _sum_hits(self, pack, term_ids):
+        # Each indicator counts once, summed in declaration order so the
+        # float total matches the old per-pattern loop exactly.
+        score = 0.0
+        matches = []
+        for term_id in sorted(term_ids):
+            category, label = pack.matcher.terms[term_id]
+            if label in matches:
+                continue  # contains_url has several trigger terms
+            score += pack.matcher.weights[category]
+            matches.append(label)
+        return score, matches
+
+
+def _has_upi(message):
+    """
+    Whether any '@' in the original text has a handle char before it and an
+    ASCII letter after it, as [a-zA-Z0-9._-]+@[a-zA-Z]+ would match.
+    Checked on the original rather than the lowercased text: lowercasing
+    maps a few non-ASCII letters to ASCII ones (the Kelvin sign to 'k') and
+    can change the length ('İ'), so lowercased offsets don't line up.
+    """
+    at = message.find("@", 1)
+    while 0 < at < len(message) - 1:
+        if message[at - 1] in _UPI_HANDLE_CHARS and message[at + 1] in _ASCII_LETTERS:
+            return True
+        at = message.find("@", at + 1)
+    return False
+
+
+def _looks_like_upi(message_lower, at):
+    """'@' with a handle char before it and a letter after it."""
+    if at == 0 or at + 1 >= len(message_lower):
+        return False
+    before, after = message_lower[at - 1], message_lower[at + 1]
+    return (before in _UPI_HANDLE_CHARS) and ("a" <= after <= "z")
@@ -1,12 +1,36 @@
 
 from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-import uvicorn
-from honeypot_crew import webhook_handler
+import asyncio
+import os
+import time
+from .crew_factory import startup_timings
+_imports_started = time.perf_counter()
+from .honeypot_crew import webhook_handler, detection_cache, campaign_index, intel_store, session_store, detection_gate, persona_router, template_responder, crew_sets, history_compactor, turn_scheduler
+from .detector import ScamDetector, DETECTOR_RULES, BLOCKLIST
+from .crew_pool import CrewPool, PoolSaturated, QueueTimeout
+from .session_backend import SessionBusy
+from .url_canon import shortlink_resolver
+from .persona import PERSONA_RULES
+from .streaming import TurnStream, sse_event
+startup_timings.record("import honeypot modules", (time.perf_counter() - _imports_started) * 1000)
 
 app = FastAPI(title="Scam Honeypot API")
 
+# Shared regex detector for bulk triage (patterns compiled once at import)
+detector = ScamDetector()
+MAX_BATCH_SIZE = 10000
+
+# Crew runs (LLM calls + final callback) are blocking; they go to a bounded
+# pool so the event loop keeps serving while they are in flight
+crew_pool = CrewPool(
+    workers=int(os.getenv("SCAMSAFE_CREW_WORKERS", "8")),
+    max_queue=int(os.getenv("SCAMSAFE_CREW_QUEUE", "32")),
+    max_queue_wait=float(os.getenv("SCAMSAFE_CREW_QUEUE_WAIT", "30"))
+)
+
 class MessageObject(BaseModel):
     sender: str
     text: str
@@ -18,6 +42,9 @@ class WebhookRequest(BaseModel):
     conversationHistory: Optional[List[Dict]] = []
     metadata: Optional[Dict] = {}
 
+class BatchDetectRequest(BaseModel):
+    messages: List[str]
+
 @app.post("/webhook")
 async def webhook(
     request: WebhookRequest,
@@ -32,14 +59,168 @@ async def webhook(
     if x_api_key != "YOUR_SECRET":
         raise HTTPException(status_code=401, detail="Invalid API key")
     
-    # Process through honeypot crew
-    result = webhook_handler(request.dict())
+    # Process through honeypot crew off the event loop; shed load fast
+    # when every worker is busy and the queue is full
+    try:
+        result = await crew_pool.run(webhook_handler, request.dict())
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Honeypot busy, retry shortly", headers={"Retry-After": "2"})
+    except QueueTimeout:
+        raise HTTPException(status_code=503, detail="Honeypot overloaded", headers={"Retry-After": "5"})
+    except SessionBusy:
+        # Another worker is still on this conversation's previous turn
+        raise HTTPException(status_code=409, detail="Session busy, retry shortly", headers={"Retry-After": "2"})
     
     return result
 
+def _streamed_turn(request_data: Dict, stream: TurnStream) -> Dict:
+    """
+    Runs a turn for /webhook/stream; the done event also carries the
+    session's intel, read from its state (shared by every worker) rather
+    than this process's intel_store.
+    """
+    result = webhook_handler(request_data, stream)
+    state = session_store.get(request_data["sessionId"]) or {}
+    return {**result, "extractedIntelligence": state.get("extracted_intel", {})}
+
+@app.post("/webhook/stream")
+async def webhook_stream(
+    request: WebhookRequest,
+    x_api_key: str = Header(None)
+):
+    """
+    Streaming variant of /webhook (Server-Sent Events)
+    event: token  {"text": ...}  Deepak's reply as it is generated
+    event: done   {"status", "reply", "extractedIntelligence"}  final
+    event: error  {"status", "detail"}
+    """
+    
+    if x_api_key != "YOUR_SECRET":
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    # The crew runs on a worker thread; hand its events to the loop
+    stream = TurnStream(lambda event, data: loop.call_soon_threadsafe(events.put_nowait, (event, data)))
+    
+    try:
+        job = crew_pool.submit(_streamed_turn, request.dict(), stream)
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Honeypot busy, retry shortly", headers={"Retry-After": "2"})
+    job.add_done_callback(lambda f: loop.call_soon_threadsafe(events.put_nowait, ("_finished", f)))
+    
+    async def event_source():
+        while True:
+            event, data = await events.get()
+            if event != "_finished":
+                yield sse_event(event, data)
+                continue
+            try:
+                result = data.result()
+            except QueueTimeout:
+                yield sse_event("error", {"status": "error", "detail": "Honeypot overloaded"})
+                return
+            except SessionBusy:
+                yield sse_event("error", {"status": "error", "detail": "Session busy, retry shortly"})
+                return
+            except Exception as e:
+                print(f"❌ Streamed turn failed: {e}")
+                yield sse_event("error", {"status": "error", "detail": "Turn failed"})
+                return
+            if stream.tokens == 0:
+                # Model didn't stream (or reply came from elsewhere): send it whole
+                yield sse_event("token", {"text": result["reply"]})
+            yield sse_event("done", result)
+            return
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/detect/batch")
+def detect_batch(
+    request: BatchDetectRequest,
+    x_api_key: str = Header(None)
+):
+    """
+    Bulk regex triage for carrier SMS dumps
+    Returns one verdict per message, in input order
+    """
+    
+    if x_api_key != "YOUR_SECRET":
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    if len(request.messages) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} messages")
+    
+    # Plain def: FastAPI runs it in the threadpool, so a large batch
+    # does not block the event loop
+    results = detector.assess_batch(request.messages)
+    
+    return {"status": "success", "count": len(results), "results": results}
+
+@app.get("/intel/sessions")
+async def intel_sessions(
+    value: str,
+    category: Optional[str] = None,
+    x_api_key: str = Header(None)
+):
+    """
+    Cross-session correlation: which honeypot sessions saw this
+    UPI ID / bank account / phone number / URL
+    """
+    
+    if x_api_key != "YOUR_SECRET":
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    sessions = intel_store.sessions_for(value, category)
+    return {"value": value, "sessionCount": len(sessions), "sessions": sessions}
+
+@app.on_event("startup")
+def watch_rule_packs():
+    DETECTOR_RULES.start_watching()
+    PERSONA_RULES.start_watching()
+
+@app.on_event("startup")
+def sweep_sessions():
+    # Shared SQLite sessions aren't evicted inline like the in-memory store's
+    if hasattr(session_store, "start_sweeper"):
+        session_store.start_sweeper()
+
+@app.on_event("startup")
+def prewarm_crews():
+    # crewai import + crew builds happen here, off the request path and
+    # after the port is open
+    crew_sets.prewarm_in_background()
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "honeypot"}
 
+@app.get("/stats")
+async def stats():
+    """Verdict cache and campaign index counters"""
+    return {
+        "detector_cache": detector.cache.stats(),
+        "detection_cache": detection_cache.stats(),
+        "detection_tiers": detection_gate.stats(),
+        "persona_router": persona_router.stats(),
+        "templates": template_responder.stats(),
+        "history": history_compactor.stats(),
+        "campaign_index": campaign_index.stats(),
+        "detector_rules": DETECTOR_RULES.stats(),
+        "intel_store": intel_store.stats(),
+        "sessions": session_store.stats(),
+        "crew_pool": crew_pool.stats(),
+        "turn_scheduler": turn_scheduler.stats(),
+        "crew_sets": crew_sets.stats(),
+        "startup": startup_timings.stats(),
+        "shortlink_resolver": shortlink_resolver.stats(),
+        "blocklist": BLOCKLIST.stats()
+    }
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
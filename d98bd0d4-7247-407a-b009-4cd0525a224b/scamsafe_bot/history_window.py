@@ -0,0 +1,155 @@
+import os
+import threading
+from typing import Dict, List, Tuple
+from .intel_extractor import extract_intel
+
+# Prompt tokens the conversation history may take, and how many of the
+# latest messages are always passed verbatim
+HISTORY_TOKEN_BUDGET = int(os.getenv("SCAMSAFE_HISTORY_TOKEN_BUDGET", "600"))
+HISTORY_RECENT_MESSAGES = int(os.getenv("SCAMSAFE_HISTORY_RECENT_MESSAGES", "4"))
+
+# Words of a message kept in its summary line
+SUMMARY_LINE_WORDS = 14
+
+SENDER_LABELS = {"scammer": "Scammer", "user": "Deepak"}
+
+# Intel values live in conversation_state["extracted_intel"]; the prompt
+# only needs to know one was given
+_REDACTED = {
+    "upi_uri": "[UPI]",
+    "upi_id": "[UPI]",
+    "url": "[LINK]",
+    "phone": "[PHONE]",
+    "bank_account": "[ACCOUNT]",
+    "ifsc": "[IFSC]"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for Claude on English/Tanglish."""
+    return (len(text) + 3) // 4
+
+
+def redact_intel(text: str) -> str:
+    parts, last = [], 0
+    for match in extract_intel(text):
+        placeholder = _REDACTED.get(match.kind)
+        if placeholder is None or match.start < last:
+            continue  # keywords stay; a UPI payee inside a redacted link
+        parts.append(text[last:match.start])
+        parts.append(placeholder)
+        last = match.end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def _label(message: Dict) -> str:
+    return SENDER_LABELS.get(message.get("sender"), str(message.get("sender", "?")).title())
+
+
+def summary_line(message: Dict) -> str:
+    """One short, intel-free line standing in for an older message."""
+    words = redact_intel(message.get("text", "")).split()
+    text = " ".join(words[:SUMMARY_LINE_WORDS]) + (" …" if len(words) > SUMMARY_LINE_WORDS else "")
+    return f"- {_label(message)}: {text}"
+
+
+def recent_line(message: Dict) -> str:
+    return f"{_label(message)}: {message.get('text', '')}"
+
+
+def new_window() -> Dict:
+    """Per-session window state, kept in the conversation state (plain data)."""
+    return {
+        "seen": 0,          # conversationHistory messages already taken in
+        "dropped": 0,       # summary lines dropped to stay under budget
+        "summary": [],      # rolling summary, oldest first
+        "recent": [],       # latest messages, verbatim
+        "raw_tokens": 0     # what the whole history would cost verbatim
+    }
+
+
+class HistoryCompactor:
+    """
+    Keeps the conversation history sent to the crew under a token budget.
+
+    The prompt gets a rolling summary of older messages plus the last few
+    messages verbatim. Each turn only the new messages are looked at: a
+    message leaving the recent window becomes one summary line, written
+    once and never regenerated. When summary plus recent still exceed the
+    budget, more messages are folded into the summary and then the oldest
+    summary lines are dropped (counted, so the persona knows the chat is
+    long). Intel values are redacted from summary lines; they reach the
+    crew through the structured extracted_intel state instead.
+    """
+
+    def __init__(self, budget_tokens: int = HISTORY_TOKEN_BUDGET, recent_messages: int = HISTORY_RECENT_MESSAGES):
+        self.budget_tokens = budget_tokens
+        self.recent_messages = recent_messages
+        self.turns = 0
+        self.raw_tokens = 0
+        self.sent_tokens = 0
+        self.resets = 0
+        self._lock = threading.Lock()
+
+    def update(self, window: Dict, history: List[Dict]) -> Tuple[str, int, int]:
+        """
+        Takes in the request's conversationHistory (the platform resends all
+        of it every turn) and returns (prompt text, raw tokens, sent tokens).
+        """
+        if len(history) < window["seen"]:
+            # Client restarted the conversation; start over
+            window.clear()
+            window.update(new_window())
+            with self._lock:
+                self.resets += 1
+        for message in history[window["seen"]:]:
+            window["raw_tokens"] += estimate_tokens(recent_line(message))
+            window["recent"].append(message)
+        window["seen"] = len(history)
+
+        while len(window["recent"]) > self.recent_messages:
+            self._fold(window)
+        text = self.render(window)
+        while estimate_tokens(text) > self.budget_tokens and (len(window["recent"]) > 1 or window["summary"]):
+            if len(window["recent"]) > 1:
+                self._fold(window)
+            else:
+                window["summary"].pop(0)
+                window["dropped"] += 1
+            text = self.render(window)
+
+        sent = estimate_tokens(text)
+        with self._lock:
+            self.turns += 1
+            self.raw_tokens += window["raw_tokens"]
+            self.sent_tokens += sent
+        return text, window["raw_tokens"], sent
+
+    def _fold(self, window: Dict):
+        window["summary"].append(summary_line(window["recent"].pop(0)))
+
+    def render(self, window: Dict) -> str:
+        if not window["summary"] and not window["recent"]:
+            return "(no earlier messages)"
+        lines = []
+        if window["summary"] or window["dropped"]:
+            lines.append("Earlier in the conversation:")
+            if window["dropped"]:
+                lines.append(f"- ({window['dropped']} earlier messages omitted)")
+            lines.extend(window["summary"])
+        if window["recent"]:
+            lines.append("Latest messages:")
+            lines.extend(recent_line(m) for m in window["recent"])
+        return "\n".join(lines)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "raw_tokens": self.raw_tokens,
+                "sent_tokens": self.sent_tokens,
+                "saved_fraction": round(1 - self.sent_tokens / self.raw_tokens, 3) if self.raw_tokens else 0.0,
+                "resets": self.resets,
+                "budget_tokens": self.budget_tokens
+            }
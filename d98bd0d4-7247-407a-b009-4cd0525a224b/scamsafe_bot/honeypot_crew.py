@@ -1,10 +1,27 @@
 
-from crewai import Agent, Task, Crew, Process
 import os
 import json
 import requests
+import time
 from typing import Dict, List, Optional
 from datetime import datetime
+from .verdict_cache import VerdictCache
+from .campaign_index import CampaignIndex
+from .intel_extractor import extract_intel, group_intel
+from .intel_store import IntelStore, merge_intel
+from .url_canon import canonicalize_url, shortlink_resolver
+from .session_store import SessionStore
+from .session_backend import SESSION_BACKEND, SQLiteSessionStore
+from .detector import BLOCKLIST
+from .detection_gate import DetectionGate
+from .model_router import PERSONA_MODELS, PersonaModelRouter
+from .persona import TemplateResponder, slots_from_intel
+from .streaming import TurnStream, route_stream, install_chunk_listener
+from .json_stream import parse_json
+from .llm_replay import LLM_MODE, make_llm
+from .crew_factory import WarmPool, startup_timings
+from .history_window import HistoryCompactor, new_window
+from .turn_scheduler import DeadlineMissed, TurnScheduler, session_value
 
 # Set API key
 os.environ["ANTHROPIC_API_KEY"] = "sk-ant-api03-YOUR-KEY-HERE"
@@ -14,22 +31,43 @@ CALLBACK_URL = "https://your-backend-api.com/api/updateHoneyPotFinalResult"
 API_KEY = "YOUR_SECRET"  # Replace with actual key
 
 # Conversation state management
-conversation_state = {
-    "turns": 0,
-    "scam_detected": False,
-    "confidence": 0.0,
-    "extracted_intel": {
-        "bankAccounts": [],
-        "upiIds": [],
-        "phishingLinks": [],
-        "phoneNumbers": [],
-        "suspiciousKeywords": []
-    },
-    "session_id": None
-}
+def new_conversation_state(session_id: str) -> Dict:
+    return {
+        "turns": 0,
+        "scam_detected": False,
+        "confidence": 0.0,
+        "extracted_intel": {
+            "bankAccounts": [],
+            "upiIds": [],
+            "phishingLinks": [],
+            "phoneNumbers": [],
+            "suspiciousKeywords": []
+        },
+        "model_tiers": [],
+        "templates_used": [],
+        "history": new_window(),
+        "history_tokens": [],  # [verbatim, sent] per turn
+        "session_id": session_id
+    }
+
+# One state per sessionId; concurrent conversations no longer reset each other
+SESSION_TTL_SECONDS = float(os.getenv("SCAMSAFE_SESSION_TTL_SECONDS", str(2 * 3600)))
+MAX_SESSIONS = int(os.getenv("SCAMSAFE_MAX_SESSIONS", "10000"))
+# SCAMSAFE_SESSION_BACKEND=sqlite shares them between worker processes
+if SESSION_BACKEND == "sqlite":
+    session_store = SQLiteSessionStore(new_conversation_state, ttl_seconds=SESSION_TTL_SECONDS)
+else:
+    session_store = SessionStore(new_conversation_state, max_sessions=MAX_SESSIONS, ttl_seconds=SESSION_TTL_SECONDS)
+
+# Crew memory needs an embedding API, which replay runs don't have
+CREW_MEMORY = os.getenv("SCAMSAFE_CREW_MEMORY", "0" if LLM_MODE == "replay" else "1") == "1"
+
+# Agents, tasks and crews are built lazily by build_crews() from these specs;
+# importing this module does not import crewai.
 
 # Agent 1: Scam Detector (Ultra-Fast)
-scam_detector = Agent(
+DETECTOR_MODEL = "claude-3-haiku-20241022"
+SCAM_DETECTOR_SPEC = dict(
     role="Silent scam intent classifier - NEVER reveal detection",
     goal="""Analyze message in <500ms. Detect UPI/bank/phishing patterns with 98% precision.
     
@@ -52,12 +90,11 @@ scam_detector = Agent(
     False positive rate: 0.3%. Detection latency: <500ms.""",
     
     verbose=False,
-    allow_delegation=False,
-    llm="claude-3-haiku-20241022"
+    allow_delegation=False
 )
 
 # Agent 2: Victim Persona - Deepak (Intelligence Extraction)
-victim_persona = Agent(
+VICTIM_PERSONA_SPEC = dict(
     role="Confused 42yo Chennai accountant - scammer bait with intelligence extraction",
     goal="""Engage 18+ turns as Deepak Sharma. Extract ALL intel from SCAMMER'S replies:
     - UPI IDs (when scammer provides their payment ID)
@@ -117,12 +154,11 @@ CRITICAL RULES:
 5. Output extracted intel in JSON after EVERY turn""",
     
     verbose=True,
-    allow_delegation=False,
-    llm="claude-3-7-sonnet-20251022"
+    allow_delegation=False
 )
 
 # Task 1: Detection (Fast Screening)
-detection_task = Task(
+DETECTION_TASK_SPEC = dict(
     description="""Analyze incoming message for scam patterns with 98% precision:
 
 EXACT PATTERN MATCHING:
@@ -156,15 +192,19 @@ Return JSON ONLY. No explanations.""",
     "confidence": 0.92,
     "risk_factors": ["UPI_ID", "PHISHING_LINK", "AUTHORITY_PRETEXT"],
     "trigger_engagement": true
-}""",
-    
-    agent=scam_detector
+}"""
 )
 
 # Task 2: Engagement & Intelligence Extraction
-engagement_task = Task(
+ENGAGEMENT_TASK_SPEC = dict(
     description="""IF is_scam=true AND confidence>0.85, activate Deepak persona.
 
+CONVERSATION SO FAR (turn {turn_count}; intel already extracted is tracked separately):
+{history}
+
+SCAMMER'S NEW MESSAGE:
+{message}
+
 INTELLIGENCE EXTRACTION PROTOCOL (18-TURN ENGAGEMENT):
 
 PHASE 1 (Turns 1-6): BUILD TRUST & DROP BAIT
@@ -206,58 +246,104 @@ OUTPUT FORMAT (Every turn):
     "engagement_score": 0.87
 }""",
     
-    expected_output="Natural Deepak response + structured intel JSON with scammer's details",
-    agent=victim_persona,
-    context=[detection_task]
+    expected_output="Natural Deepak response + structured intel JSON with scammer's details"
 )
 
-# Assemble Crew
-honeypot_crew = Crew(
-    agents=[scam_detector, victim_persona],
-    tasks=[detection_task, engagement_task],
-    process=Process.sequential,
-    verbose=True,
-    memory=True
+# Engagement-only path: used when the detection verdict is already known
+# (e.g. a campaign template seen before), so the detector agent is skipped
+CACHED_ENGAGEMENT_TASK_SPEC = dict(
+    description=ENGAGEMENT_TASK_SPEC["description"] + """
+
+DETECTION VERDICT (already known, do not re-analyze): {detection}""",
+    expected_output=ENGAGEMENT_TASK_SPEC["expected_output"]
 )
 
+def build_crews() -> Dict:
+    """
+    Builds one independent set of agents, tasks and crews:
+    persona tier -> (full crew with detector, engagement-only crew).
+    crewai tasks keep per-run state, so a set serves one turn at a time
+    (see crew_sets below).
+    """
+    with startup_timings.step("import crewai"):
+        from crewai import Agent, Task, Crew, Process
+    # Persona LLM chunks -> the TurnStream of the turn that produced them
+    install_chunk_listener()
+    
+    scam_detector = Agent(**SCAM_DETECTOR_SPEC, llm=make_llm(DETECTOR_MODEL))
+    detection_task = Task(**DETECTION_TASK_SPEC, agent=scam_detector)
+    crews = {}
+    for tier, model in PERSONA_MODELS.items():
+        # Streamed for /webhook/stream
+        victim_persona = Agent(**VICTIM_PERSONA_SPEC, llm=make_llm(model, stream=True))
+        engagement_task = Task(**ENGAGEMENT_TASK_SPEC, agent=victim_persona, context=[detection_task])
+        cached_engagement_task = Task(**CACHED_ENGAGEMENT_TASK_SPEC, agent=victim_persona)
+        crews[tier] = (
+            Crew(agents=[scam_detector, victim_persona], tasks=[detection_task, engagement_task],
+                 process=Process.sequential, verbose=True, memory=CREW_MEMORY),
+            Crew(agents=[victim_persona], tasks=[cached_engagement_task],
+                 process=Process.sequential, verbose=True, memory=CREW_MEMORY)
+        )
+    return crews
+
+# Pre-built crew sets reused across turns (one per concurrent turn at most);
+# prewarmed in the background after server startup
+crew_sets = WarmPool(
+    build_crews,
+    warm=int(os.getenv("SCAMSAFE_CREW_WARM", "2")),
+    max_size=int(os.getenv("SCAMSAFE_CREW_WORKERS", "8")),
+    name="crew set"
+)
+
+# Per-turn persona model choice from phase, intel yield and latency budget
+persona_router = PersonaModelRouter()
+
+# Stock turns answered from intent templates (rules/persona.json), no LLM
+template_responder = TemplateResponder()
+
+# LLM slots handed out by session value and reply deadline
+turn_scheduler = TurnScheduler()
+
+# Conversation history for the prompt: rolling summary + latest messages
+history_compactor = HistoryCompactor()
+
+# Detection verdicts keyed by normalized message hash
+detection_cache = VerdictCache()
+
+# Near-duplicate campaign grouping (same template, different UPI/amount/name)
+campaign_index = CampaignIndex()
+
+# Regex fast path: clear scams / clearly benign texts skip the detector agent
+detection_gate = DetectionGate()
+
 # Intelligence Extraction Helper
-def extract_intel_from_message(message: str, current_intel: Dict) -> Dict:
+# Extractor match kinds -> extracted_intel keys (the callback schema has no
+# IFSC field, so IFSC codes are not stored here)
+CREW_INTEL_CATEGORIES = {
+    "upi_id": "upiIds",
+    "upi_uri": "upiIds",
+    "bank_account": "bankAccounts",
+    "url": "phishingLinks",
+    "phone": "phoneNumbers",
+    "keyword": "suspiciousKeywords"
+}
+
+def extract_intel_from_message(message: str, matches: Optional[List] = None) -> Dict:
     """Parse scammer's message for intelligence (UPI/bank/links/phones)"""
-    import re
-    
-    # Extract UPI IDs
-    upi_patterns = [
-        r'@[a-zA-Z]+',
-        r'upi://pay\?pa=[^\s]+',
-        r'[\w\.]+@[\w]+',
-    ]
-    for pattern in upi_patterns:
-        matches = re.findall(pattern, message)
-        current_intel["upiIds"].extend([m for m in matches if m not in current_intel["upiIds"]])
-    
-    # Extract bank accounts (10-18 digits)
-    bank_pattern = r'\b\d{10,18}\b'
-    banks = re.findall(bank_pattern, message)
-    current_intel["bankAccounts"].extend([b for b in banks if b not in current_intel["bankAccounts"]])
-    
-    # Extract phishing links
-    url_pattern = r'https?://[^\s]+'
-    urls = re.findall(url_pattern, message)
-    current_intel["phishingLinks"].extend([u for u in urls if u not in current_intel["phishingLinks"]])
-    
-    # Extract phone numbers
-    phone_pattern = r'\+?91[-\s]?\d{10}|\d{10}'
-    phones = re.findall(phone_pattern, message)
-    current_intel["phoneNumbers"].extend([p for p in phones if p not in current_intel["phoneNumbers"]])
-    
-    # Extract suspicious keywords
-    keywords = ["refund", "verify", "KYC", "constable", "officer", "department", 
-                "urgent", "blocked", "PF", "EB", "bill", "payment"]
-    found_keywords = [kw for kw in keywords if kw.lower() in message.lower()]
-    current_intel["suspiciousKeywords"].extend([k for k in found_keywords 
-                                                if k not in current_intel["suspiciousKeywords"]])
-    
-    return current_intel
+    intel = group_intel(matches if matches is not None else extract_intel(message), CREW_INTEL_CATEGORIES)
+    if "phishingLinks" in intel:
+        # Canonical form, so bit.ly/x and https://bit.ly/x?utm_source=sms are one link
+        intel["phishingLinks"] = list(dict.fromkeys(canonicalize_url(url) for url in intel["phishingLinks"]))
+    return intel
+
+# Session intel as ordered sets + cross-session reverse index; outlives the
+# session's conversation state
+intel_store = IntelStore()
+
+def _record_expansion(session_id: str, short_url: str, resolved: Optional[str]):
+    if resolved and resolved != short_url:
+        print(f"🔗 {short_url} -> {resolved}")
+        intel_store.record(session_id, {"phishingLinks": [resolved]})
 
 # Final Callback Function
 def send_final_callback(session_id: str, state: Dict):
@@ -292,7 +378,7 @@ def send_final_callback(session_id: str, state: Dict):
         print(f"❌ FINAL CALLBACK ERROR: {str(e)}")
 
 # Main Webhook Handler
-def webhook_handler(request_data: Dict) -> Dict:
+def webhook_handler(request_data: Dict, stream: Optional[TurnStream] = None) -> Dict:
     """
     Process incoming webhook request
     
@@ -318,77 +404,185 @@ def webhook_handler(request_data: Dict) -> Dict:
         "reply": "Deepak's response"
     }
     """
-    global conversation_state
-    
     # Extract request data
     session_id = request_data.get("sessionId")
+    
+    # Turns of one session run in order under its lock; other sessions proceed.
+    # With a stream, Deepak's reply is also sent token by token as generated.
+    with session_store.session(session_id) as conversation_state:
+        return _handle_turn(conversation_state, request_data, stream)
+
+def _run_crew(conversation_state: Dict, crew_input: Dict, cached_detection: Optional[Dict],
+              turn_started: float, budget_ms: float, stream: Optional[TurnStream] = None):
+    """Runs the turn through the LLM crew; returns (reply, fresh detection verdict or None)."""
+    tier, tier_reason = persona_router.choose(
+        conversation_state["turns"],
+        conversation_state["extracted_intel"],
+        budget_ms=budget_ms,
+        elapsed_ms=(time.monotonic() - turn_started) * 1000
+    )
+    conversation_state["model_tiers"].append(tier)
+    print(f"🧭 Persona tier: {tier} ({tier_reason})")
+    
+    with crew_sets.checkout() as crews:
+        full_crew, engagement_crew = crews[tier]
+        kickoff_started = time.monotonic()
+        # Persona LLM chunks -> this turn's stream
+        with route_stream([agent.llm for agent in engagement_crew.agents], stream):
+            if cached_detection is not None:
+                result = engagement_crew.kickoff(inputs={**crew_input, "detection": json.dumps(cached_detection)})
+                # Only persona-only runs time the tier (full runs include the detector)
+                persona_router.observe(tier, (time.monotonic() - kickoff_started) * 1000)
+            else:
+                result = full_crew.kickoff(inputs=crew_input)
+    
+    fresh_verdict = None
+    
+    # Parse crew result: one incremental pass per output, stopping as soon
+    # as the fields we need have been read
+    try:
+        # Extract detection confidence (from the detector task's own output)
+        if cached_detection is None:
+            detection_output = str(result.tasks_output[0]) if getattr(result, "tasks_output", None) else str(result)
+            confidence = parse_json(detection_output, wanted=[("confidence",)]).get(("confidence",))
+            if isinstance(confidence, (int, float)):
+                fresh_verdict = {"is_scam": float(confidence) > 0.85, "confidence": float(confidence)}
+                settle_detection(conversation_state, fresh_verdict)
+                detection_cache.put(crew_input["message"], fresh_verdict)
+        
+        # Extract Deepak's response (plain text if the persona skipped the JSON)
+        deepak_response = str(result)
+        public_response = parse_json(deepak_response, wanted=[("public_response",)]).get(("public_response",))
+        if isinstance(public_response, str) and public_response:
+            deepak_response = public_response
+        
+    except Exception as e:
+        print(f"⚠️ Result parsing error: {e}")
+        deepak_response = str(result)
+    
+    return deepak_response, fresh_verdict
+
+def settle_detection(conversation_state: Dict, verdict: Dict):
+    """
+    Applies one message's verdict to the session. Once a session is flagged
+    it stays flagged: a short benign reply mid-scam ("ok sir") must not
+    clear scam_detected and suppress the final callback.
+    """
+    if conversation_state["scam_detected"]:
+        if verdict["is_scam"]:
+            conversation_state["confidence"] = max(conversation_state["confidence"], verdict["confidence"])
+        return
+    conversation_state["confidence"] = verdict["confidence"]
+    conversation_state["scam_detected"] = verdict["is_scam"]
+
+def _handle_turn(conversation_state: Dict, request_data: Dict, stream: Optional[TurnStream] = None) -> Dict:
+    turn_started = time.monotonic()
+    session_id = request_data.get("sessionId")
     message_obj = request_data.get("message", {})
     scammer_message = message_obj.get("text", "")
     conversation_history = request_data.get("conversationHistory", [])
     
-    # Initialize session
-    if conversation_state["session_id"] != session_id:
-        conversation_state = {
-            "turns": 0,
-            "scam_detected": False,
-            "confidence": 0.0,
-            "extracted_intel": {
-                "bankAccounts": [],
-                "upiIds": [],
-                "phishingLinks": [],
-                "phoneNumbers": [],
-                "suspiciousKeywords": []
-            },
-            "session_id": session_id
-        }
-    
     # Increment turn counter
     conversation_state["turns"] += 1
     
     # Extract intelligence from scammer's message
-    conversation_state["extracted_intel"] = extract_intel_from_message(
-        scammer_message, 
-        conversation_state["extracted_intel"]
+    intel_matches = extract_intel(scammer_message)
+    message_intel = extract_intel_from_message(scammer_message, intel_matches)
+    intel_store.record(session_id, message_intel, message_obj.get("timestamp"))
+    # The session state carries intel from every worker; intel_store adds
+    # this process's late short-link expansions
+    conversation_state["extracted_intel"] = merge_intel(
+        conversation_state["extracted_intel"], intel_store.session_intel(session_id)
     )
     
+    # Short links are expanded off the request path; the landing page is
+    # added to the session's intel when (or if) the resolver gets there
+    for link in message_intel.get("phishingLinks", []):
+        if shortlink_resolver.is_short_link(link):
+            shortlink_resolver.expand_later(link, lambda short, resolved, sid=session_id: _record_expansion(sid, short, resolved))
+    
     print(f"\n{'='*70}")
     print(f"📨 TURN {conversation_state['turns']} | Session: {session_id}")
     print(f"{'='*70}")
     print(f"Scammer: {scammer_message[:100]}...")
     print(f"Extracted Intel: {json.dumps(conversation_state['extracted_intel'], indent=2)}")
     
-    # Process through crew
+    # Process through crew; history goes in compacted, under a token budget
+    history_text, raw_tokens, sent_tokens = history_compactor.update(conversation_state["history"], conversation_history)
+    conversation_state["history_tokens"].append([raw_tokens, sent_tokens])
+    print(f"🧾 History tokens: {raw_tokens} verbatim -> {sent_tokens} sent")
     crew_input = {
         "message": scammer_message,
-        "history": conversation_history,
+        "history": history_text,
         "turn_count": conversation_state["turns"]
     }
     
-    result = honeypot_crew.kickoff(inputs=crew_input)
+    # Known mule UPI / phone / phishing domain: certain scam, skip detection
+    blocklisted = BLOCKLIST.check_matches(intel_matches)
+    if blocklisted:
+        print(f"⛔ Blocklisted intel: {blocklisted}")
     
-    # Parse crew result
-    try:
-        # Extract detection confidence
-        if "confidence" in str(result):
-            import re
-            conf_match = re.search(r'"confidence":\s*([0-9.]+)', str(result))
-            if conf_match:
-                conversation_state["confidence"] = float(conf_match.group(1))
-                conversation_state["scam_detected"] = conversation_state["confidence"] > 0.85
-        
-        # Extract Deepak's response
-        deepak_response = str(result)
-        
-        # Clean JSON artifacts if present
-        if "public_response" in deepak_response:
-            import re
-            match = re.search(r'"public_response":\s*"([^"]+)"', deepak_response)
-            if match:
-                deepak_response = match.group(1)
-        
-    except Exception as e:
-        print(f"⚠️ Result parsing error: {e}")
-        deepak_response = str(result)
+    # Identical campaign texts reuse the cached detection verdict; variants
+    # of a known campaign reuse that campaign's verdict
+    cached_detection = (
+        {"is_scam": True, "confidence": 0.99, "blocklisted": blocklisted} if blocklisted
+        else detection_cache.get(scammer_message)
+    )
+    if cached_detection is not None:
+        detection_gate.record("blocklist" if blocklisted else "cache")
+    campaign_sig = campaign_index.signature(scammer_message)
+    if cached_detection is None:
+        campaign = campaign_index.lookup(scammer_message, sig=campaign_sig)
+        if campaign and campaign["verdict"]:
+            print(f"🧬 Campaign {campaign['campaign_id']} match (similarity {campaign['similarity']}), "
+                  f"known intel: {json.dumps(campaign['intel'])}")
+            cached_detection = campaign["verdict"]
+            detection_gate.record("campaign")
+    
+    # Only the ambiguous middle band goes to the LLM detector
+    if cached_detection is None:
+        cached_detection = detection_gate.classify(scammer_message)
+    
+    if cached_detection is not None:
+        print(f"⚡ Detection settled without the detector agent: {cached_detection}")
+        settle_detection(conversation_state, cached_detection)
+    
+    # Stock turns (payment ask, resend link, OTP stall...) come from intent
+    # templates; only messages that need a novel answer reach the LLM
+    templated = None
+    if cached_detection is not None and cached_detection["is_scam"]:
+        templated = template_responder.reply(
+            scammer_message,
+            slots_from_intel(conversation_state["extracted_intel"]),
+            conversation_state["templates_used"]
+        )
+    
+    if templated is not None:
+        print(f"📋 Template reply: {templated['template']}")
+        conversation_state["model_tiers"].append("template")
+        deepak_response, fresh_verdict = templated["reply"], None
+        if stream is not None:
+            stream.token(deepak_response)
+    else:
+        # Under load, valuable sessions get the LLM first; a turn that can't
+        # get it before its deadline stalls with a canned line instead
+        budget_ms = (request_data.get("metadata") or {}).get("latencyBudgetMs") or persona_router.default_budget_ms
+        try:
+            with turn_scheduler.slot(
+                session_value(conversation_state["extracted_intel"], conversation_state["confidence"]),
+                turn_started + budget_ms / 1000
+            ):
+                deepak_response, fresh_verdict = _run_crew(conversation_state, crew_input, cached_detection, turn_started, budget_ms, stream)
+        except DeadlineMissed as e:
+            print(f"⏳ {e}, sending a stall reply")
+            conversation_state["model_tiers"].append("stall")
+            deepak_response, fresh_verdict = template_responder.stall_reply(conversation_state["templates_used"]), None
+            if stream is not None:
+                stream.token(deepak_response)
+    
+    # Index this message under its campaign with the intel it carried
+    campaign_id = campaign_index.add(scammer_message, fresh_verdict, message_intel, sig=campaign_sig)
+    print(f"Campaign: {campaign_id}")
     
     print(f"\nDeepak: {deepak_response[:150]}...")
     print(f"{'='*70}\n")
@@ -503,5 +697,5 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("✅ FINAL STATE:")
     print("="*70)
-    print(json.dumps(conversation_state, indent=2))
+    print(json.dumps(session_store.get("honeypot-test-v3"), indent=2))
     print("\n🎉 CALLBACK TRIGGERED! Check logs above.")
@@ -0,0 +1,91 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# Scam vocabulary reported as suspiciousKeywords (canonical spelling)
+SUSPICIOUS_KEYWORDS = ["refund", "verify", "KYC", "constable", "officer", "department",
+                       "urgent", "blocked", "PF", "EB", "bill", "payment"]
+_KEYWORD_CANONICAL = {kw.lower(): kw for kw in SUSPICIOUS_KEYWORDS}
+
+_URL_TRAILING = ".,;:!?)]}'\""
+
+
+def _ci(text: str) -> str:
+    return "".join(f"[{c.lower()}{c.upper()}]" if c.isalpha() else re.escape(c) for c in text)
+
+
+def _word(text: str) -> str:
+    # Whole word, case-insensitive; the boundary check sits after the first
+    # char so the alternative still starts with a char class (see below)
+    return _ci(text[0]) + r"(?<!\w.)" + _ci(text[1:]) + r"\b"
+
+
+_HANDLE = r"a-zA-Z0-9.\-_"
+_MOBILE = r"[6-9]\d{4}[\-\s]?\d{5}(?!\d)"
+
+# One compiled scanner for every intel kind. Notes on the shape:
+# - Alternatives are tried in order at each position, so more specific
+#   shapes win (upi:// before URL before UPI ID, mobile before digit run).
+# - Every alternative starts with a literal or char class and ends with an
+#   empty named group that tags the kind (read back via lastgroup); that lets
+#   the regex engine reject most positions without entering the branch.
+# - The final unnamed alternative swallows whole plain words in one step, so
+#   positions inside a word are never retried. It refuses words that run into
+#   ':' '/' '@' or '.x', where a URL or UPI ID could still start mid-word.
+INTEL_PATTERN = re.compile(
+    r"upi://pay\?\S+(?P<upi_uri>)"
+    r"|(?:" + "|".join([_ci("http") + r"[sS]?://", _ci("www."), _ci("bit.ly/"), _ci("tinyurl.com/"), _ci("goo.gl/")])
+    + r")\S+(?P<url>)"
+    rf"|[{_HANDLE}](?<![{_HANDLE}].)[{_HANDLE}]{{1,255}}@[a-zA-Z]{{2,64}}(?P<upi_id>)"
+    r"|[A-Z](?<!\w.)[A-Z]{3}0[A-Z0-9]{6}\b(?P<ifsc>)"
+    r"|(?:\+(?<![\d+].)91[\-\s]?" + _MOBILE + r"|9(?<![\d+].)1[\-\s]?" + _MOBILE
+    + r"|[6-9](?<![\d+].)\d{4}[\-\s]?\d{5}(?!\d))(?P<phone>)"
+    r"|\d(?<!\d.)\d{9,17}(?!\d)(?P<bank_account>)"
+    r"|(?:" + "|".join(_word(k) for k in _KEYWORD_CANONICAL) + r")(?P<keyword>)"
+    r"|[a-zA-Z]++(?![:/@]|\.\S)"
+)
+
+_UPI_PAYEE = re.compile(r"[?&]pa=([a-zA-Z0-9.\-_]{2,256}@[a-zA-Z]{2,64})")
+
+
+class IntelMatch(NamedTuple):
+    kind: str     # upi_uri | url | upi_id | ifsc | phone | bank_account | keyword
+    value: str
+    start: int
+    end: int
+
+
+def extract_intel(message: str) -> List[IntelMatch]:
+    """Every intel entity in the message, in order, from a single regex scan."""
+    found = []
+    for m in INTEL_PATTERN.finditer(message):
+        kind = m.lastgroup
+        if kind is None:
+            continue  # plain word
+        value, start, end = m.group(), m.start(), m.end()
+        if kind in ("url", "upi_uri"):
+            stripped = value.rstrip(_URL_TRAILING)
+            end -= len(value) - len(stripped)
+            value = stripped
+        elif kind == "keyword":
+            value = _KEYWORD_CANONICAL[value.lower()]
+        found.append(IntelMatch(kind, value, start, end))
+        if kind == "upi_uri":
+            # The payee inside a upi://pay link is itself a UPI ID
+            payee = _UPI_PAYEE.search(value)
+            if payee:
+                found.append(IntelMatch("upi_id", payee.group(1), start + payee.start(1), start + payee.end(1)))
+    return found
+
+
+def group_intel(matches: List[IntelMatch], categories: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """
+    Groups matches into {category: [unique values in order]}.
+    categories maps match kinds to output keys; kinds not in it are dropped.
+    Without it, keys are the match kinds themselves.
+    """
+    grouped: Dict[str, Dict[str, None]] = {}
+    for match in matches:
+        key = categories.get(match.kind) if categories is not None else match.kind
+        if key is not None:
+            grouped.setdefault(key, {})[match.value] = None
+    return {key: list(values) for key, values in grouped.items()}
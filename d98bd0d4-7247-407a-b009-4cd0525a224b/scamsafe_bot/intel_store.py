@@ -0,0 +1,172 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+INTEL_CATEGORIES = ["bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "suspiciousKeywords"]
+
+# Categories that identify a mule/scammer and are worth correlating across
+# sessions (keywords are not)
+INDEXED_CATEGORIES = ("bankAccounts", "upiIds", "phishingLinks", "phoneNumbers")
+
+# Sessions kept for cross-session tracing: the least recently updated go
+# past INTEL_MAX_SESSIONS, and any not updated for INTEL_TTL_SECONDS
+INTEL_MAX_SESSIONS = int(os.getenv("SCAMSAFE_INTEL_MAX_SESSIONS", "100000"))
+INTEL_TTL_SECONDS = float(os.getenv("SCAMSAFE_INTEL_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_NON_DIGITS = re.compile(r"\D")
+# scheme://, then userinfo@ and host[:port], then the case-sensitive rest
+_URL_PARTS = re.compile(r"^([a-z][a-z0-9+.-]*://)?((?:[^/?#@]*@)?)([^/?#]*)(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def normalize_entity(category: str, value: str) -> str:
+    """Index key for an entity, so formatting variants correlate."""
+    if category == "phoneNumbers":
+        return _NON_DIGITS.sub("", value)[-10:]
+    if category == "bankAccounts":
+        return _NON_DIGITS.sub("", value)
+    if category == "phishingLinks":
+        # Paths and short-link codes are case-sensitive (bit.ly/AbC != bit.ly/abc)
+        scheme, userinfo, host, rest = _URL_PARTS.match(value.strip()).groups()
+        return (scheme or "").lower() + userinfo + host.lower() + rest
+    return value.strip().lower()
+
+
+def merge_intel(base: Dict[str, List[str]], extra: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Ordered union per category: base values first, then new ones from
+    extra. Values are compared by normalize_entity, so formatting variants
+    of one entity are kept once (as first seen).
+    """
+    merged = {}
+    for category in dict.fromkeys([*INTEL_CATEGORIES, *base, *extra]):
+        values: Dict[str, str] = {}
+        for value in (*base.get(category, ()), *extra.get(category, ())):
+            values.setdefault(normalize_entity(category, value) or value, value)
+        merged[category] = list(values.values())
+    return merged
+
+
+class IntelStore:
+    """
+    Per-session intel as ordered sets, plus a global reverse index from each
+    identifying entity (UPI ID, account, phone, URL) to the sessions it was
+    seen in. Adding and lookups are O(1); intel outlives the conversation
+    state that reported it, so one mule account can be traced across
+    conversations, but is bounded: the least recently updated sessions are
+    dropped past max_sessions, and sessions idle longer than ttl_seconds
+    as new intel comes in.
+    """
+
+    def __init__(self, max_sessions: int = INTEL_MAX_SESSIONS, ttl_seconds: float = INTEL_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # least recently updated first
+        self._sessions: "OrderedDict[str, Dict[str, Dict[str, None]]]" = OrderedDict()
+        self._updated: Dict[str, float] = {}
+        # normalized entity -> {session_id: [first_seen, last_seen, times_seen]}
+        self._index: Dict[str, Dict[str, list]] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def record(self, session_id: str, intel: Dict[str, List[str]], timestamp: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        Merges one message's intel ({category: [values]}) into the session.
+        Returns only the values that were new for this session.
+        """
+        timestamp = timestamp or int(time.time() * 1000)
+        now = time.monotonic()
+        new = {}
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {category: {} for category in INTEL_CATEGORIES}
+            else:
+                self._sessions.move_to_end(session_id)
+            self._updated[session_id] = now
+            for category, values in intel.items():
+                seen = session.setdefault(category, {})
+                for value in values:
+                    if value not in seen:
+                        seen[value] = None
+                        new.setdefault(category, []).append(value)
+                    if category in INDEXED_CATEGORIES:
+                        self._touch(normalize_entity(category, value), session_id, timestamp)
+            self._evict(now)
+        return new
+
+    def _evict(self, now: float):
+        # Caller holds the lock; oldest first, so it stops at the first keeper
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if now - self._updated[session_id] > self.ttl_seconds:
+                self.expired += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evicted += 1
+            else:
+                break
+            self._drop(session_id)
+
+    def _touch(self, key: str, session_id: str, timestamp: int):
+        sightings = self._index.setdefault(key, {})
+        entry = sightings.get(session_id)
+        if entry is None:
+            sightings[session_id] = [timestamp, timestamp, 1]
+        else:
+            entry[1] = max(entry[1], timestamp)
+            entry[2] += 1
+
+    def session_intel(self, session_id: str) -> Dict[str, List[str]]:
+        """Session intel as plain lists (JSON / callback payload shape)."""
+        with self._lock:
+            session = self._sessions.get(session_id, {})
+            return {category: list(session.get(category, ())) for category in INTEL_CATEGORIES}
+
+    def sessions_for(self, value: str, category: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Which sessions used this entity, e.g. sessions_for("porttrusthr@paytm").
+        Without a category, handle@bank values are UPI IDs, other non-numeric
+        values links, and numeric values are tried as both phone and account.
+        """
+        if category:
+            keys = [normalize_entity(category, value)]
+        elif "@" in value and "/" not in value:
+            keys = [normalize_entity("upiIds", value)]
+        elif any(c.isalpha() for c in value):
+            keys = [normalize_entity("phishingLinks", value)]
+        else:
+            keys = [normalize_entity("phoneNumbers", value), normalize_entity("bankAccounts", value)]
+        result = {}
+        with self._lock:
+            for key in keys:
+                for session_id, (first, last, count) in self._index.get(key, {}).items():
+                    result[session_id] = {"first_seen": first, "last_seen": last, "times_seen": count}
+        return result
+
+    def drop_session(self, session_id: str):
+        """Forgets a session's intel and its reverse-index entries."""
+        with self._lock:
+            self._drop(session_id)
+
+    def _drop(self, session_id: str):
+        # Caller holds the lock
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        del self._updated[session_id]
+        for category in INDEXED_CATEGORIES:
+            for value in session.get(category, ()):
+                key = normalize_entity(category, value)
+                sightings = self._index.get(key)
+                if sightings is not None:
+                    sightings.pop(session_id, None)
+                    if not sightings:
+                        del self._index[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "indexed_entities": len(self._index),
+                    "evicted": self.evicted, "expired": self.expired}
@@ -0,0 +1,230 @@
+import json
+import re
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_STRING_STOP = re.compile(r'["\\]')
+_LITERAL_END = frozenset(",}] \t\r\n")
+_LITERAL_START = frozenset("-0123456789tfn")
+_WHITESPACE = frozenset(" \t\r\n")
+
+Path = Tuple
+
+
+class JSONStreamParser:
+    """
+    Incremental parser for the JSON object inside LLM output.
+
+    Feed it chunks as they arrive; each character is looked at once, so
+    the cost of a whole response is linear no matter how it was chunked.
+    Text before the first '{' (prose, a ```json fence) is skipped and
+    anything after the object closes is ignored. A '{' that turns out not
+    to start valid JSON (e.g. "Analysis of {message}:") is dropped and
+    scanning resumes at the next '{', so only the text of a malformed
+    candidate is looked at twice.
+
+    Completed values are reported by path as soon as they close, e.g.
+    ("is_scam",) or ("extracted_intel", "upiIds", 0); string values can
+    also be followed character by character through on_text. With
+    `wanted`, parsing stops (done=True) once every wanted path has been
+    seen, which lets callers bail out early. Fields of a candidate that
+    turns out malformed are forgotten, but on_field/on_text calls already
+    made for it can't be taken back.
+    """
+
+    def __init__(self, wanted: Optional[Iterable[Path]] = None,
+                 on_field: Optional[Callable[[Path, object], None]] = None,
+                 on_text: Optional[Callable[[Path, str], None]] = None):
+        self.wanted = {tuple(p) for p in wanted} if wanted is not None else None
+        self.on_field = on_field
+        self.on_text = on_text
+        self.found: Dict[Path, object] = {}
+        self.result = None
+        self.done = False
+        # Text of the current candidate object, from its '{', in case it
+        # turns out malformed and has to be rescanned from the next one
+        self._candidate = []
+        self._candidate_from = 0   # where the candidate starts in the chunk being fed
+        self._reset()
+
+    def _reset(self):
+        self.found = {}
+        # One frame per open container: [container, path, pending key]
+        self._stack = []
+        self._state = "seek"
+        self._buf = []
+        self._is_key = False
+        self._emitted = 0     # pieces of the current value string already sent to on_text
+        self._hex = ""
+        self._high = None
+
+    def feed(self, chunk: str):
+        while chunk and not self.done:
+            i, n = 0, len(chunk)
+            try:
+                while i < n and not self.done:
+                    i = self._step(chunk, i, n)
+            except ValueError:
+                # Rescan the candidate's text after its opening '{'
+                chunk = "".join(self._candidate) + chunk[self._candidate_from:]
+                chunk = chunk[1:]
+                self._candidate, self._candidate_from = [], 0
+                self._reset()
+                continue
+            if self._state != "seek" and not self.done:
+                self._candidate.append(chunk[self._candidate_from:])
+                self._candidate_from = 0
+            if self._state in ("string", "string_escape", "string_unicode") and not self._is_key:
+                self._flush_text()
+            return
+
+    def _step(self, chunk: str, i: int, n: int) -> int:
+        state = self._state
+        if state == "string":
+            m = _STRING_STOP.search(chunk, i)
+            end = m.start() if m else n
+            if end > i:
+                self._buf.append(chunk[i:end])
+            if m is None:
+                return n
+            if chunk[end] == '"':
+                self._end_string()
+            else:
+                self._state = "string_escape"
+            return end + 1
+        ch = chunk[i]
+        if state == "seek":
+            start = chunk.find("{", i)
+            if start < 0:
+                return n
+            self._candidate, self._candidate_from = [], start
+            self._open({}, ())
+            return start + 1
+        if state == "string_escape":
+            if ch == "u":
+                self._state, self._hex = "string_unicode", ""
+            else:
+                self._buf.append(_ESCAPES.get(ch, ch))
+                self._state = "string"
+        elif state == "string_unicode":
+            self._hex += ch
+            if len(self._hex) == 4:
+                self._buf.append(self._code_point(int(self._hex, 16)))
+                self._state = "string"
+        elif state == "literal":
+            if ch in _LITERAL_END:
+                self._value(json.loads("".join(self._buf)))
+                return i  # the delimiter is handled in after_value
+            self._buf.append(ch)
+        elif ch in _WHITESPACE:
+            pass
+        elif state == "key":
+            if ch == '"':
+                self._begin_string(is_key=True)
+            elif ch == "}":
+                self._close()
+            else:
+                raise ValueError(f"expected key, got {ch!r}")
+        elif state == "colon":
+            if ch != ":":
+                raise ValueError(f"expected ':', got {ch!r}")
+            self._state = "value"
+        elif state in ("value", "first_item"):
+            if ch == '"':
+                self._begin_string(is_key=False)
+            elif ch == "{":
+                self._open({}, self._child_path())
+            elif ch == "[":
+                self._open([], self._child_path())
+            elif ch in _LITERAL_START:
+                self._state, self._buf = "literal", [ch]
+            elif ch == "]" and state == "first_item":
+                self._close()
+            else:
+                raise ValueError(f"unexpected {ch!r}")
+        elif state == "after_value":
+            if ch == ",":
+                self._state = "key" if isinstance(self._stack[-1][0], dict) else "value"
+            elif ch == ("}" if isinstance(self._stack[-1][0], dict) else "]"):
+                self._close()
+            else:
+                raise ValueError(f"expected ',' or matching close, got {ch!r}")
+        return i + 1
+
+    def _child_path(self) -> Path:
+        container, path, key = self._stack[-1]
+        return path + ((key,) if isinstance(container, dict) else (len(container),))
+
+    def _open(self, container, path: Path):
+        self._stack.append([container, path, None])
+        self._state = "key" if isinstance(container, dict) else "first_item"
+
+    def _close(self):
+        container, _, _ = self._stack.pop()
+        if self._stack:
+            self._value(container)
+        else:
+            self._complete((), container)
+            self.result = container
+            self.done = True
+
+    def _value(self, value):
+        path = self._child_path()
+        frame = self._stack[-1]
+        if isinstance(frame[0], dict):
+            frame[0][frame[2]] = value
+        else:
+            frame[0].append(value)
+        self._state = "after_value"
+        self._complete(path, value)
+
+    def _complete(self, path: Path, value):
+        if self.on_field is not None:
+            self.on_field(path, value)
+        if self.wanted is not None and path in self.wanted:
+            self.found[path] = value
+            if len(self.found) == len(self.wanted):
+                self.done = True
+
+    def _begin_string(self, is_key: bool):
+        self._state, self._buf, self._is_key, self._emitted = "string", [], is_key, 0
+
+    def _end_string(self):
+        text = "".join(self._buf)
+        if self._is_key:
+            self._stack[-1][2] = text
+            self._state = "colon"
+        else:
+            self._flush_text()
+            self._value(text)
+
+    def _flush_text(self):
+        # _buf holds the string so far as pieces; only new pieces are sent
+        if self.on_text is None or len(self._buf) == self._emitted:
+            return
+        delta = "".join(self._buf[self._emitted:])
+        self._emitted = len(self._buf)
+        if delta:
+            self.on_text(self._child_path(), delta)
+
+    def _code_point(self, code: int) -> str:
+        if 0xD800 <= code <= 0xDBFF:
+            self._high = code
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self._high is not None:
+            code = 0x10000 + ((self._high - 0xD800) << 10) + (code - 0xDC00)
+        self._high = None
+        return chr(code)
+
+
+def parse_json(text: str, wanted: Optional[Iterable[Path]] = None):
+    """
+    One-shot use. Without `wanted`, returns the first JSON object in text
+    (or None). With it, returns {path: value} for the wanted paths found,
+    stopping as soon as all of them are.
+    """
+    parser = JSONStreamParser(wanted)
+    parser.feed(text)
+    if wanted is not None:
+        return parser.found
+    return parser.result
@@ -0,0 +1,256 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+# live: real models. record: real models, every exchange saved to the store.
+# replay: answers come from the store, no network or API key needed.
+LLM_MODE = os.getenv("SCAMSAFE_LLM_MODE", "live")
+REPLAY_STORE = os.getenv(
+    "SCAMSAFE_LLM_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "llm.jsonl.gz")
+)
+REPLAY_LATENCY = os.getenv("SCAMSAFE_LLM_REPLAY_LATENCY", "recorded")
+REPLAY_ON_MISS = os.getenv("SCAMSAFE_LLM_REPLAY_ON_MISS", "error")
+
+# Deterministic stand-ins for prompts that were never recorded ("synthetic"
+# miss policy), in the ReAct format crewai's agent executor parses
+_SYNTHETIC_DETECTION = (
+    'Thought: I now can give a great answer\nFinal Answer: '
+    '{"is_scam": true, "confidence": 0.92, "risk_factors": ["UPI_ID", "URGENCY"], "trigger_engagement": true}'
+)
+_SYNTHETIC_ENGAGEMENT = (
+    'Thought: I now can give a great answer\nFinal Answer: '
+    '{"public_response": "Sir I am not understanding, which account you are telling? Send YOUR UPI ID, I will check.", '
+    '"extracted_intel": {}, "turn_count": 0, "engagement_score": 0.5}'
+)
+
+
+def synthetic_reply(messages: Union[str, List[Dict]]) -> str:
+    """
+    Stand-in reply shaped for the task in the prompt: persona (engagement)
+    prompts ask for a public_response, detector prompts for a confidence.
+    Checked in that order, as engagement prompts may quote the detection.
+    """
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    text = "\n".join(str(m.get("content", "")) for m in messages)
+    if "public_response" in text:
+        return _SYNTHETIC_ENGAGEMENT
+    if "confidence" in text:
+        return _SYNTHETIC_DETECTION
+    return _SYNTHETIC_ENGAGEMENT
+
+
+class ReplayMiss(KeyError):
+    """Replay mode got a prompt that is not in the store."""
+
+
+def prompt_key(model: str, messages: Union[str, List[Dict]]) -> str:
+    """Stable hash of the model + conversation sent to it."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    canonical = json.dumps([model, [[m.get("role"), m.get("content")] for m in messages]],
+                           ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExchangeStore:
+    """
+    Recorded LLM exchanges, keyed by prompt hash, in one gzip'd JSONL file
+    ({"key", "model", "response", "latency_ms"} per line). Records are
+    appended as gzip members, so recording never rewrites the file; later
+    records for a key win on load.
+    """
+
+    def __init__(self, path: str = REPLAY_STORE):
+        self.path = path
+        self._records: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._records[record["key"]] = record
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._records.get(key)
+
+    def put(self, key: str, model: str, response: str, latency_ms: float):
+        record = {"key": key, "model": model, "response": response, "latency_ms": round(latency_ms, 1)}
+        with self._lock:
+            self._records[key] = record
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def __len__(self):
+        return len(self._records)
+
+
+class LatencyModel:
+    """
+    Synthetic reply latency for replay, from a spec string (milliseconds):
+      none | recorded | fixed:800 | uniform:500,1500 | lognormal:7.0,0.5
+    "recorded" sleeps as long as the original call took. Seeded, so a
+    benchmark run sees the same delays every time.
+    """
+
+    def __init__(self, spec: str = REPLAY_LATENCY, seed: int = 1770005528):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",")] if params else []
+        expected = {"none": 0, "recorded": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"bad latency spec {spec!r}")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self, recorded_ms: float = 0.0) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(*self.params)
+            if self.kind == "lognormal":
+                return self._rng.lognormvariate(*self.params)
+        return recorded_ms if self.kind == "recorded" else 0.0
+
+
+class ReplayBackend:
+    """Record/replay logic shared by every replayed model (no crewai needed)."""
+
+    def __init__(self, mode: str = LLM_MODE, store: Optional[ExchangeStore] = None,
+                 latency: Optional[LatencyModel] = None, on_miss: str = REPLAY_ON_MISS,
+                 sleep=time.sleep):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown replay mode {mode!r}")
+        if on_miss not in ("error", "synthetic"):
+            raise ValueError(f"unknown miss policy {on_miss!r}")
+        self.mode = mode
+        self.store = store if store is not None else ExchangeStore()
+        self.latency = latency or LatencyModel()
+        self.on_miss = on_miss
+        self._sleep = sleep
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def complete(self, model: str, messages, call_real=None) -> str:
+        key = prompt_key(model, messages)
+        if self.mode == "record":
+            started = time.monotonic()
+            response = call_real(messages)
+            self.store.put(key, model, str(response), (time.monotonic() - started) * 1000)
+            self.recorded += 1
+            return response
+        record = self.store.get(key)
+        if record is None:
+            self.misses += 1
+            if self.on_miss == "error":
+                raise ReplayMiss(f"no recording for {model} prompt {key}")
+            response, recorded_ms = synthetic_reply(messages), 0.0
+        else:
+            self.hits += 1
+            response, recorded_ms = record["response"], record["latency_ms"]
+        delay = self.latency.sample_ms(recorded_ms)
+        if delay:
+            self._sleep(delay / 1000)
+        return response
+
+    def stats(self) -> Dict:
+        return {"mode": self.mode, "store": len(self.store), "hits": self.hits,
+                "misses": self.misses, "recorded": self.recorded}
+
+
+_backend: Optional[ReplayBackend] = None
+
+
+def backend() -> ReplayBackend:
+    global _backend
+    if _backend is None:
+        _backend = ReplayBackend()
+    return _backend
+
+
+def make_llm(model: str, **kwargs):
+    """
+    The LLM an agent should use. In live mode this is crewai's own LLM;
+    in record/replay mode it is wrapped so calls go through ReplayBackend.
+    """
+    from crewai import LLM
+    if LLM_MODE == "live":
+        return LLM(model=model, **kwargs)
+    from crewai import BaseLLM
+    real = LLM(model=model, **kwargs) if LLM_MODE == "record" else None
+
+    class ReplayLLM(BaseLLM):
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, **call_kwargs):
+            return backend().complete(
+                model, messages,
+                lambda msgs: real.call(msgs, tools=tools, callbacks=callbacks,
+                                       available_functions=available_functions, **call_kwargs)
+            )
+
+        def supports_function_calling(self) -> bool:
+            return False
+
+        def supports_stop_words(self) -> bool:
+            return False
+
+        def get_context_window_size(self) -> int:
+            return 200000
+
+    return ReplayLLM(model=model)
+
+
+BENCH_MESSAGES = [
+    "Deepak sir, Chennai Port Trust HR department. SBI Egmore account verify panna ₹12,500 salary increment. "
+    "My official UPI: porttrusthr@paytm send ₹10 verification. Link: bit.ly/porttrust-verify",
+    "Dei Deepak, naan Tamilselvan da. Urgent help venum bro. ₹5000 transfer pannu da. UPI ID: tselvan.urgent@oksbi",
+    "Sir verification panna unga full SBI Egmore AC number venum. WhatsApp number 98400-55555 ku send pannunga.",
+    "Your KYC is pending, account will be blocked today. Click https://sbi-kyc-update.co.in/verify immediately",
+    "Sir why no reply? I am waiting for you only. Please tell what happened",
+]
+
+
+def bench(turns: int, sessions: int) -> Dict:
+    """Runs webhook_handler turns in replay mode and reports per-turn overhead."""
+    from . import honeypot_crew
+    honeypot_crew.send_final_callback = lambda session_id, state: None  # measure our code, not the backend API
+    timings = []
+    for i in range(turns):
+        request = {
+            "sessionId": f"bench-{i % sessions}",
+            "message": {"sender": "scammer", "text": BENCH_MESSAGES[i % len(BENCH_MESSAGES)],
+                        "timestamp": 1770005528731 + i},
+            "conversationHistory": [],
+            "metadata": {"channel": "SMS", "language": "English", "locale": "IN"}
+        }
+        started = time.perf_counter()
+        honeypot_crew.webhook_handler(request)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "turns": turns,
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "max_ms": round(timings[-1], 2),
+        "llm": backend().stats(),
+    }
+
+
+if __name__ == "__main__":
+    # SCAMSAFE_LLM_MODE=replay SCAMSAFE_LLM_REPLAY_LATENCY=none python -m scamsafe_bot.llm_replay --turns 500
+    parser = argparse.ArgumentParser(description="Benchmark webhook_handler against recorded LLM exchanges")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+    if LLM_MODE == "live":
+        parser.error("set SCAMSAFE_LLM_MODE=replay (or record) first")
+    print(json.dumps(bench(args.turns, args.sessions), indent=2))
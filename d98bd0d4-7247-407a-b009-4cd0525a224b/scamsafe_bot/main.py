@@ -1,9 +1,10 @@
-from fastapi import FastAPI, HTTPException, Header, Body
+from fastapi import FastAPI, HTTPException, Header, Body, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import os
 import json
 import re
+from .session_table import SessionRecord, SessionTable
 
 app = FastAPI()
 
@@ -22,24 +23,37 @@ class Response(BaseModel):
     status: str
     reply: str
 
-sessions = {}
+class ChatSession(SessionRecord):
+    __slots__ = ("turns",)
+
+    def __init__(self):
+        self.turns = 0
+
+# Bounded, idle sessions expire (see session_table.py)
+sessions = SessionTable(ChatSession)
 API_KEY = "secret123"
 
 def verify_key(x_api_key: str = Header(None)):
     if x_api_key != API_KEY:
         raise HTTPException(401, "Invalid key")
 
+@app.on_event("startup")
+def start_session_sweeper():
+    sessions.start_sweeper()
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
 
+@app.get("/stats")
+async def stats():
+    return {"sessions": sessions.stats()}
+
 @app.post("/webhook")
 async def webhook(request: Request = Body(...), api_key: str = Depends(verify_key)):
     sid = request.sessionId
-    if sid not in sessions:
-        sessions[sid] = {"turns": 0, "intel": {}}
-    
-    sessions[sid]["turns"] += 1
+    session, _ = sessions.get_or_create(sid)
+    session.turns += 1
     
     replies = [
         "Anna evening la irukenga?",
@@ -49,7 +63,7 @@ async def webhook(request: Request = Body(...), api_key: str = Depends(verify_ke
         "Link forward pannunga check pannuren"
     ]
     
-    reply = replies[sessions[sid]["turns"] % 5]
+    reply = replies[session.turns % 5]
     return Response(status="success", reply=reply)
 
 if __name__ == "__main__":
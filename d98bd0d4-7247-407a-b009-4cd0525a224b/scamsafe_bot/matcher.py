@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over weighted keyword categories.
+    Finds every occurrence of every term (overlaps included) in one pass,
+    so scan cost depends on message length, not on the number of terms.
+    """
+
+    def __init__(self, categories: Iterable[Tuple[str, float, Iterable]]):
+        """
+        categories: (name, weight, terms) triples. A term is either a plain
+        string or a (literal, label) pair; the label is what gets reported
+        for a hit (defaults to the literal itself).
+        """
+        self.weights: Dict[str, float] = {}
+        # Flat list of (category, label) in declaration order; the index is
+        # the term id stored in the automaton outputs.
+        self.terms: List[Tuple[str, str]] = []
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (term_id, length)
+
+        for name, weight, terms in categories:
+            self.weights[name] = weight
+            for term in terms:
+                literal, label = term if isinstance(term, tuple) else (term, term)
+                self._add(literal, len(self.terms))
+                self.terms.append((name, label))
+
+        self._build()
+
+    def _add(self, literal: str, term_id: int):
+        state = 0
+        for ch in literal:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((term_id, len(literal)))
+
+    def _build(self):
+        # Fold failure links into a full transition table (BFS order, so a
+        # state's fail target is always finished first). scan() then does a
+        # single dict lookup per character.
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())  # depth-1 states fail to root
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                self._fail[nxt] = self._delta[self._fail[state]].get(ch, 0)
+                # Inherit suffix matches so scan never walks the fail chain
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Returns (offset, term_id) for every hit in text, in order of end
+        position. Callers should pass already-lowercased text if matching
+        is meant to be case-insensitive.
+        """
+        delta, out = self._delta, self._out
+        hits = []
+        state = 0
+        for pos, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for term_id, length in out[state]:
+                    hits.append((pos - length + 1, term_id))
+        return hits
@@ -0,0 +1,91 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# Persona model tiers, cheapest first
+PERSONA_MODELS = {
+    "fast": os.getenv("SCAMSAFE_PERSONA_FAST_MODEL", "claude-3-haiku-20241022"),
+    "full": os.getenv("SCAMSAFE_PERSONA_FULL_MODEL", "claude-3-7-sonnet-20251022"),
+}
+
+DEFAULT_BUDGET_MS = float(os.getenv("SCAMSAFE_PERSONA_BUDGET_MS", "8000"))
+
+# Starting latency guesses until real turns have been observed
+_INITIAL_LATENCY_MS = {"fast": 1500.0, "full": 6000.0}
+
+# Intel that identifies the scammer (keywords don't count toward yield)
+_YIELD_CATEGORIES = ("upiIds", "bankAccounts", "phishingLinks", "phoneNumbers")
+
+
+def turn_phase(turn: int) -> str:
+    """Engagement phase of a turn, matching the persona's 18-turn script."""
+    if turn <= 3:
+        return "confusion"
+    if turn <= 12:
+        return "extraction"
+    if turn <= 18:
+        return "final"
+    return "overtime"
+
+
+def intel_yield(extracted_intel: Dict) -> int:
+    return sum(len(extracted_intel.get(category, ())) for category in _YIELD_CATEGORIES)
+
+
+class PersonaModelRouter:
+    """
+    Picks the persona model tier for each turn.
+
+    Confusion turns and late "send your UPI again" turns are cheap for a
+    small model; fishing for intel mid-conversation (or a conversation that
+    has yielded nothing yet) gets the large one. Whatever the phase, a tier
+    whose observed latency would overrun the request's remaining budget is
+    downgraded to the fastest tier.
+    """
+
+    def __init__(self, default_budget_ms: float = DEFAULT_BUDGET_MS, alpha: float = 0.2):
+        self.default_budget_ms = default_budget_ms
+        self.alpha = alpha
+        self.latency_ms = dict(_INITIAL_LATENCY_MS)  # EWMA per tier
+        self._turns = dict.fromkeys(PERSONA_MODELS, 0)
+        self._downgrades = 0
+        self._lock = threading.Lock()
+
+    def choose(self, turn: int, extracted_intel: Dict, budget_ms: Optional[float] = None,
+               elapsed_ms: float = 0.0) -> Tuple[str, str]:
+        """Returns (tier, reason) for this turn."""
+        phase = turn_phase(turn)
+        found = intel_yield(extracted_intel)
+        if phase == "extraction":
+            tier = "full"
+        elif phase == "final":
+            # Still missing payment details late on: keep the stronger model
+            tier = "fast" if extracted_intel.get("upiIds") or extracted_intel.get("bankAccounts") else "full"
+        else:
+            tier = "fast"
+        if tier == "fast" and turn > 6 and found == 0:
+            tier = "full"
+        reason = f"{phase}, yield {found}"
+
+        remaining = (budget_ms if budget_ms is not None else self.default_budget_ms) - elapsed_ms
+        with self._lock:
+            if tier != "fast" and self.latency_ms[tier] > remaining:
+                tier = "fast"
+                reason += f", over budget ({remaining:.0f}ms left)"
+                self._downgrades += 1
+            self._turns[tier] += 1
+        return tier, reason
+
+    def observe(self, tier: str, latency_ms: float):
+        """Feeds back how long a turn on this tier actually took."""
+        with self._lock:
+            self.latency_ms[tier] += self.alpha * (latency_ms - self.latency_ms[tier])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "models": dict(PERSONA_MODELS),
+                "turns": dict(self._turns),
+                "latency_ms": {tier: round(ms, 1) for tier, ms in self.latency_ms.items()},
+                "budget_downgrades": self._downgrades,
+            }
@@ -1,11 +1,155 @@
 
+import os
 import random
+import re
+import string
+import threading
+from typing import Dict, List, Optional
 from .utils import simulate_latency
 from .prompts import PHASE_2_PERSONA_PROMPT
+from .intel_extractor import extract_intel, group_intel
+from .rule_packs import RulePackManager, pack_path
+
+PERSONA_INTEL_CATEGORIES = {
+    "upi_id": "upi_ids",
+    "url": "phishing_urls",
+    "phone": "phone_numbers"
+}
+
+# Intent-indexed reply templates with {slots}, hot-reloaded from the rule pack
+PERSONA_RULES = RulePackManager(pack_path("persona"))
+
+# Longer messages usually carry a story the templates can't answer
+TEMPLATE_MAX_WORDS = int(os.getenv("SCAMSAFE_TEMPLATE_MAX_WORDS", "60"))
+
+# Extractor match kinds -> crew intel schema, for PersonaEngine's own slots
+TEMPLATE_INTEL_CATEGORIES = {
+    "upi_id": "upiIds",
+    "url": "phishingLinks",
+    "phone": "phoneNumbers",
+    "bank_account": "bankAccounts"
+}
+
+# Session intel key (crew schema) -> template slot; the latest value is used
+INTEL_SLOTS = {
+    "upiIds": "upi",
+    "phishingLinks": "link",
+    "phoneNumbers": "phone",
+    "bankAccounts": "account"
+}
+
+_BANK_NAMES = {"sbi": "SBI", "hdfc": "HDFC", "icici": "ICICI", "axis": "Axis", "canara": "Canara",
+               "kotak": "Kotak", "pnb": "PNB", "iob": "IOB", "indian bank": "Indian Bank", "bob": "BoB"}
+_BANK = re.compile(r"\b(" + "|".join(_BANK_NAMES) + r")\b", re.IGNORECASE)
+_AMOUNT = re.compile(r"(?:₹|\brs\.?|\binr)\s*(\d[\d,]*)", re.IGNORECASE)
+_FORMATTER = string.Formatter()
+
+# Used when a pack has no fallback_replies
+_DEFAULT_STALL = "Sir one minute, somebody is calling. I am coming back."
+
+
+def slots_from_intel(extracted_intel: Dict[str, List[str]]) -> Dict[str, str]:
+    return {slot: extracted_intel[key][-1] for key, slot in INTEL_SLOTS.items() if extracted_intel.get(key)}
+
+
+def message_slots(message: str) -> Dict[str, str]:
+    """Slots read from the scammer's message itself (bank name, amount)."""
+    slots = {}
+    bank = _BANK.search(message)
+    if bank:
+        slots["bank"] = _BANK_NAMES[bank.group(1).lower()]
+    amount = _AMOUNT.search(message)
+    if amount:
+        slots["amount"] = amount.group(1)
+    return slots
+
+
+class TemplateResponder:
+    """
+    Answers stock turns from intent-indexed templates instead of the LLM.
+
+    The message's intent is the first category in rules/persona.json (file
+    order is priority) with a keyword hit. Its templates are tried in order,
+    skipping any already used in this session or with a slot that can't be
+    filled. No intent, a long message, or no usable template means the turn
+    needs a novel answer: reply() returns None and the crew handles it.
+    """
+
+    def __init__(self, rules: Optional[RulePackManager] = None, max_words: int = TEMPLATE_MAX_WORDS):
+        self.rules = rules or PERSONA_RULES
+        self.max_words = max_words
+        self.served = 0
+        self.stalls = 0
+        self.fallbacks = {"no_intent": 0, "too_long": 0, "exhausted": 0}
+        self._lock = threading.Lock()
+
+    def intent(self, message: str) -> Optional[str]:
+        pack = self.rules.current
+        hit_categories = {pack.matcher.terms[term_id][0] for _, term_id in pack.matcher.scan(message.lower())}
+        return next((category for category in pack.categories if category in hit_categories), None)
+
+    def reply(self, message: str, slots: Dict[str, str], used: List[str]) -> Optional[Dict]:
+        """
+        Template reply as {reply, intent, template}, or None to fall back.
+        `used` is the session's list of template keys; the chosen key is
+        appended to it.
+        """
+        pack = self.rules.current
+        if len(message.split()) > self.max_words:
+            return self._fallback("too_long")
+        intent = self.intent(message)
+        if intent is None:
+            return self._fallback("no_intent")
+        slots = {**slots, **message_slots(message)}
+        for i, template in enumerate(pack.replies[intent]):
+            key = f"{intent}/{i}"
+            if key in used:
+                continue
+            fields = {field for _, field, _, _ in _FORMATTER.parse(template) if field}
+            if fields <= slots.keys():
+                used.append(key)
+                with self._lock:
+                    self.served += 1
+                return {"reply": template.format_map(slots), "intent": intent, "template": key}
+        return self._fallback("exhausted")
+
+    def stall_reply(self, used: List[str]) -> str:
+        """
+        A slot-free stalling line from the pack's fallback_replies, for turns
+        that can't wait for the LLM. Unused lines first, then they repeat.
+        """
+        replies = self.rules.current.fallback_replies or [_DEFAULT_STALL]
+        stalls = [key for key in used if key.startswith("fallback/")]
+        fresh = [i for i in range(len(replies)) if f"fallback/{i}" not in stalls]
+        i = fresh[0] if fresh else len(stalls) % len(replies)
+        used.append(f"fallback/{i}")
+        with self._lock:
+            self.stalls += 1
+        return replies[i]
+
+    def _fallback(self, reason: str):
+        with self._lock:
+            self.fallbacks[reason] += 1
+        return None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.served + sum(self.fallbacks.values())
+            return {
+                "rules": self.rules.stats(),
+                "served": self.served,
+                "stalls": self.stalls,
+                "fallbacks": dict(self.fallbacks),
+                "served_fraction": round(self.served / total, 4) if total else 0.0,
+            }
+
 
 class PersonaEngine:
-    def __init__(self):
+    def __init__(self, templates: Optional[TemplateResponder] = None):
         self.turns = 0
+        self.templates = templates or TemplateResponder()
+        self.slots: Dict[str, str] = {}
+        self.templates_used: List[str] = []
         self.responses = [
             "My account is blocked? Aiyoh, really? I have EMI deducted tomorrow! What should I do sir?",
             "Sir, I am trying to open the link but it is not working. My network is slow. Can you send again?",
@@ -19,42 +163,28 @@ class PersonaEngine:
         """
         Generates a response as Deepak Sharma.
         """
-        simulate_latency(1.0, 2.0)
+        # Extract Actual Intel (single scan, shared with the crew pipeline)
+        matches = extract_intel(user_message)
+        extracted_intel = group_intel(matches, PERSONA_INTEL_CATEGORIES)
+        self.slots.update(slots_from_intel(group_intel(matches, TEMPLATE_INTEL_CATEGORIES)))
         
-        # Simple turn-based logic for the mockup
-        if self.turns < len(self.responses):
-            response_text = self.responses[self.turns]
+        # Stock turns come from intent templates, no latency
+        templated = self.templates.reply(user_message, self.slots, self.templates_used)
+        if templated is not None:
+            response_text = templated["reply"]
         else:
-            response_text = "Sir? Are you there? I am waiting."
+            simulate_latency(1.0, 2.0)
+            
+            # Simple turn-based logic for the mockup
+            if self.turns < len(self.responses):
+                response_text = self.responses[self.turns]
+            else:
+                response_text = "Sir? Are you there? I am waiting."
             
         self.turns += 1
-        
-        # Extract Actual Intel using Regex
-        extracted_intel = {}
-        
-        # 1. UPI Extraction (e.g., username@bank)
-        upi_pattern = r"[a-zA-Z0-9.\-_]{2,256}@[a-zA-Z]{2,64}"
-        upis = re.findall(upi_pattern, user_message)
-        if upis:
-            extracted_intel["upi_ids"] = upis
-
-        # 2. URL Extraction (http/https/bit.ly)
-        # Matches http/s protocols or common shorteners like bit.ly even without protocol
-        url_pattern = r"(?:https?://|www\.)\S+|bit\.ly/\S+"
-        urls = re.findall(url_pattern, user_message)
-        if urls:
-            extracted_intel["phishing_urls"] = urls
-
-        # 3. Phone Number Extraction (Indian mobile focus: +91 or starting with 6-9)
-        # Matches patterns like +91 9876543210, 98765 43210, or just 10 digits
-        phone_pattern = r"(?:\+91[\-\s]?)?[6789]\d{9}"
-        phones = re.findall(phone_pattern, user_message)
-        if phones:
-            extracted_intel["phone_numbers"] = phones
 
         return {
             "message": response_text,
             "extracted_intel": extracted_intel,
             "status": "engaged" if self.turns < 10 else "terminating"
         }
-import re
@@ -0,0 +1,65 @@
+from typing import Dict, Iterable
+from .detector import ScamDetector
+
+
+class RiskAccumulator:
+    """
+    Running conversation-level risk built from per-message detector features.
+    Each update folds in only the new message, so a turn costs O(message),
+    not O(history). The score decays so recent turns weigh more:
+        score = score * decay + message_score
+    """
+
+    __slots__ = ("decay", "threshold", "turns", "score", "peak", "category_counts", "_detector")
+
+    def __init__(self, detector: ScamDetector = None, decay: float = 0.8, threshold: float = 0.5):
+        self.decay = decay
+        self.threshold = threshold
+        self.turns = 0
+        self.score = 0.0
+        self.peak = 0.0
+        self.category_counts: Dict[str, int] = {}
+        self._detector = detector or _shared_detector
+
+    def update(self, message: str) -> Dict:
+        features = self._detector.features(message)
+        self.turns += 1
+        self.score = self.score * self.decay + features["score"]
+        # A blocklisted mule account / domain flags the whole conversation
+        self.peak = max(self.peak, self.score, 0.99 if features["blocklisted"] else 0.0)
+        for category, count in features["categories"].items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + count
+        return self.verdict()
+
+    def update_many(self, messages: Iterable[str]) -> Dict:
+        """Bootstrap from history (e.g. a session first seen mid-conversation)."""
+        for message in messages:
+            self.update(message)
+        return self.verdict()
+
+    def to_state(self) -> Dict:
+        """Plain-data form, for session backends shared across processes."""
+        return {"decay": self.decay, "threshold": self.threshold, "turns": self.turns, "score": self.score,
+                "peak": self.peak, "category_counts": dict(self.category_counts)}
+
+    @classmethod
+    def from_state(cls, state: Dict, detector: ScamDetector = None) -> "RiskAccumulator":
+        accumulator = cls(detector, decay=state["decay"], threshold=state["threshold"])
+        accumulator.turns = state["turns"]
+        accumulator.score = state["score"]
+        accumulator.peak = state["peak"]
+        accumulator.category_counts = dict(state["category_counts"])
+        return accumulator
+
+    def verdict(self) -> Dict:
+        is_scam = self.peak > self.threshold
+        return {
+            "is_scam": is_scam,
+            "confidence": round(min(self.peak, 0.99), 2) if is_scam else 0.1,
+            "risk_score": round(self.score, 3),
+            "turns": self.turns,
+            "category_counts": dict(self.category_counts)
+        }
+
+
+_shared_detector = ScamDetector()
@@ -0,0 +1,204 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import threading
+import weakref
+from typing import Callable, Dict, List, Optional
+
+from .matcher import KeywordMatcher
+
+RULES_DIR = os.getenv("SCAMSAFE_RULES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules"))
+COMPILED_SUFFIX = ".compiled"
+# Bump when RulePack or KeywordMatcher change shape; the Python version is
+# part of the key too, as pickles of another interpreter may not load
+_COMPILED_FORMAT = (2, sys.version_info[:2])
+
+
+class RulePackError(Exception):
+    pass
+
+
+class RulePack:
+    """
+    One immutable, compiled version of a keyword rule file.
+
+    File format (JSON):
+    {
+        "name": "detector",
+        "version": "2026.10.18-1",
+        "categories": [
+            {"name": "critical", "weight": 0.3, "terms": ["urgent", {"literal": "bit.ly", "label": "bit\\\\.ly"}],
+             "replies": ["optional", "canned", "replies"]}
+        ],
+        "fallback_replies": ["optional"]
+    }
+    Categories keep file order, which callers may use as priority.
+    """
+
+    def __init__(self, spec: Dict, digest: str):
+        if not spec.get("name") or not spec.get("version") or not spec.get("categories"):
+            raise RulePackError("rule pack needs name, version and categories")
+        self.name = spec["name"]
+        self.version = spec["version"]
+        self.digest = digest
+        self.categories: List[str] = [c["name"] for c in spec["categories"]]
+        self.replies: Dict[str, List[str]] = {c["name"]: c.get("replies", []) for c in spec["categories"]}
+        self.fallback_replies: List[str] = spec.get("fallback_replies", [])
+        self.matcher = KeywordMatcher(
+            (c["name"], c.get("weight", 0.0), [_term(t) for t in c["terms"]]) for c in spec["categories"]
+        )
+        self.label_category = {label: category for category, label in self.matcher.terms}
+
+    def __repr__(self):
+        return f"<RulePack {self.name} v{self.version} ({len(self.matcher.terms)} terms)>"
+
+
+def _term(term):
+    if isinstance(term, dict):
+        return (term["literal"], term.get("label", term["literal"]))
+    return term
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def compile_pack(path: str) -> RulePack:
+    """Compiles a rule file and writes its serialized form next to it."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        pack = RulePack(json.loads(raw), _digest(raw))
+    except (ValueError, KeyError, TypeError) as e:
+        raise RulePackError(f"invalid rule pack {path}: {e}") from e
+    tmp = path + COMPILED_SUFFIX + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((_COMPILED_FORMAT, pack), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path + COMPILED_SUFFIX)
+    return pack
+
+
+def load_pack(path: str) -> RulePack:
+    """
+    Loads a rule file, using the precompiled form when it was built from
+    the same source bytes and compiled format; otherwise compiles (and
+    refreshes it).
+    """
+    with open(path, "rb") as f:
+        digest = _digest(f.read())
+    try:
+        with open(path + COMPILED_SUFFIX, "rb") as f:
+            fmt, pack = pickle.load(f)
+        if fmt == _COMPILED_FORMAT and isinstance(pack, RulePack) and pack.digest == digest:
+            return pack
+    except Exception:
+        # Missing, corrupt or stale (classes moved or renamed since it was
+        # written): the compiled form is only a cache, so rebuild it
+        pass
+    try:
+        return compile_pack(path)
+    except OSError:
+        # Read-only deploy dir: compile in memory only
+        with open(path, "rb") as f:
+            raw = f.read()
+        return RulePack(json.loads(raw), _digest(raw))
+
+
+class RulePackManager:
+    """
+    Holds the live RulePack for one rule file and swaps it atomically when
+    the file changes. Callers grab `manager.current` once per request and
+    use that object throughout, so in-flight requests finish on the pack
+    they started with while new requests see the new one.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 5.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.reload_errors = 0
+        self._listeners: List[Callable[[], Optional[Callable[[RulePack], None]]]] = []
+        self._mtime = os.stat(path).st_mtime_ns
+        self._current = load_pack(path)
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def current(self) -> RulePack:
+        return self._current
+
+    def on_swap(self, listener: Callable[[RulePack], None]):
+        """
+        Registers a callback run after each swap (e.g. to drop cached verdicts).
+        Bound methods are held weakly, so a registered object can still be
+        garbage collected; its listener is then dropped.
+        """
+        if inspect.ismethod(listener):
+            self._listeners.append(weakref.WeakMethod(listener))
+        else:
+            self._listeners.append(lambda: listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompiles and swaps in the rule file if it changed. Returns True on swap."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if not force and mtime == self._mtime:
+                    return False
+                pack = load_pack(self.path)
+            except (OSError, ValueError, RulePackError) as e:
+                # Keep serving the old pack on a bad edit
+                self.reload_errors += 1
+                print(f"⚠️ Rule pack reload failed for {self.path}: {e}")
+                return False
+            self._mtime = mtime
+            if pack.digest == self._current.digest:
+                return False
+            self._current = pack
+            self.reloads += 1
+        print(f"🔁 Rule pack swapped: {pack!r}")
+        live = [(ref, ref()) for ref in self._listeners]
+        self._listeners = [ref for ref, listener in live if listener is not None]
+        for _, listener in live:
+            if listener is not None:
+                listener(pack)
+        return True
+
+    def start_watching(self):
+        """Polls the rule file from a daemon thread; safe to call more than once."""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name=f"rulepack-{os.path.basename(self.path)}", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+    def stats(self) -> Dict:
+        pack = self._current
+        return {
+            "name": pack.name,
+            "version": pack.version,
+            "terms": len(pack.matcher.terms),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+def pack_path(name: str) -> str:
+    return os.path.join(RULES_DIR, f"{name}.json")
+
+
+if __name__ == "__main__":
+    # Precompile rule packs at deploy time:
+    #   python -m scamsafe_bot.rule_packs scamsafe_bot/rules/*.json
+    for rule_file in sys.argv[1:] or [pack_path("detector"), pack_path("risk_manager")]:
+        print(f"compiled {compile_pack(rule_file)!r} -> {rule_file + COMPILED_SUFFIX}")
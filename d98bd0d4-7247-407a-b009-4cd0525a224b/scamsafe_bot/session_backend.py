@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# memory: per-process session tables (single worker). sqlite: state shared
+# by every worker process / pod on the same volume through one SQLite file.
+SESSION_BACKEND = os.getenv("SCAMSAFE_SESSION_BACKEND", "memory")
+SESSION_DB = os.getenv("SCAMSAFE_SESSION_DB", "sessions.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id      TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    state   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id      TEXT PRIMARY KEY,
+    owner   TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SessionBusy(Exception):
+    """
+    Another worker held the session's lease for longer than lease_wait, or
+    took it over (the lease expired) and saved first, so this turn's state
+    was not written.
+    """
+
+
+class SQLiteSessionStore:
+    """
+    Session state shared across worker processes through one SQLite file
+    in WAL mode (readers never block the writer). Same interface as the
+    in-memory stores: `with store.session(sid) as state: ...`.
+
+    Turns of one conversation are serialized across processes by a
+    per-session lease row, taken together with the state read in one short
+    write transaction and released together with the state write, so the
+    database lock is never held while a turn runs. Leases held by this
+    process are renewed every lease_seconds / 3 by a background thread, so
+    a long turn keeps its lease; the write is still a compare-and-set on
+    the version read (and on lease ownership), so a turn whose lease was
+    taken over anyway fails with SessionBusy instead of overwriting the
+    newer state. A small per-process LRU
+    cache keeps decoded states with their version; a turn only decodes
+    state when another process has written a newer version since.
+
+    encode/decode convert states to and from the stored JSON text; the
+    defaults handle plain dicts.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], path: str = SESSION_DB,
+                 encode: Callable[[Any], Any] = None, decode: Callable[[Any], Any] = None,
+                 ttl_seconds: float = 2 * 3600, cache_size: int = 1024,
+                 lease_seconds: float = 120.0, lease_wait: float = 30.0, sweep_interval: float = 60.0):
+        self.factory = factory
+        self.path = path
+        self.encode = encode or (lambda state: state)
+        self.decode = decode or (lambda data: data)
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self.lease_seconds = lease_seconds
+        self.lease_wait = lease_wait
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self._held: Dict[str, str] = {}   # session id -> lease owner
+        self._renewer: Optional[threading.Thread] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.created = 0
+        self.lease_waits = 0
+        self.expirations = 0
+        self.conflicts = 0
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit, transactions are explicit
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _begin(self, session_id: str, owner: str) -> Optional[Tuple[int, Optional[str], bool]]:
+        """
+        Takes the lease and reads the session's version (and its state when
+        the cached copy is stale), as (version, state, new). Returns None if
+        another owner holds the lease.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            lease = db.execute("SELECT owner, expires FROM leases WHERE id = ?", (session_id,)).fetchone()
+            if lease is not None and lease[1] > now:
+                return None
+            db.execute("INSERT OR REPLACE INTO leases (id, owner, expires) VALUES (?, ?, ?)",
+                       (session_id, owner, now + self.lease_seconds))
+            row = db.execute("SELECT version, updated FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return 0, None, True
+            if now - row[1] > self.ttl_seconds:
+                # Expired: start over, but keep counting versions so no
+                # process mistakes its cached old state for the new one
+                return row[0], None, True
+            with self._lock:
+                cached = self._cache.get(session_id)
+            if cached is not None and cached[0] == row[0]:
+                return row[0], None, False
+            data = db.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+            return row[0], data, False
+
+    def _load(self, session_id: str, owner: str) -> Tuple[int, Any]:
+        deadline = time.monotonic() + self.lease_wait
+        waited = False
+        while True:
+            found = self._begin(session_id, owner)
+            if found is not None:
+                break
+            if not waited:
+                waited = True
+                with self._lock:
+                    self.lease_waits += 1
+            if time.monotonic() > deadline:
+                raise SessionBusy(f"session {session_id} is locked by another worker")
+            time.sleep(0.02)
+        version, data, new = found
+        with self._lock:
+            if new:
+                self._cache.pop(session_id, None)
+                self.created += 1
+                return version, self.factory(session_id)
+            cached = self._cache.get(session_id) if data is None else None
+            if cached is not None:
+                self.cache_hits += 1
+                self._cache.move_to_end(session_id)
+                return cached
+            self.cache_misses += 1
+        if data is None:
+            # Evicted from the cache since _begin; the lease keeps the row stable
+            data = self._db().execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+        return version, self.decode(json.loads(data))
+
+    def _save(self, session_id: str, owner: str, version: int, state: Any):
+        """Writes version + 1 if the stored version is still `version` and the lease is still ours."""
+        data = json.dumps(self.encode(state), ensure_ascii=False)
+        with self._transaction() as db:
+            lease = db.execute("SELECT owner FROM leases WHERE id = ?", (session_id,)).fetchone()
+            saved = lease is not None and lease[0] == owner and db.execute(
+                "INSERT INTO sessions (id, version, updated, state) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET version = excluded.version, updated = excluded.updated, state = excluded.state "
+                "WHERE sessions.version = ?",
+                (session_id, version + 1, time.time(), data, version)
+            ).rowcount > 0
+            if saved:
+                db.execute("DELETE FROM leases WHERE id = ? AND owner = ?", (session_id, owner))
+        if not saved:
+            with self._lock:
+                self._cache.pop(session_id, None)
+                self.conflicts += 1
+            raise SessionBusy(f"session {session_id} was taken over by another worker; turn not saved")
+        with self._lock:
+            self._cache[session_id] = (version + 1, state)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @contextmanager
+    def session(self, session_id: str):
+        """
+        Yields the session's state with its lease held; the state is written
+        back when the block exits (also on error, as the memory stores keep
+        partial updates too).
+        """
+        owner = uuid.uuid4().hex
+        version, state = self._load(session_id, owner)
+        with self._lock:
+            self._held[session_id] = owner
+        self._start_renewer()
+        try:
+            try:
+                yield state
+            except BaseException:
+                try:
+                    self._save(session_id, owner, version, state)
+                except SessionBusy:
+                    pass   # the block's own error is the one to report
+                raise
+            self._save(session_id, owner, version, state)
+        finally:
+            with self._lock:
+                if self._held.get(session_id) == owner:
+                    del self._held[session_id]
+
+    def renew_leases(self) -> int:
+        """Extends the leases of turns running in this process. Returns leases renewed."""
+        with self._lock:
+            held = list(self._held.items())
+        if not held:
+            return 0
+        expires = time.time() + self.lease_seconds
+        with self._transaction() as db:
+            return sum(db.execute("UPDATE leases SET expires = ? WHERE id = ? AND owner = ?",
+                                  (expires, session_id, owner)).rowcount for session_id, owner in held)
+
+    def _renew_loop(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            self.renew_leases()
+
+    def _start_renewer(self):
+        with self._lock:
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew_loop, name="session-lease-renewer", daemon=True)
+                self._renewer.start()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        """Decoded copy of the stored state (no lease), or None."""
+        row = self._db().execute("SELECT state, updated FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return self.decode(json.loads(row[0]))
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            self._cache.pop(session_id, None)
+        with self._transaction() as db:
+            return db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def sweep(self) -> int:
+        """Deletes sessions idle past the TTL and stale leases. Returns sessions dropped."""
+        now = time.time()
+        with self._transaction() as db:
+            dropped = db.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl_seconds,)).rowcount
+            db.execute("DELETE FROM leases WHERE expires < ?", (now,))
+        with self._lock:
+            self.expirations += dropped
+        return dropped
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def start_sweeper(self):
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "sessions": len(self),
+                "cached": len(self._cache),
+                "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                "created": self.created,
+                "lease_waits": self.lease_waits,
+                "conflicts": self.conflicts,
+                "expirations": self.expirations
+            }
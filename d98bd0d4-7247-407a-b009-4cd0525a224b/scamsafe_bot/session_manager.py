@@ -1,18 +1,536 @@
-
+import atexit
 import json
+import mmap
+import os
+import re
+import threading
 import time
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Group commit: buffered records are flushed and fsync'ed together every
+# SYNC_INTERVAL seconds, or sooner once SYNC_EVERY are pending. Records
+# still in the buffer are lost on a crash; 0 makes every append durable.
+SYNC_INTERVAL = float(os.getenv("SCAMSAFE_LOG_SYNC_INTERVAL", "1.0"))
+SYNC_EVERY = int(os.getenv("SCAMSAFE_LOG_SYNC_EVERY", "256"))
+
+# The active segment is sealed and a new one started past this size
+SEGMENT_BYTES = int(os.getenv("SCAMSAFE_LOG_SEGMENT_BYTES", str(64 << 20)))
+
+INDEX_SUFFIX = ".idx"
+
+
+class SessionLog:
+    """
+    Append-only JSONL write-ahead log shared by every session writing to
+    one file. Each record is one line tagged with its session_id:
+      {"session_id", "type": "start", "start_time"}
+      {"session_id", "type": "interaction", "timestamp", "role", "content", "metadata"}
+      {"session_id", "type": "end"}
+    Appends go to a userspace buffer; a background thread commits the
+    buffer in groups. On open, a torn last line left by a crash is cut off;
+    any other unparseable content is refused rather than truncated.
+
+    The log is a series of segments, <stem>.000001<ext>, ... ; only the
+    last one is written, and it is sealed once it passes segment_bytes.
+    Every sealed segment has a sidecar <segment>.idx mapping session_id to
+    the byte offsets of its records, so one session's transcript is read
+    with a few mmap slices instead of a scan of every file. compact()
+    rewrites the segments sealed since its last run into one in which each
+    ended session's records form a single contiguous block.
+    """
+
+    def __init__(self, path: str, sync_interval: float = SYNC_INTERVAL, sync_every: int = SYNC_EVERY,
+                 segment_bytes: int = SEGMENT_BYTES):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.segment_bytes = segment_bytes
+        self._stem, self._ext = os.path.splitext(path)
+        self._cond = threading.Condition()
+        # Serializes fsyncs, which run outside _cond so appends don't wait on the disk
+        self._commit_lock = threading.Lock()
+        # session_id -> [(segment, offset)] in log order
+        self.index: Dict[str, List[Tuple[int, int]]] = {}
+        self.ended: Set[str] = set()
+        self._maps: Dict[int, mmap.mmap] = {}   # sealed segments only
+        self._active_offsets: Dict[str, List[int]] = {}
+        self._compacting = threading.Lock()
+        self.compacted_through = 0   # newest segment written by compact()
+
+        if os.path.exists(path) and not self._segments():
+            self._adopt_legacy()
+        segments = self._drop_replaced(self._segments())
+        for seq in segments[:-1]:
+            self._load_index(seq)
+        self.seq = segments[-1] if segments else 1
+        self.truncated = self._recover()
+        self._file = open(self._segment_path(self.seq), "ab", buffering=1 << 16)
+        self._size = self._file.tell()
+        self._pending = 0
+        self._closed = False
+        self.appended = 0
+        self._durable = 0   # appends covered by a finished fsync
+        self.commits = 0
+        self.rotations = 0
+        self.compactions = 0
+        self._flusher = None
+        if sync_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name=f"wal-{os.path.basename(path)}", daemon=True)
+            self._flusher.start()
+
+    # -- segment files -------------------------------------------------
+
+    def _segment_path(self, seq: int) -> str:
+        return f"{self._stem}.{seq:06d}{self._ext}"
+
+    def _segments(self) -> List[int]:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        pattern = re.compile(re.escape(os.path.basename(self._stem)) + r"\.(\d{6})" + re.escape(self._ext) + "$")
+        return sorted(int(m.group(1)) for m in map(pattern.match, os.listdir(directory)) if m)
+
+    def _adopt_legacy(self):
+        """
+        Takes over a log written before segments. A JSONL log becomes
+        segment 1; an indented JSON session dump (the old SessionManager
+        format) is converted to records and left in place. Anything else
+        is refused.
+        """
+        with open(self.path, "rb") as f:
+            first = f.readline()
+        try:
+            record = json.loads(first) if first else {"type": None}
+        except ValueError:
+            record = None
+        if isinstance(record, dict) and "type" in record:
+            os.replace(self.path, self._segment_path(1))
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                dump = json.load(f)
+        except ValueError:
+            dump = None
+        sessions = dump if isinstance(dump, list) else [dump]
+        if not all(isinstance(data, dict) and "session_id" in data and "interactions" in data for data in sessions):
+            raise ValueError(f"{self.path} is neither a JSONL session log nor a session dump; refusing to open it")
+        tmp = self._segment_path(1) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for data in sessions:
+                session_id = str(data["session_id"])
+                records = [{"session_id": session_id, "type": "start", "start_time": data.get("start_time")}]
+                records += [{"session_id": session_id, "type": "interaction", **interaction}
+                            for interaction in data["interactions"]]
+                if data.get("status") == "closed":
+                    records.append({"session_id": session_id, "type": "end"})
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._segment_path(1))
+        print(f"📦 {self.path}: migrated {len(sessions)} session(s) to {self._segment_path(1)}")
+
+    def _remove_segment(self, seq: int):
+        for path in (self._segment_path(seq), self._segment_path(seq) + INDEX_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _drop_replaced(self, segments: List[int]) -> List[int]:
+        """Finishes a compaction interrupted before it removed the segments it replaced."""
+        replaced = set()
+        for seq in segments:
+            with open(self._segment_path(seq), "rb") as f:
+                first = f.readline()
+            try:
+                header = json.loads(first)
+            except ValueError:
+                continue
+            if header.get("type") == "compacted":
+                replaced.update(header["replaces"])
+                self.compacted_through = max(self.compacted_through, seq)
+        for seq in replaced & set(segments):
+            self._remove_segment(seq)
+        return [seq for seq in segments if seq not in replaced]
+
+    def _scan(self, seq: int) -> Iterator[Tuple[int, Dict]]:
+        """(offset, record) for every complete record of a segment."""
+        offset = 0
+        with open(self._segment_path(seq), "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                yield offset, record
+                offset += len(line)
+
+    def _index_record(self, seq: int, offset: int, record: Dict):
+        session_id = record.get("session_id")
+        if session_id is None:
+            return  # segment header
+        self.index.setdefault(session_id, []).append((seq, offset))
+        if record["type"] == "end":
+            self.ended.add(session_id)
+
+    def _load_index(self, seq: int):
+        try:
+            with open(self._segment_path(seq) + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            if sidecar["size"] != os.path.getsize(self._segment_path(seq)):
+                raise ValueError("stale index")
+        except (OSError, ValueError, KeyError):
+            offsets: Dict[str, List[int]] = {}
+            ended = []
+            for offset, record in self._scan(seq):
+                if record.get("session_id") is not None:
+                    offsets.setdefault(record["session_id"], []).append(offset)
+                    if record["type"] == "end":
+                        ended.append(record["session_id"])
+            sidecar = self._write_index(seq, offsets, ended)
+        for session_id, offsets in sidecar["sessions"].items():
+            self.index.setdefault(session_id, []).extend((seq, offset) for offset in offsets)
+        self.ended.update(sidecar["ended"])
+
+    def _write_index(self, seq: int, offsets: Dict[str, List[int]], ended) -> Dict:
+        sidecar = {"size": os.path.getsize(self._segment_path(seq)), "sessions": offsets, "ended": sorted(ended)}
+        tmp = self._segment_path(seq) + INDEX_SUFFIX + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, ensure_ascii=False)
+        os.replace(tmp, self._segment_path(seq) + INDEX_SUFFIX)
+        return sidecar
+
+    def _recover(self) -> int:
+        """
+        Indexes the active segment and cuts off a torn last line; returns
+        bytes dropped. Raises ValueError if the unparseable part is not
+        just the last line, or is the first record.
+        """
+        path = self._segment_path(self.seq)
+        if not os.path.exists(path):
+            return 0
+        good = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._index_record(self.seq, good, record)
+                if record.get("session_id") is not None:
+                    self._active_offsets.setdefault(record["session_id"], []).append(good)
+                good += len(line)
+            size = f.seek(0, os.SEEK_END)
+            f.seek(good)
+            tail = f.read()
+        if good < size and (good == 0 or tail.find(b"\n") not in (-1, len(tail) - 1)):
+            raise ValueError(f"{path} has unparseable records at offset {good}; refusing to truncate it")
+        if good < size:
+            print(f"⚠️ {path}: dropping {size - good} bytes of torn log tail")
+            with open(path, "r+b") as f:
+                f.truncate(good)
+        return size - good
+
+    # -- writing -------------------------------------------------------
+
+    def append(self, record: Dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._cond:
+            if self._closed:
+                raise ValueError(f"session log {self.path} is closed")
+            if self._size and self._size + len(line) > self.segment_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._index_record(self.seq, self._size, record)
+            self._active_offsets.setdefault(record["session_id"], []).append(self._size)
+            self._size += len(line)
+            self._pending += 1
+            self.appended += 1
+            generation = self.appended
+            if self._flusher is not None and self._pending >= self.sync_every:
+                self._cond.notify()
+        if self._flusher is None:
+            self._commit(generation)
+
+    def _commit(self, through: Optional[int] = None):
+        """
+        Makes appends up to `through` (default: all so far) durable. The
+        buffer is flushed under the lock; the fsync runs on a duplicate of
+        the file's descriptor under _commit_lock alone, so appends carry on
+        meanwhile and a rotation can close the file underneath it. A caller
+        whose records another thread's fsync already covered returns at once.
+        """
+        with self._commit_lock:
+            with self._cond:
+                if through is None:
+                    through = self.appended
+                if self._closed or self._durable >= through:
+                    return
+                self._file.flush()
+                generation = self.appended
+                fd = os.dup(self._file.fileno())
+                self._pending = 0
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._cond:
+                self._durable = max(self._durable, generation)
+                self.commits += 1
+
+    def _rotate(self):
+        # Caller holds the lock. The segment is synced before it is sealed
+        # and indexed; this is the one fsync under the lock, once per segment
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            self._durable = self.appended
+            self.commits += 1
+        self._file.close()
+        ended = [sid for sid in self._active_offsets if sid in self.ended]
+        self._write_index(self.seq, self._active_offsets, ended)
+        self.seq += 1
+        self._active_offsets = {}
+        self._file = open(self._segment_path(self.seq), "ab", buffering=1 << 16)
+        self._size = 0
+        self.rotations += 1
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                self._cond.wait(self.sync_interval)
+            self._commit()
+
+    def sync(self):
+        """Commits everything appended so far."""
+        self._commit()
+
+    # -- reading -------------------------------------------------------
+
+    def _map(self, seq: int) -> Optional[mmap.mmap]:
+        # Caller holds the lock. Sealed segments never change, so their
+        # maps are kept; the active one is mapped fresh at its current size
+        if seq in self._maps:
+            return self._maps[seq]
+        if not os.path.getsize(self._segment_path(seq)):
+            return None
+        with open(self._segment_path(seq), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if seq != self.seq:
+            self._maps[seq] = mapped
+        return mapped
+
+    def session_records(self, session_id: str) -> List[Dict]:
+        """One session's records, read by offset (including uncommitted records)."""
+        records = []
+        with self._cond:
+            if not self._closed:
+                self._file.flush()
+            active = None
+            for seq, offset in self.index.get(session_id, ()):
+                if seq == self.seq:
+                    active = active or self._map(seq)
+                    mapped = active
+                else:
+                    mapped = self._map(seq)
+                records.append(json.loads(mapped[offset:mapped.find(b"\n", offset)]))
+            if active is not None:
+                active.close()
+        return records
+
+    def records(self, session_id: Optional[str] = None) -> Iterator[Dict]:
+        """Replays the log (including uncommitted records), optionally for one session."""
+        if session_id is not None:
+            return iter(self.session_records(session_id))
+        with self._cond:
+            if not self._closed:
+                self._file.flush()
+            segments = [seq for seq in self._segments() if seq <= self.seq]
+        return (record for seq in segments for _, record in self._scan(seq) if record.get("session_id") is not None)
+
+    # -- compaction ----------------------------------------------------
+
+    def compact(self) -> int:
+        """
+        Rewrites the segments sealed since the last compaction into one
+        (keeping the newest one's number, so log order is preserved).
+        Sessions that have ended and lie wholly in those segments are
+        written first, each as one contiguous block read by offset; all
+        other records follow in log order. Records are streamed to a
+        temporary file without holding the log's lock, which is taken only
+        to swap in the new segment and index. Returns how many sessions
+        were made contiguous.
+        """
+        with self._compacting:
+            with self._cond:
+                batch = [seq for seq in self._segments() if self.compacted_through < seq < self.seq]
+                if not batch:
+                    return 0
+                batch_set = set(batch)
+                owners: Dict[Tuple[int, int], str] = {}
+                blocks: Dict[str, List[Tuple[int, int]]] = {}
+                for sid, entries in self.index.items():
+                    inside = [entry for entry in entries if entry[0] in batch_set]
+                    for entry in inside:
+                        owners[entry] = sid
+                    if sid in self.ended and inside and len(inside) == len(entries):
+                        blocks[sid] = inside
+
+            # Sealed segments never change, so they are read without the lock
+            target = batch[-1]
+            tmp = self._segment_path(target) + ".tmp"
+            offsets: Dict[str, List[int]] = {}
+            header = (json.dumps({"session_id": None, "type": "compacted", "replaces": batch[:-1]}) + "\n").encode("utf-8")
+            with open(tmp, "wb") as out:
+                out.write(header)
+                written = len(header)
+                files = {seq: open(self._segment_path(seq), "rb") for seq in batch}
+                try:
+                    for sid, entries in blocks.items():
+                        for seq, offset in entries:
+                            files[seq].seek(offset)
+                            line = files[seq].readline()
+                            offsets.setdefault(sid, []).append(written)
+                            out.write(line)
+                            written += len(line)
+                    for seq in batch:
+                        f = files[seq]
+                        f.seek(0)
+                        offset = 0
+                        for line in f:
+                            sid = owners.get((seq, offset))
+                            offset += len(line)
+                            if sid is None or sid in blocks:
+                                continue   # segment header, or already written in a block
+                            offsets.setdefault(sid, []).append(written)
+                            out.write(line)
+                            written += len(line)
+                finally:
+                    for f in files.values():
+                        f.close()
+                out.flush()
+                os.fsync(out.fileno())
+
+            with self._cond:
+                for seq in batch:
+                    mapped = self._maps.pop(seq, None)
+                    if mapped is not None:
+                        mapped.close()
+                os.replace(tmp, self._segment_path(target))
+                for sid, new_offsets in offsets.items():
+                    entries = self.index[sid]
+                    self.index[sid] = ([entry for entry in entries if entry[0] < batch[0]]
+                                       + [(target, offset) for offset in new_offsets]
+                                       + [entry for entry in entries if entry[0] > target])
+                self.compacted_through = target
+                self.compactions += 1
+            for seq in batch[:-1]:
+                self._remove_segment(seq)
+            self._write_index(target, offsets, [sid for sid in offsets if sid in self.ended])
+            return len(blocks)
+
+    def close(self):
+        with self._commit_lock:
+            with self._cond:
+                if self._closed:
+                    return
+                self._closed = True
+                pending = self._pending
+                self._file.flush()
+                fd = os.dup(self._file.fileno())
+                self._file.close()
+                for mapped in self._maps.values():
+                    mapped.close()
+                self._maps.clear()
+                self._cond.notify_all()
+            try:
+                if pending:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            if pending:
+                with self._cond:
+                    self._pending = 0
+                    self._durable = self.appended
+                    self.commits += 1
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "path": self.path,
+                "segment": self.seq,
+                "sessions": len(self.index),
+                "appended": self.appended,
+                "commits": self.commits,
+                "pending": self._pending,
+                "records_per_commit": round(self.appended / self.commits, 1) if self.commits else 0.0,
+                "rotations": self.rotations,
+                "compactions": self.compactions
+            }
+
+
+_logs: Dict[str, SessionLog] = {}
+_logs_lock = threading.Lock()
+
+
+def open_log(path: str) -> SessionLog:
+    """The process-wide SessionLog for a file (one writer per file)."""
+    key = os.path.abspath(path)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None or log._closed:
+            log = _logs[key] = SessionLog(path)
+            atexit.register(log.close)
+        return log
+
+
+def replay_session(records: Iterator[Dict], session_id: str) -> Optional[Dict]:
+    """Rebuilds a session's data from its log records (None if it never started)."""
+    session_data = None
+    for record in records:
+        if record["type"] == "start":
+            session_data = {
+                "session_id": session_id,
+                "start_time": record["start_time"],
+                "interactions": [],
+                "status": "active"
+            }
+        elif record["type"] == "interaction" and session_data is not None:
+            session_data["interactions"].append(
+                {k: record[k] for k in ("timestamp", "role", "content", "metadata")}
+            )
+        elif record["type"] == "end" and session_data is not None:
+            session_data["status"] = "closed"
+    return session_data
+
 
 class SessionManager:
-    def __init__(self, log_file="session_logs.json"):
+    def __init__(self, log_file="session_logs.jsonl", session_id: Optional[str] = None,
+                 log: Optional[SessionLog] = None):
+        """
+        Starts a new session, or resumes `session_id` by replaying the log.
+        Each interaction is one appended log record.
+        """
         self.log_file = log_file
-        self.session_data = {
-            "session_id": str(int(time.time())),
-            "start_time": datetime.now().isoformat(),
-            "interactions": [],
-            "status": "active"
-        }
-    
+        self.log = log or open_log(log_file)
+        self.session_data = replay_session(self.log.records(session_id), session_id) if session_id else None
+        if self.session_data is None:
+            self.session_data = {
+                "session_id": session_id or str(int(time.time())),
+                "start_time": datetime.now().isoformat(),
+                "interactions": [],
+                "status": "active"
+            }
+            self.log.append({
+                "session_id": self.session_data["session_id"],
+                "type": "start",
+                "start_time": self.session_data["start_time"]
+            })
+
     def log_interaction(self, role, content, metadata=None):
         interaction = {
             "timestamp": datetime.now().isoformat(),
@@ -21,14 +539,15 @@ class SessionManager:
             "metadata": metadata or {}
         }
         self.session_data["interactions"].append(interaction)
-        self._save()
-        
-    def _save(self):
         try:
-            with open(self.log_file, "w") as f:
-                json.dump(self.session_data, f, indent=2)
-        except Exception as e:
+            self.log.append({"session_id": self.session_data["session_id"], "type": "interaction", **interaction})
+        except (OSError, ValueError) as e:
             print(f"Error saving session log: {e}")
 
-    def get_history(self):
+    def end(self):
+        """Marks the session closed; compaction stores its transcript contiguously."""
+        self.session_data["status"] = "closed"
+        self.log.append({"session_id": self.session_data["session_id"], "type": "end"})
+
+    def get_history(self) -> List[Dict]:
         return self.session_data["interactions"]
@@ -0,0 +1,169 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from .session_table import SWEEP_INTERVAL_SECONDS
+
+
+class _Entry:
+    __slots__ = ("state", "lock", "last_seen", "pins")
+
+    def __init__(self, state: Dict):
+        self.state = state
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.pins = 0   # turns holding or waiting for the lock; changed under the shard lock
+
+
+class _Shard:
+    __slots__ = ("entries", "lock")
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()  # least recently used first
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """
+    Conversation state keyed by sessionId, so concurrent conversations
+    progress independently.
+
+    Sessions are spread over shards by hash, each with its own lock, so
+    lookups for different sessions rarely contend. Every session also has
+    its own lock, held while one of its turns is processed: turns of one
+    conversation run in order, other conversations are unaffected.
+    Memory is bounded by max_sessions (least recently used idle sessions go
+    first) and sessions idle longer than ttl_seconds are evicted, on access
+    and by a background sweeper thread (start_sweeper()). A session is
+    pinned from lookup until its turn ends, so it cannot be evicted between
+    being looked up and its lock being taken.
+    """
+
+    def __init__(self, factory: Callable[[str], Dict], max_sessions: int = 10000,
+                 ttl_seconds: float = 2 * 3600, shards: int = 16,
+                 sweep_interval: float = SWEEP_INTERVAL_SECONDS):
+        self.factory = factory
+        self.ttl_seconds = ttl_seconds
+        self.max_per_shard = max(1, max_sessions // shards)
+        self.sweep_interval = sweep_interval
+        self._shards: List[_Shard] = [_Shard() for _ in range(shards)]
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.sweeps = 0
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[zlib.crc32(session_id.encode("utf-8")) % len(self._shards)]
+
+    def _pin(self, session_id: str) -> _Entry:
+        shard = self._shard(session_id)
+        now = time.monotonic()
+        with shard.lock:
+            entry = shard.entries.get(session_id)
+            if entry is not None and now - entry.last_seen > self.ttl_seconds and not entry.pins:
+                del shard.entries[session_id]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                entry = shard.entries[session_id] = _Entry(self.factory(session_id))
+                self.created += 1
+                self._evict(shard, now, keep=session_id)
+            else:
+                shard.entries.move_to_end(session_id)
+            entry.last_seen = now
+            entry.pins += 1
+            return entry
+
+    def _unpin(self, session_id: str, entry: _Entry):
+        with self._shard(session_id).lock:
+            entry.pins -= 1
+            entry.last_seen = time.monotonic()
+
+    def _evict(self, shard: _Shard, now: float, keep: str):
+        # Called with shard.lock held; sessions mid-turn (and the one just
+        # created) are never evicted
+        if len(shard.entries) <= self.max_per_shard:
+            return
+        for session_id, entry in list(shard.entries.items()):
+            if len(shard.entries) <= self.max_per_shard:
+                break
+            if session_id != keep and not entry.pins:
+                del shard.entries[session_id]
+                if now - entry.last_seen > self.ttl_seconds:
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+
+    @contextmanager
+    def session(self, session_id: str):
+        """
+        Yields the session's state dict with its lock held:
+            with store.session(sid) as state:
+                state["turns"] += 1
+        """
+        entry = self._pin(session_id)
+        try:
+            with entry.lock:
+                yield entry.state
+        finally:
+            self._unpin(session_id, entry)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Shallow copy of a live session's state, or None."""
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.entries.get(session_id)
+        if entry is None:
+            return None
+        with entry.lock:
+            return dict(entry.state)
+
+    def drop(self, session_id: str) -> bool:
+        shard = self._shard(session_id)
+        with shard.lock:
+            return shard.entries.pop(session_id, None) is not None
+
+    def sweep(self) -> int:
+        """Evicts every idle session past its TTL. Returns how many were dropped."""
+        now = time.monotonic()
+        dropped = 0
+        for shard in self._shards:
+            with shard.lock:
+                expired = [sid for sid, entry in shard.entries.items()
+                           if now - entry.last_seen > self.ttl_seconds and not entry.pins]
+                for session_id in expired:
+                    del shard.entries[session_id]
+            dropped += len(expired)
+        self.expirations += dropped
+        self.sweeps += 1
+        return dropped
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def start_sweeper(self):
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self),
+            "shards": len(self._shards),
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "sweeps": self.sweeps,
+        }
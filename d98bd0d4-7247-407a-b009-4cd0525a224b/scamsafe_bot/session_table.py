@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+MAX_SESSIONS = int(os.getenv("SCAMSAFE_MAX_SESSIONS", "10000"))
+SESSION_TTL_SECONDS = float(os.getenv("SCAMSAFE_SESSION_TTL_SECONDS", str(2 * 3600)))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SCAMSAFE_SESSION_SWEEP_SECONDS", "60"))
+
+
+class SessionRecord:
+    """
+    Base for the per-session records kept in a SessionTable. Subclasses add
+    their fields to __slots__, so a record is a few pointers rather than a
+    dict (no per-instance __dict__).
+    """
+
+    __slots__ = ("last_seen",)
+
+
+R = TypeVar("R", bound=SessionRecord)
+
+
+class SessionTable(Generic[R]):
+    """
+    Bounded in-memory session table for the lightweight webhook servers.
+
+    Records are kept least recently used first. get_or_create() refreshes a
+    session; past max_sessions the least recently used one is evicted, and
+    sessions idle longer than ttl_seconds are dropped by sweep(), run
+    periodically by a background sweeper thread (start_sweeper()). Expired
+    sessions are also dropped on access, so the TTL holds without the
+    sweeper; it only bounds how long dead sessions occupy memory.
+    """
+
+    def __init__(self, factory: Callable[[], R], max_sessions: int = MAX_SESSIONS,
+                 ttl_seconds: float = SESSION_TTL_SECONDS, sweep_interval: float = SWEEP_INTERVAL_SECONDS):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._records: "OrderedDict[str, R]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._turn_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.sweeps = 0
+
+    def get_or_create(self, session_id: str) -> Tuple[R, bool]:
+        """Returns (record, created)."""
+        now = time.monotonic()
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None and now - record.last_seen > self.ttl_seconds:
+                del self._records[session_id]
+                self.expired += 1
+                record = None
+            created = record is None
+            if created:
+                record = self.factory()
+                self._records[session_id] = record
+                self.created += 1
+                while len(self._records) > self.max_sessions:
+                    self._records.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._records.move_to_end(session_id)
+            record.last_seen = now
+            return record, created
+
+    @contextmanager
+    def session(self, session_id: str):
+        """
+        Yields the session's record, the interface shared with the other
+        session stores (see session_backend.py). Handlers run in a
+        threadpool, so blocks are serialized by one table-wide lock rather
+        than a lock per record: turns here are short CPU work that the GIL
+        serializes anyway, and records stay a few pointers.
+        """
+        with self._turn_lock:
+            yield self.get_or_create(session_id)[0]
+
+    def get(self, session_id: str) -> Optional[R]:
+        with self._lock:
+            return self._records.get(session_id)
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(session_id, None) is not None
+
+    def sweep(self) -> int:
+        """Drops idle sessions; oldest first, so it stops at the first live one."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        dropped = 0
+        with self._lock:
+            while self._records:
+                session_id, record = next(iter(self._records.items()))
+                if record.last_seen > cutoff:
+                    break
+                del self._records[session_id]
+                dropped += 1
+            self.expired += dropped
+            self.sweeps += 1
+        return dropped
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def start_sweeper(self):
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._records
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sample = next(reversed(self._records.values()), None)
+            return {
+                "sessions": len(self._records),
+                "max_sessions": self.max_sessions,
+                "created": self.created,
+                "evicted": self.evicted,
+                "expired": self.expired,
+                "sweeps": self.sweeps,
+                # Shallow size of one record (fields it points to not included)
+                "record_bytes": sys.getsizeof(sample) if sample is not None else 0
+            }
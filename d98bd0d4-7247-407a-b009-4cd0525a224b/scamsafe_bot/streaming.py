@@ -0,0 +1,99 @@
+import json
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from .json_stream import JSONStreamParser
+
+class TurnStream:
+    """
+    Event sink for one streamed webhook turn. `send(event, data)` is called
+    from the crew worker thread; the SSE endpoint forwards events to the
+    client. LLM chunks are filtered down to the persona's public_response.
+    """
+
+    def __init__(self, send: Callable[[str, dict], None], field: str = "public_response"):
+        self.send = send
+        self.tokens = 0
+        self._path = (field,)
+        # Stops consuming chunks once the field's string has closed
+        self._parser = JSONStreamParser(wanted=[self._path], on_text=self._on_text)
+
+    def llm_chunk(self, chunk: str):
+        self._parser.feed(chunk)
+
+    def _on_text(self, path, text: str):
+        if path == self._path:
+            self.token(text)
+
+    def token(self, text: str):
+        self.tokens += 1
+        self.send("token", {"text": text})
+
+
+# LLM object -> stream of the turn currently using it. A crew set is checked
+# out by one turn at a time, so its persona LLM belongs to that turn; routing
+# by the emitting LLM works on whatever thread crewai delivers events on.
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+@contextmanager
+def route_stream(llms, stream: Optional[TurnStream]):
+    """Routes chunks emitted by `llms` to `stream` for the block."""
+    if stream is None:
+        yield stream
+        return
+    keys = [id(llm) for llm in llms]
+    with _routes_lock:
+        for key in keys:
+            _routes[key] = stream
+    try:
+        yield stream
+    finally:
+        with _routes_lock:
+            for key in keys:
+                if _routes.get(key) is stream:
+                    del _routes[key]
+
+
+def forward_chunk(source, chunk: str):
+    """Hands one LLM stream chunk to the stream routed for its source, if any."""
+    with _routes_lock:
+        # Some crewai versions emit from the agent rather than its LLM
+        stream = _routes.get(id(source)) or _routes.get(id(getattr(source, "llm", None)))
+    if stream is not None:
+        stream.llm_chunk(chunk)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+_listener_installed = False
+
+
+def install_chunk_listener() -> bool:
+    """
+    Forwards crewai's LLM stream-chunk events to the stream routed for the
+    emitting LLM. Returns False if this crewai has no stream events
+    (replies are then sent whole when the turn finishes).
+    """
+    global _listener_installed
+    if _listener_installed:
+        return True
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus
+            from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+        except ImportError:
+            return False
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _forward(source, event):
+        forward_chunk(source, event.chunk)
+
+    _listener_installed = True
+    return True
@@ -0,0 +1,38 @@
+import pytest
+from scamsafe_bot import blocklist, detector
+from scamsafe_bot.blocklist import Blocklist, BloomFilter, build_filter
+from scamsafe_bot.detector import ScamDetector
+from scamsafe_bot.verdict_cache import VerdictCache
+
+@pytest.fixture
+def blocklist_dir(tmp_path):
+    (tmp_path / "upi.txt").write_text("# mule handles\nPortTrustHR@paytm\nmule1@ybl\n")
+    (tmp_path / "domain.txt").write_text("ebtamilnadu.co.in\nhttps://www.sbi-kyc-update.top/login\n")
+    for kind in ("upi", "domain"):
+        blocklist.main([kind, str(tmp_path / f"{kind}.txt"), "--output", str(tmp_path / f"{kind}.bloom")])
+    return tmp_path
+
+def test_filter_has_no_false_negatives(tmp_path):
+    keys = [f"mule{i}@ybl" for i in range(5000)]
+    path = str(tmp_path / "upi.bloom")
+    build_filter(keys, len(keys), path, fp_rate=1e-3)
+    bloom = BloomFilter(path)
+    assert all(k in bloom for k in keys)
+    false_positives = sum(f"clean{i}@ybl" in bloom for i in range(5000))
+    assert false_positives < 50
+
+def test_entity_checks_normalize(blocklist_dir):
+    blocked = Blocklist(str(blocklist_dir))
+    assert blocked.contains("upi", "porttrusthr@PAYTM")
+    assert blocked.contains("domain", "https://pay.ebtamilnadu.co.in/billrefund")
+    assert blocked.contains("domain", "sbi-kyc-update.top/verify")
+    assert not blocked.contains("domain", "https://onlinesbi.sbi")
+    assert not blocked.contains("phone", "9840012345")  # no phone filter built
+
+def test_detector_short_circuits_on_blocklist_hit(blocklist_dir, monkeypatch):
+    monkeypatch.setattr(detector, "simulate_latency", lambda *a, **k: None)
+    scam_detector = ScamDetector(cache=VerdictCache(), blocklist=Blocklist(str(blocklist_dir)))
+    verdict = scam_detector.assess_threat("hello sir please send to porttrusthr@paytm")
+    assert verdict["is_scam"] is True and verdict["confidence"] == 0.99
+    assert "porttrusthr@paytm" in verdict["reason"]
+    assert scam_detector.assess_threat("hello sir")["is_scam"] is False
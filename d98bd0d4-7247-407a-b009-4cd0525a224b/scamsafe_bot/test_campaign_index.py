@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from scamsafe_bot.campaign_index import CampaignIndex
+
+PORT_TRUST = ("Deepak sir, naan Chennai Port Trust HR department la irundhu. Unga Binny & Co payroll change "
+              "pending sir. SBI Egmore account verify panna ₹12,500 salary increment process pannurom. "
+              "My official UPI: porttrusthr@paytm send ₹10 verification. Link: bit.ly/porttrust-verify")
+PORT_TRUST_VARIANT = ("Ramesh sir, naan Chennai Port Trust HR department la irundhu. Unga Binny & Co payroll change "
+                      "pending sir. SBI Egmore account verify panna ₹9,000 salary increment process pannurom. "
+                      "My official UPI: hrdesk.pt@ybl send ₹5 verification. Link: bit.ly/pt-verify2")
+FRIEND_EMERGENCY = ("Dei Deepak, naan Tamilselvan da. Urgent help venum bro. My phone lost, new number use panren. "
+                    "₹5000 transfer pannu da emergency. UPI ID: tselvan.urgent@oksbi. Please fast da.")
+
+def test_variant_joins_campaign():
+    index = CampaignIndex()
+    campaign_id = index.add(PORT_TRUST, {"is_scam": True, "confidence": 0.95}, {"upiIds": ["porttrusthr@paytm"]})
+    match = index.lookup(PORT_TRUST_VARIANT)
+    assert match["campaign_id"] == campaign_id
+    assert match["verdict"] == {"is_scam": True, "confidence": 0.95}
+    assert match["intel"] == {"upiIds": ["porttrusthr@paytm"]}
+
+def test_unrelated_message_is_new_campaign():
+    index = CampaignIndex()
+    index.add(PORT_TRUST, {"is_scam": True})
+    assert index.lookup(FRIEND_EMERGENCY) is None
+    assert index.add(FRIEND_EMERGENCY) != index.add(PORT_TRUST)
+
+def test_intel_merges_across_variants():
+    index = CampaignIndex()
+    first = index.add(PORT_TRUST, intel={"upiIds": ["porttrusthr@paytm"]})
+    second = index.add(PORT_TRUST_VARIANT, intel={"upiIds": ["hrdesk.pt@ybl", "porttrusthr@paytm"]})
+    assert first == second
+    match = index.lookup(PORT_TRUST)
+    assert match["intel"]["upiIds"] == ["porttrusthr@paytm", "hrdesk.pt@ybl"]
+    assert match["size"] == 2
+
+def test_signature_is_stable_across_processes():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("from scamsafe_bot.campaign_index import CampaignIndex; "
+            "print(CampaignIndex().signature('urgent kyc update needed today sir'))")
+    outputs = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                              env={**os.environ, "PYTHONHASHSEED": seed}, cwd=root).stdout
+               for seed in ("1", "2")}
+    assert len(outputs) == 1
+
+def test_least_recent_campaign_is_evicted():
+    index = CampaignIndex(max_campaigns=1)
+    first = index.add(PORT_TRUST)
+    second = index.add(FRIEND_EMERGENCY)
+    assert first != second
+    assert index.lookup(PORT_TRUST) is None
+    assert index.lookup(FRIEND_EMERGENCY)["campaign_id"] == second
+    stats = index.stats()
+    assert stats["campaigns"] == 1 and stats["evicted"] == 1 and stats["band_keys"] <= index.bands
+
+def test_campaign_intel_keeps_the_newest_values():
+    index = CampaignIndex(intel_per_campaign=2)
+    index.add(PORT_TRUST, intel={"upiIds": ["a@paytm", "b@paytm"]})
+    index.add(PORT_TRUST, intel={"upiIds": ["a@paytm", "c@paytm"]})
+    assert index.lookup(PORT_TRUST)["intel"] == {"upiIds": ["b@paytm", "c@paytm"]}
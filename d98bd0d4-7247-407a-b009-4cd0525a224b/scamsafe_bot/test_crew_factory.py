@@ -0,0 +1,80 @@
+import pytest
+from scamsafe_bot import crew_factory
+from scamsafe_bot.crew_factory import StartupTimings, WarmPool
+
+def _counting_factory():
+    built = []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+    return factory, built
+
+def test_prewarm_builds_up_to_warm():
+    factory, built = _counting_factory()
+    pool = WarmPool(factory, warm=2, max_size=4)
+    pool.prewarm()
+    pool.prewarm()
+    assert len(built) == 2
+    assert pool.stats()["idle"] == 2
+
+def test_checkout_reuses_warm_instances():
+    factory, built = _counting_factory()
+    pool = WarmPool(factory, warm=1, max_size=4)
+    pool.prewarm_in_background().join(timeout=5)
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        pass
+    assert first is second is built[0]
+    assert pool.stats()["cold_builds"] == 0
+
+def test_concurrent_checkouts_get_distinct_instances():
+    factory, built = _counting_factory()
+    pool = WarmPool(factory, warm=0, max_size=1)
+    with pool.checkout() as a:
+        with pool.checkout() as b:
+            assert a is not b
+    # Only max_size instances are kept; the overflow one is thrown away
+    assert pool.stats() == {"pooled": 1, "idle": 1, "created": 2, "checkouts": 2, "cold_builds": 2}
+
+def test_failed_build_frees_its_slot():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("no api key")
+        return "crews"
+
+    pool = WarmPool(flaky, warm=1, max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.checkout():
+            pass
+    assert pool.stats()["pooled"] == 0
+    pool.prewarm()
+    with pool.checkout() as instance:
+        assert instance == "crews"
+
+def test_startup_timings_accumulate_per_step():
+    timings = StartupTimings()
+    with timings.step("import crewai"):
+        pass
+    timings.record("build crew set #1", 12.34)
+    timings.record("build crew set #1", 1.0)
+    stats = timings.stats()
+    assert list(stats) == ["import crewai", "build crew set #1"]
+    assert stats["build crew set #1"] == 13.3
+
+def test_build_timings_stay_bounded(monkeypatch):
+    timings = StartupTimings()
+    monkeypatch.setattr(crew_factory, "startup_timings", timings)
+    factory, built = _counting_factory()
+    pool = WarmPool(factory, warm=1, max_size=1, name="crew set")
+    pool.prewarm()
+    with pool.checkout():
+        for _ in range(5):
+            with pool.checkout():
+                pass
+    assert len(built) == 6
+    assert list(timings.stats()) == ["build crew set #1", "build crew set (overflow)"]
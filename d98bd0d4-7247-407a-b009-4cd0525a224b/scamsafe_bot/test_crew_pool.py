@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+import pytest
+from scamsafe_bot.crew_pool import CrewPool, PoolSaturated, QueueTimeout
+
+def test_runs_jobs_and_returns_results():
+    pool = CrewPool(workers=2, max_queue=2)
+    futures = [pool.submit(lambda x: x * 2, i) for i in range(4)]
+    assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6]
+    assert pool.stats()["completed"] == 4
+    pool.shutdown()
+
+def test_rejects_when_workers_and_queue_are_full():
+    pool = CrewPool(workers=1, max_queue=1)
+    gate = threading.Event()
+    running = pool.submit(gate.wait)
+    queued = pool.submit(lambda: "queued")
+    with pytest.raises(PoolSaturated):
+        pool.submit(lambda: "too many")
+    assert pool.stats()["rejected"] == 1
+    gate.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "queued"
+    # Slots are released once jobs finish
+    assert pool.submit(lambda: "again").result(timeout=5) == "again"
+    pool.shutdown()
+
+def test_stale_queued_job_is_dropped():
+    pool = CrewPool(workers=1, max_queue=1, max_queue_wait=0.05)
+    ran = []
+    blocker = pool.submit(time.sleep, 0.2)
+    stale = pool.submit(ran.append, "x")
+    with pytest.raises(QueueTimeout):
+        stale.result(timeout=5)
+    blocker.result(timeout=5)
+    assert ran == []
+    assert pool.stats()["timed_out"] == 1
+    pool.shutdown()
+
+def test_async_run_keeps_event_loop_free():
+    pool = CrewPool(workers=1, max_queue=0)
+
+    async def main():
+        ticks = 0
+        job = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        while not job.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks
+
+    assert asyncio.run(main()) > 5
+    pool.shutdown()
@@ -0,0 +1,35 @@
+import pytest
+from scamsafe_bot.detection_gate import DetectionGate
+from scamsafe_bot.detector import ScamDetector
+
+@pytest.fixture
+def gate():
+    return DetectionGate(ScamDetector(), scam_score=0.9, benign_score=0.0)
+
+def test_clear_scam_skips_llm(gate):
+    verdict = gate.classify("KYC urgent! Pay to refund.desk@paytm or verify at bit.ly/kyc-upd")
+    assert verdict["is_scam"] is True
+    assert verdict["tier"] == "regex_scam"
+    assert verdict["confidence"] == 0.99
+
+def test_no_indicators_is_benign(gate):
+    verdict = gate.classify("Hi, are we still meeting for lunch tomorrow?")
+    assert verdict == {"is_scam": False, "confidence": 0.1, "risk_factors": [], "tier": "regex_benign"}
+
+def test_ambiguous_band_goes_to_llm(gate):
+    assert gate.classify("Sir your account is blocked, call back") is None
+
+def test_tier_fractions(gate):
+    gate.classify("Hi, how are you?")
+    gate.classify("Sir your account is blocked, call back")
+    gate.record("cache")
+    gate.record("cache")
+    stats = gate.stats()
+    assert stats["turns"] == 4
+    assert stats["tiers"]["cache"] == 2
+    assert stats["fractions"]["llm"] == 0.25
+    assert stats["fractions"]["regex_benign"] == 0.25
+
+def test_thresholds_must_leave_a_band():
+    with pytest.raises(ValueError):
+        DetectionGate(ScamDetector(), scam_score=0.5, benign_score=0.5)
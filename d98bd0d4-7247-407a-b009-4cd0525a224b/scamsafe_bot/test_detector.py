@@ -0,0 +1,68 @@
+import pytest
+from scamsafe_bot import detector
+from scamsafe_bot.detector import ScamDetector
+from scamsafe_bot.matcher import KeywordMatcher
+from scamsafe_bot.verdict_cache import VerdictCache
+
+SCAM_SMS = "URGENT: your SBI KYC is blocked. Verify at bit.ly/kyc-fix or pay to refund.desk@paytm"
+
+@pytest.fixture(autouse=True)
+def no_latency(monkeypatch):
+    monkeypatch.setattr(detector, "simulate_latency", lambda *a, **k: None)
+
+def test_matcher_finds_overlapping_hits():
+    matcher = KeywordMatcher([("a", 1.0, ["he", "she", "hers"]), ("b", 0.5, [("his", "HIS")])])
+    hits = [(offset, matcher.terms[term_id]) for offset, term_id in matcher.scan("ushers his")]
+    assert hits == [
+        (1, ("a", "she")), (2, ("a", "he")), (2, ("a", "hers")), (7, ("b", "HIS")),
+    ]
+
+def test_scam_verdict():
+    result = ScamDetector().assess_threat(SCAM_SMS)
+    assert result["is_scam"] is True
+    assert result["confidence"] == 0.99
+    assert result["type"] == "financial_scam"
+    assert "contains_url" in result["reason"] and "contains_upi" in result["reason"]
+
+def test_safe_verdict():
+    result = ScamDetector().assess_threat("Hey, let's meet for coffee.")
+    assert result == {
+        "is_scam": False,
+        "confidence": 0.1,
+        "type": "safe",
+        "reason": "No suspicious patterns found.",
+    }
+
+def test_scan_reports_offsets():
+    hits = ScamDetector().scan(SCAM_SMS.lower())
+    assert (0, "critical", "urgent") in hits
+    assert (SCAM_SMS.index("@"), "upi", "contains_upi") in hits
+
+def test_bare_at_sign_is_not_upi():
+    hits = ScamDetector().scan("mail me @ 5pm")
+    assert not [h for h in hits if h[1] == "upi"]
+
+def test_batch_matches_single_calls():
+    # Separate detectors without caches, so single calls can't reuse batch verdicts
+    batch = ScamDetector(cache=VerdictCache(max_size=0), blocklist=[])
+    single = ScamDetector(cache=VerdictCache(max_size=0), blocklist=[])
+    messages = [SCAM_SMS, "Hey, let's meet for coffee.", "", "sister wedding", "x@", "@paytm bit.ly"]
+    assert batch.assess_batch(messages) == [single.assess_threat(m) for m in messages]
+
+def test_batch_uses_the_verdict_cache():
+    detector_ = ScamDetector()
+    detector_.cache.put("hello there", {"is_scam": True, "confidence": 0.9, "type": "financial_scam", "reason": "seeded"})
+    assert detector_.assess_batch(["hello there", "Hello there"])[1]["reason"] == "seeded"
+    detector_.assess_batch([SCAM_SMS])
+    assert detector_.cache.get(SCAM_SMS) == detector_.assess_threat(SCAM_SMS)
+
+def test_upi_check_uses_the_original_text():
+    detector = ScamDetector(cache=VerdictCache(max_size=0), blocklist=[])
+    # The Kelvin sign lowercases to 'k', but the UPI pattern is ASCII-only
+    kelvin = "pay \u212a@paytm now"
+    # 'İ' lowercases to two characters, shifting every later offset
+    dotted = "İİ send to rahul@paytm"
+    assert "contains_upi" not in detector.features(kelvin)["matches"]
+    assert "contains_upi" in detector.features(dotted)["matches"]
+    assert [v["reason"] for v in detector.assess_batch([kelvin, dotted])] == \
+        [detector.assess_threat(kelvin)["reason"], detector.assess_threat(dotted)["reason"]]
@@ -0,0 +1,122 @@
+import json
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from scamsafe_bot import detector, fastapi_server, honeypot_crew
+from scamsafe_bot.crew_pool import PoolSaturated, QueueTimeout
+from scamsafe_bot.session_backend import SessionBusy
+from scamsafe_bot.streaming import forward_chunk
+
+HEADERS = {"x-api-key": "YOUR_SECRET"}
+TURN = {
+    "sessionId": "endpoint-turn",
+    "message": {"sender": "scammer", "text": "hello, who is this?", "timestamp": 1770005528731}
+}
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(detector, "simulate_latency", lambda *a, **k: None)
+    return TestClient(fastapi_server.app)
+
+def test_detect_batch_returns_verdicts_in_order(client):
+    response = client.post("/detect/batch", headers=HEADERS,
+                           json={"messages": ["URGENT: KYC blocked, verify at bit.ly/kyc-fix", "see you at lunch"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert [verdict["is_scam"] for verdict in body["results"]] == [True, False]
+
+def test_detect_batch_rejects_oversized_batches(client, monkeypatch):
+    monkeypatch.setattr(fastapi_server, "MAX_BATCH_SIZE", 2)
+    response = client.post("/detect/batch", headers=HEADERS, json={"messages": ["a", "b", "c"]})
+    assert response.status_code == 413
+
+def test_detect_batch_needs_the_api_key(client):
+    assert client.post("/detect/batch", json={"messages": []}).status_code == 401
+
+class _StreamingCrew:
+    """Stands in for a crew whose persona LLM streams its output in chunks."""
+
+    def __init__(self, output):
+        self.output = output
+        self.agents = [SimpleNamespace(llm=object())]
+
+    def kickoff(self, inputs):
+        # Deliver the chunk events off the kickoff thread, as crewai may
+        def emit():
+            for i in range(0, len(self.output), 5):
+                forward_chunk(self.agents[0].llm, self.output[i:i + 5])
+        emitter = threading.Thread(target=emit)
+        emitter.start()
+        emitter.join()
+        return self.output
+
+def _sse_events(text):
+    events = []
+    for frame in text.split("\n\n"):
+        if frame:
+            event_line, data_line = frame.split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+def test_webhook_stream_sends_reply_tokens_then_done(client, monkeypatch):
+    crew = _StreamingCrew('{"public_response": "Who is this sir? Which bank?"}')
+
+    @contextmanager
+    def checkout():
+        yield {tier: (crew, crew) for tier in ("fast", "full")}
+
+    monkeypatch.setattr(honeypot_crew.crew_sets, "checkout", checkout)
+    monkeypatch.setattr(honeypot_crew, "send_final_callback", lambda *a, **k: None)
+    response = client.post("/webhook/stream", headers=HEADERS, json=TURN)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [event for event, _ in events[:-1]] == ["token"] * (len(events) - 1)
+    assert len(events) > 2
+    assert "".join(data["text"] for _, data in events[:-1]) == "Who is this sir? Which bank?"
+    event, done = events[-1]
+    assert event == "done"
+    assert done["status"] == "success" and done["reply"] == "Who is this sir? Which bank?"
+    assert "extractedIntelligence" in done
+
+@pytest.mark.parametrize("error, status, retry_after", [
+    (PoolSaturated, 429, "2"),
+    (QueueTimeout, 503, "5"),
+    (SessionBusy, 409, "2")
+])
+def test_webhook_maps_pool_and_session_errors(client, monkeypatch, error, status, retry_after):
+    async def run(fn, *args):
+        raise error("stub")
+
+    monkeypatch.setattr(fastapi_server.crew_pool, "run", run)
+    response = client.post("/webhook", headers=HEADERS, json=TURN)
+    assert response.status_code == status
+    assert response.headers["retry-after"] == retry_after
+
+def test_webhook_stream_sheds_load_when_the_pool_is_full(client, monkeypatch):
+    def submit(fn, *args):
+        raise PoolSaturated("stub")
+
+    monkeypatch.setattr(fastapi_server.crew_pool, "submit", submit)
+    response = client.post("/webhook/stream", headers=HEADERS, json=TURN)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+
+@pytest.mark.parametrize("error, detail", [
+    (QueueTimeout, "Honeypot overloaded"),
+    (SessionBusy, "Session busy, retry shortly")
+])
+def test_webhook_stream_reports_failed_turns_as_error_events(client, monkeypatch, error, detail):
+    def submit(fn, *args):
+        job = Future()
+        job.set_exception(error("stub"))
+        return job
+
+    monkeypatch.setattr(fastapi_server.crew_pool, "submit", submit)
+    response = client.post("/webhook/stream", headers=HEADERS, json=TURN)
+    assert response.status_code == 200
+    assert _sse_events(response.text) == [("error", {"status": "error", "detail": detail})]
@@ -0,0 +1,59 @@
+from scamsafe_bot.history_window import HistoryCompactor, estimate_tokens, new_window, redact_intel
+
+def _history(n):
+    return [
+        {"sender": "scammer" if i % 2 == 0 else "user",
+         "text": f"Message {i}: sir please verify your SBI account today, this is very important for refund processing",
+         "timestamp": 1770005528731 + i}
+        for i in range(n)
+    ]
+
+def test_intel_values_are_redacted_keywords_kept():
+    text = "Pay to porttrusthr@paytm or call +91 98400 12345, link bit.ly/verify-now for refund"
+    assert redact_intel(text) == "Pay to [UPI] or call [PHONE], link [LINK] for refund"
+
+def test_short_history_is_passed_verbatim():
+    compactor = HistoryCompactor(budget_tokens=600, recent_messages=4)
+    window = new_window()
+    text, raw, sent = compactor.update(window, _history(2))
+    assert "Earlier" not in text
+    assert "Scammer: Message 0" in text and "Deepak: Message 1" in text
+    # Nothing to save yet: only the section header is added
+    assert raw <= sent <= raw + estimate_tokens("Latest messages:\n") + 1
+
+def test_older_messages_fold_into_summary_once():
+    compactor = HistoryCompactor(budget_tokens=10000, recent_messages=2)
+    window = new_window()
+    history = _history(4)
+    compactor.update(window, history)
+    summary = list(window["summary"])
+    assert len(summary) == 2 and summary[0].startswith("- Scammer: Message 0")
+    # Next turn only the new messages are taken in; old lines are untouched
+    history += _history(6)[4:]
+    text, _, _ = compactor.update(window, history)
+    assert window["summary"][:2] == summary
+    assert len(window["summary"]) == 4
+    assert [m["text"][:9] for m in window["recent"]] == ["Message 4", "Message 5"]
+    assert text.index("Earlier in the conversation:") < text.index("Latest messages:")
+
+def test_budget_holds_on_long_conversations():
+    compactor = HistoryCompactor(budget_tokens=120, recent_messages=4)
+    window = new_window()
+    history = []
+    for turn in range(18):
+        history += _history(2 * turn + 2)[2 * turn:]
+        text, raw, sent = compactor.update(window, history)
+        assert sent <= 120
+        assert sent == estimate_tokens(text)
+    assert raw > 5 * sent
+    assert "earlier messages omitted" in text
+    stats = compactor.stats()
+    assert stats["turns"] == 18 and stats["saved_fraction"] > 0.5
+
+def test_restarted_history_resets_the_window():
+    compactor = HistoryCompactor(budget_tokens=600, recent_messages=2)
+    window = new_window()
+    compactor.update(window, _history(6))
+    text, _, _ = compactor.update(window, _history(1))
+    assert window["seen"] == 1 and window["summary"] == []
+    assert compactor.stats()["resets"] == 1
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+from scamsafe_bot import honeypot_crew
+from scamsafe_bot.honeypot_crew import new_conversation_state, settle_detection
+
+def test_flagged_session_is_not_downgraded_by_a_benign_turn():
+    state = new_conversation_state("s1")
+    settle_detection(state, {"is_scam": True, "confidence": 0.95})
+    settle_detection(state, {"is_scam": False, "confidence": 0.1})   # "ok sir"
+    assert state["scam_detected"] is True and state["confidence"] == 0.95
+
+def test_benign_session_can_be_flagged_later():
+    state = new_conversation_state("s1")
+    settle_detection(state, {"is_scam": False, "confidence": 0.1})
+    assert state["scam_detected"] is False
+    settle_detection(state, {"is_scam": True, "confidence": 0.9})
+    assert state["scam_detected"] is True and state["confidence"] == 0.9
+
+class _FakeCrew:
+    def __init__(self, output):
+        self.output = output
+        self.inputs = []
+        self.agents = [SimpleNamespace(llm=object())]
+
+    def kickoff(self, inputs):
+        self.inputs.append(inputs)
+        return self.output
+
+@pytest.fixture
+def fake_crews(monkeypatch):
+    crew = _FakeCrew('{"public_response": "Who is this sir?"}')
+
+    @contextmanager
+    def checkout():
+        yield {tier: (crew, crew) for tier in ("fast", "full")}
+
+    monkeypatch.setattr(honeypot_crew.crew_sets, "checkout", checkout)
+    monkeypatch.setattr(honeypot_crew, "send_final_callback", lambda *a, **k: None)
+    return crew
+
+def test_crew_run_uses_the_given_budget(fake_crews):
+    state = new_conversation_state("crew-budget")
+    state["turns"] = 1
+    crew_input = {"message": "hello, who is this?", "history": "", "turn_count": 1}
+    reply, fresh_verdict = honeypot_crew._run_crew(state, crew_input, {"is_scam": False, "confidence": 0.1}, 0.0, 2500)
+    assert reply == "Who is this sir?" and fresh_verdict is None
+
+def test_handler_accepts_null_metadata(fake_crews):
+    result = honeypot_crew.webhook_handler({
+        "sessionId": "null-metadata",
+        "message": {"sender": "scammer", "text": "hello, who is this?", "timestamp": 1770005528731},
+        "conversationHistory": [],
+        "metadata": None
+    })
+    assert result == {"status": "success", "reply": "Who is this sir?"}
+    assert fake_crews.inputs
@@ -0,0 +1,42 @@
+from scamsafe_bot.intel_extractor import IntelMatch, extract_intel, group_intel
+from scamsafe_bot.persona import PersonaEngine
+from scamsafe_bot import persona
+
+PORT_TRUST = ("SBI Egmore account verify panna ₹12,500 salary increment. My official UPI: porttrusthr@paytm "
+              "send ₹10 verification. Link: bit.ly/porttrust-verify")
+ACCOUNT_PHISH = ("Sir unga full SBI Egmore AC number venum. 1234567890123456 correct ah? "
+                 "WhatsApp number 98400-55555 ku send pannunga. Urgent sir.")
+
+def test_single_scan_with_spans():
+    matches = extract_intel(PORT_TRUST)
+    assert [m.kind for m in matches] == ["keyword", "upi_id", "url"]
+    upi = matches[1]
+    assert upi == IntelMatch("upi_id", "porttrusthr@paytm", PORT_TRUST.index("porttrusthr"), PORT_TRUST.index(" send"))
+
+def test_accounts_phones_and_keywords():
+    assert group_intel(extract_intel(ACCOUNT_PHISH)) == {
+        "bank_account": ["1234567890123456"],
+        "phone": ["98400-55555"],
+        "keyword": ["urgent"],
+    }
+
+def test_upi_uri_ifsc_and_trailing_punctuation():
+    found = group_intel(extract_intel(
+        "Pay upi://pay?pa=payment.verify@ebtamilnadu&am=10. IFSC SBIN0001234 (see https://ebtamilnadu.co.in/billrefund)."))
+    assert found["upi_uri"] == ["upi://pay?pa=payment.verify@ebtamilnadu&am=10"]
+    assert found["upi_id"] == ["payment.verify@ebtamilnadu"]
+    assert found["ifsc"] == ["SBIN0001234"]
+    assert found["url"] == ["https://ebtamilnadu.co.in/billrefund"]
+
+def test_keywords_are_whole_words_and_canonical():
+    found = group_intel(extract_intel("Your kyc and pf refund; visit the web site"))
+    assert found == {"keyword": ["KYC", "PF", "refund"]}
+
+def test_persona_uses_shared_extractor(monkeypatch):
+    monkeypatch.setattr(persona, "simulate_latency", lambda *a, **k: None)
+    result = PersonaEngine().engage(PORT_TRUST + " call +91 9840012345")
+    assert result["extracted_intel"] == {
+        "upi_ids": ["porttrusthr@paytm"],
+        "phishing_urls": ["bit.ly/porttrust-verify"],
+        "phone_numbers": ["+91 9840012345"],
+    }
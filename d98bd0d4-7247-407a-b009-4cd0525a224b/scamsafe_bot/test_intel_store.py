@@ -0,0 +1,59 @@
+from scamsafe_bot.intel_store import IntelStore, merge_intel
+
+def test_ordered_set_per_session():
+    store = IntelStore()
+    assert store.record("s1", {"upiIds": ["a@paytm", "b@ybl"]}, 1) == {"upiIds": ["a@paytm", "b@ybl"]}
+    assert store.record("s1", {"upiIds": ["b@ybl", "c@oksbi"]}, 2) == {"upiIds": ["c@oksbi"]}
+    assert store.session_intel("s1")["upiIds"] == ["a@paytm", "b@ybl", "c@oksbi"]
+    assert store.session_intel("unknown")["upiIds"] == []
+
+def test_reverse_index_across_sessions():
+    store = IntelStore()
+    store.record("s1", {"upiIds": ["porttrusthr@paytm"], "phoneNumbers": ["98400-55555"]}, 100)
+    store.record("s2", {"upiIds": ["PortTrustHR@paytm"]}, 200)
+    store.record("s2", {"upiIds": ["porttrusthr@paytm"], "phoneNumbers": ["+91 9840055555"]}, 300)
+    assert store.sessions_for("porttrusthr@paytm") == {
+        "s1": {"first_seen": 100, "last_seen": 100, "times_seen": 1},
+        "s2": {"first_seen": 200, "last_seen": 300, "times_seen": 2},
+    }
+    assert set(store.sessions_for("9840055555")) == {"s1", "s2"}
+
+def test_keywords_not_indexed_and_drop_session():
+    store = IntelStore()
+    store.record("s1", {"suspiciousKeywords": ["refund"], "upiIds": ["x@ybl"]}, 1)
+    assert store.sessions_for("refund") == {}
+    store.drop_session("s1")
+    assert store.sessions_for("x@ybl") == {}
+    assert store.stats() == {"sessions": 0, "indexed_entities": 0, "evicted": 0, "expired": 0}
+
+def test_sessions_are_bounded():
+    store = IntelStore(max_sessions=2)
+    for sid in ("s1", "s2", "s3"):
+        store.record(sid, {"upiIds": [f"{sid}@ybl"]}, 1)
+    assert store.sessions_for("s1@ybl") == {} and set(store.sessions_for("s3@ybl")) == {"s3"}
+    assert store.stats()["evicted"] == 1 and store.stats()["indexed_entities"] == 2
+    expiring = IntelStore(ttl_seconds=0)
+    expiring.record("old", {"upiIds": ["x@ybl"]}, 1)
+    expiring.record("new", {"upiIds": ["y@ybl"]}, 2)
+    assert expiring.session_intel("old")["upiIds"] == [] and expiring.stats()["expired"] >= 1
+
+def test_link_paths_keep_their_case():
+    store = IntelStore()
+    store.record("s1", {"phishingLinks": ["HTTPS://Bit.LY/AbC12"]}, 1)
+    store.record("s2", {"phishingLinks": ["https://bit.ly/abc12"]}, 1)
+    assert set(store.sessions_for("https://BIT.ly/AbC12", "phishingLinks")) == {"s1"}
+    assert set(store.sessions_for("https://bit.ly/AbC12")) == {"s1"}
+
+def test_merge_intel_is_an_ordered_union():
+    base = {"upiIds": ["a@paytm"], "phishingLinks": []}
+    merged = merge_intel(base, {"upiIds": ["b@oksbi", "a@paytm", "b@oksbi"], "phishingLinks": ["https://x.in/"]})
+    assert merged["upiIds"] == ["a@paytm", "b@oksbi"]
+    assert merged["phishingLinks"] == ["https://x.in/"]
+    assert merged["bankAccounts"] == []
+    assert base["upiIds"] == ["a@paytm"]
+
+def test_merge_intel_keeps_one_of_each_entity():
+    merged = merge_intel({"phoneNumbers": ["98400-55555"], "upiIds": ["PortTrustHR@paytm"]},
+                         {"phoneNumbers": ["+91 9840055555"], "upiIds": ["porttrusthr@paytm", "x@ybl"]})
+    assert merged["phoneNumbers"] == ["98400-55555"]
+    assert merged["upiIds"] == ["PortTrustHR@paytm", "x@ybl"]
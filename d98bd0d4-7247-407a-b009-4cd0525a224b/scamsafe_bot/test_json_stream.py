@@ -0,0 +1,65 @@
+from scamsafe_bot.json_stream import JSONStreamParser, parse_json
+from scamsafe_bot.utils import extract_json
+
+FENCED = '''Thought: I have the answer.
+```json
+{
+    "public_response": "Sir which {bank} account?",
+    "extracted_intel": {"upiIds": ["porttrusthr@paytm"], "phishingLinks": []},
+    "turn_count": 3,
+    "engagement_score": 0.87
+}
+```'''
+
+def test_parses_nested_objects_inside_fences():
+    assert parse_json(FENCED) == {
+        "public_response": "Sir which {bank} account?",
+        "extracted_intel": {"upiIds": ["porttrusthr@paytm"], "phishingLinks": []},
+        "turn_count": 3,
+        "engagement_score": 0.87,
+    }
+    # The old non-greedy regex stopped at the first '}'
+    assert extract_json(FENCED)["extracted_intel"]["upiIds"] == ["porttrusthr@paytm"]
+
+def test_same_result_for_any_chunking():
+    for size in (1, 4, 13):
+        parser = JSONStreamParser()
+        for i in range(0, len(FENCED), size):
+            parser.feed(FENCED[i:i + size])
+        assert parser.done and parser.result == parse_json(FENCED)
+
+def test_fields_are_reported_as_they_close():
+    seen = []
+    parser = JSONStreamParser(on_field=lambda path, value: seen.append(path))
+    parser.feed('{"is_scam": false, "risk_factors": ["UPI_ID"')
+    assert seen == [("is_scam",), ("risk_factors", 0)]
+    parser.feed('], "confidence": 0.2}')
+    assert seen[-2:] == [("confidence",), ()]
+
+def test_early_exit_once_wanted_fields_are_seen():
+    parser = JSONStreamParser(wanted=[("is_scam",)])
+    parser.feed('{"is_scam": false, "confidence": ')
+    assert parser.done and parser.found == {("is_scam",): False}
+    parser.feed("this is never looked at {{{")
+    assert parser.found == {("is_scam",): False}
+    assert parse_json('{"confidence": 0.92, "x": 1}', wanted=[("confidence",)]) == {("confidence",): 0.92}
+
+def test_malformed_or_missing_json():
+    assert parse_json("no json here") is None
+    assert parse_json('{"a": 1,, }') is None
+    assert parse_json('{"a": "unterminated') is None
+    assert extract_json("") is None
+
+def test_skips_braces_that_do_not_start_json():
+    text = 'Analysis of {message}: ```json\n{"confidence": 0.9}\n```'
+    assert parse_json(text, wanted=[("confidence",)]) == {("confidence",): 0.9}
+    assert extract_json(text) == {"confidence": 0.9}
+    parser = JSONStreamParser()
+    for ch in text:
+        parser.feed(ch)
+    assert parser.result == {"confidence": 0.9}
+
+def test_mismatched_brackets_are_rejected():
+    assert parse_json('{"a": 1]') is None
+    assert parse_json('{"a": [1}') is None
+    assert parse_json('{"a": [1, {"b": 2}]}') == {"a": [1, {"b": 2}]}
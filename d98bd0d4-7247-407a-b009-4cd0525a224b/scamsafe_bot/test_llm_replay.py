@@ -0,0 +1,56 @@
+import pytest
+from scamsafe_bot.honeypot_crew import DETECTION_TASK_SPEC, ENGAGEMENT_TASK_SPEC, SCAM_DETECTOR_SPEC, VICTIM_PERSONA_SPEC
+from scamsafe_bot.json_stream import parse_json
+from scamsafe_bot.llm_replay import ExchangeStore, LatencyModel, ReplayBackend, ReplayMiss, prompt_key
+
+MESSAGES = [{"role": "system", "content": "You are Deepak"}, {"role": "user", "content": "Send ₹10 to a@paytm"}]
+
+def test_prompt_key_is_stable_and_model_specific():
+    assert prompt_key("m", MESSAGES) == prompt_key("m", [dict(m) for m in MESSAGES])
+    assert prompt_key("m", MESSAGES) != prompt_key("other", MESSAGES)
+    assert prompt_key("m", "hi") == prompt_key("m", [{"role": "user", "content": "hi"}])
+
+def test_record_then_replay_from_disk(tmp_path):
+    path = str(tmp_path / "llm.jsonl.gz")
+    recorder = ReplayBackend("record", ExchangeStore(path), LatencyModel("none"))
+    calls = []
+    assert recorder.complete("m", MESSAGES, lambda msgs: calls.append(msgs) or "Final Answer: ok") == "Final Answer: ok"
+    recorder.complete("m", "second", lambda msgs: "two")
+    assert len(calls) == 1
+
+    slept = []
+    replayer = ReplayBackend("replay", ExchangeStore(path), LatencyModel("fixed:250"), sleep=slept.append)
+    assert replayer.complete("m", MESSAGES) == "Final Answer: ok"
+    assert replayer.complete("m", "second") == "two"
+    assert slept == [0.25, 0.25]
+    assert replayer.stats()["hits"] == 2
+
+def test_replay_miss_policies(tmp_path):
+    store = ExchangeStore(str(tmp_path / "empty.jsonl.gz"))
+    with pytest.raises(ReplayMiss):
+        ReplayBackend("replay", store, LatencyModel("none")).complete("m", MESSAGES)
+    synthetic = ReplayBackend("replay", store, LatencyModel("none"), on_miss="synthetic")
+    first = synthetic.complete("m", MESSAGES)
+    assert "Final Answer:" in first
+    assert synthetic.complete("m", MESSAGES) == first
+    assert synthetic.stats()["misses"] == 2
+
+def test_synthetic_reply_matches_the_prompts_task(tmp_path):
+    synthetic = ReplayBackend("replay", ExchangeStore(str(tmp_path / "empty.jsonl.gz")), LatencyModel("none"),
+                              on_miss="synthetic")
+    detector_prompt = [{"role": "system", "content": f"You are {SCAM_DETECTOR_SPEC['role']}. {SCAM_DETECTOR_SPEC['goal']}"},
+                       {"role": "user", "content": DETECTION_TASK_SPEC["description"]}]
+    persona_prompt = [{"role": "system", "content": f"You are {VICTIM_PERSONA_SPEC['role']}."},
+                      {"role": "user", "content": ENGAGEMENT_TASK_SPEC["description"] + ENGAGEMENT_TASK_SPEC["expected_output"]}]
+    detection = synthetic.complete("m", detector_prompt).split("Final Answer: ", 1)[1]
+    engagement = synthetic.complete("m", persona_prompt).split("Final Answer: ", 1)[1]
+    assert parse_json(detection, wanted=[("confidence",)]) == {("confidence",): 0.92}
+    assert ("public_response",) in parse_json(engagement, wanted=[("public_response",)])
+
+def test_latency_models_are_seeded():
+    a, b = LatencyModel("lognormal:7.0,0.5"), LatencyModel("lognormal:7.0,0.5")
+    assert [a.sample_ms() for _ in range(5)] == [b.sample_ms() for _ in range(5)]
+    assert LatencyModel("recorded").sample_ms(1234.5) == 1234.5
+    assert 500 <= LatencyModel("uniform:500,1500").sample_ms() <= 1500
+    with pytest.raises(ValueError):
+        LatencyModel("uniform:500")
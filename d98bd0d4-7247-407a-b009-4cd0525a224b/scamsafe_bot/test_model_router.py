@@ -0,0 +1,35 @@
+from scamsafe_bot.model_router import PersonaModelRouter, turn_phase
+
+NO_INTEL = {"upiIds": [], "bankAccounts": [], "phishingLinks": [], "phoneNumbers": []}
+PAID_INTEL = {"upiIds": ["porttrusthr@paytm"], "bankAccounts": [], "phishingLinks": [], "phoneNumbers": []}
+
+def test_turn_phases():
+    assert [turn_phase(t) for t in (1, 3, 4, 12, 13, 18, 19)] == [
+        "confusion", "confusion", "extraction", "extraction", "final", "final", "overtime"]
+
+def test_phase_and_yield_pick_the_tier():
+    router = PersonaModelRouter(default_budget_ms=60000)
+    assert router.choose(1, NO_INTEL)[0] == "fast"
+    assert router.choose(5, NO_INTEL)[0] == "full"
+    assert router.choose(14, PAID_INTEL)[0] == "fast"
+    assert router.choose(14, NO_INTEL)[0] == "full"   # still no payment details
+    assert router.choose(20, NO_INTEL)[0] == "full"   # nothing extracted yet
+    assert router.choose(20, PAID_INTEL)[0] == "fast"
+    assert router.stats()["turns"] == {"fast": 3, "full": 3}
+
+def test_tight_budget_downgrades():
+    router = PersonaModelRouter(default_budget_ms=60000)
+    tier, reason = router.choose(5, NO_INTEL, budget_ms=3000)
+    assert tier == "fast"
+    assert "over budget" in reason
+    # Time already spent this request counts against the budget
+    assert router.choose(5, NO_INTEL, budget_ms=10000, elapsed_ms=5000)[0] == "fast"
+    assert router.stats()["budget_downgrades"] == 2
+
+def test_observed_latency_moves_the_estimate():
+    router = PersonaModelRouter(default_budget_ms=5000, alpha=0.5)
+    assert router.choose(5, NO_INTEL)[0] == "fast"
+    for _ in range(4):
+        router.observe("full", 2000)
+    assert router.stats()["latency_ms"]["full"] < 5000
+    assert router.choose(5, NO_INTEL)[0] == "full"
@@ -0,0 +1,50 @@
+from scamsafe_bot import persona
+from scamsafe_bot.persona import PersonaEngine, TemplateResponder, message_slots, slots_from_intel
+
+def test_intent_follows_pack_priority():
+    responder = TemplateResponder()
+    assert responder.intent("Share the OTP to transfer ₹500") == "credential_request"
+    assert responder.intent("Transfer ₹500 now") == "payment_request"
+    assert responder.intent("Hello, good morning") is None
+
+def test_slots_are_filled_from_message_and_intel():
+    responder = TemplateResponder()
+    used = []
+    slots = slots_from_intel({"upiIds": ["old@ybl", "porttrusthr@paytm"], "phishingLinks": []})
+    assert slots == {"upi": "porttrusthr@paytm"}
+    first = responder.reply("Pay ₹12,500 processing fee to your SBI account", slots, used)
+    assert first["intent"] == "payment_request"
+    assert "₹12,500" in first["reply"] and "SBI" in first["reply"]
+    second = responder.reply("Pay the processing fee", slots, used)
+    assert "porttrusthr@paytm" in second["reply"]
+    assert used == ["payment_request/0", "payment_request/1"]
+
+def test_falls_back_when_a_novel_answer_is_needed():
+    responder = TemplateResponder(max_words=10)
+    assert responder.reply("What is your mother's maiden name?", {}, []) is None
+    assert responder.reply("urgent " + "please listen carefully " * 5, {}, []) is None
+    used = []
+    for _ in range(3):
+        assert responder.reply("Account blocked, urgent", {}, used) is not None
+    assert responder.reply("Account blocked, urgent", {}, used) is None  # all used
+    assert responder.stats()["fallbacks"] == {"no_intent": 1, "too_long": 1, "exhausted": 1}
+
+def test_message_slots():
+    assert message_slots("Send Rs. 2,000 to HDFC") == {"bank": "HDFC", "amount": "2,000"}
+    assert message_slots("no money words") == {}
+
+def test_persona_engine_serves_templates_without_latency(monkeypatch):
+    monkeypatch.setattr(persona, "simulate_latency", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+    engine = PersonaEngine()
+    result = engine.engage("Click this link: bit.ly/sbi-kyc")
+    assert result["message"].startswith("Sir bit.ly/sbi-kyc not opening")
+    assert result["extracted_intel"] == {"phishing_urls": ["bit.ly/sbi-kyc"]}
+
+def test_stall_replies_rotate_through_unused_lines():
+    responder = TemplateResponder()
+    used = ["payment_request/0"]
+    replies = [responder.stall_reply(used) for _ in range(5)]
+    assert len(set(replies[:4])) == 4
+    assert replies[4] == replies[0]
+    assert used[1:] == ["fallback/0", "fallback/1", "fallback/2", "fallback/3", "fallback/0"]
+    assert responder.stats()["stalls"] == 5
@@ -0,0 +1,21 @@
+from scamsafe_bot.risk import RiskAccumulator
+
+def test_accumulates_only_new_message():
+    risk = RiskAccumulator(decay=0.5)
+    risk.update("urgent")
+    verdict = risk.update("send to porttrusthr@paytm")
+    assert verdict["turns"] == 2
+    assert verdict["risk_score"] == round(0.3 * 0.5 + 0.4, 3)
+    assert verdict["category_counts"] == {"critical": 1, "payment": 1, "upi": 1}
+
+def test_peak_keeps_session_flagged_after_decay():
+    risk = RiskAccumulator(decay=0.1)
+    risk.update("Urgent! KYC blocked, verify at bit.ly/x")
+    for _ in range(5):
+        verdict = risk.update("ok sir")
+    assert verdict["risk_score"] < 0.01
+    assert verdict["is_scam"] is True
+
+def test_benign_conversation():
+    verdict = RiskAccumulator().update_many(["hi", "lets meet for coffee"])
+    assert verdict == {"is_scam": False, "confidence": 0.1, "risk_score": 0.0, "turns": 2, "category_counts": {}}
@@ -0,0 +1,71 @@
+import gc
+import json
+import os
+import pickle
+from scamsafe_bot import detector
+from scamsafe_bot.detector import ScamDetector
+from scamsafe_bot.rule_packs import COMPILED_SUFFIX, RulePackManager, load_pack
+
+def write_pack(path, version, terms):
+    with open(path, "w") as f:
+        json.dump({"name": "test", "version": version,
+                   "categories": [{"name": "critical", "weight": 0.4, "terms": terms}]}, f)
+    # mtime granularity on some filesystems is coarse; force a visible change
+    os.utime(path, ns=(0, hash(version) & 0xFFFFFFFF))
+
+def test_compiled_form_is_reused(tmp_path):
+    path = str(tmp_path / "test.json")
+    write_pack(path, "1", ["urgent"])
+    first = load_pack(path)
+    assert os.path.exists(path + COMPILED_SUFFIX)
+    second = load_pack(path)
+    assert second.digest == first.digest and second.version == "1"
+
+def test_swap_keeps_in_flight_pack(tmp_path, monkeypatch):
+    monkeypatch.setattr(detector, "simulate_latency", lambda *a, **k: None)
+    path = str(tmp_path / "test.json")
+    write_pack(path, "1", ["urgent"])
+    rules = RulePackManager(path)
+    scam_detector = ScamDetector(rules=rules)
+    assert scam_detector.assess_threat("kyc now")["is_scam"] is False
+
+    in_flight = rules.current
+    write_pack(path, "2", ["urgent", "kyc"])
+    assert rules.reload() is True
+    assert in_flight.version == "1" and rules.current.version == "2"
+    assert scam_detector.assess_threat("kyc now")["is_scam"] is True  # cache dropped on swap
+
+def test_bad_edit_keeps_serving_old_pack(tmp_path):
+    path = str(tmp_path / "test.json")
+    write_pack(path, "1", ["urgent"])
+    rules = RulePackManager(path)
+    with open(path, "w") as f:
+        f.write("{not json")
+    os.utime(path, ns=(0, 12345))
+    assert rules.reload() is False
+    assert rules.current.version == "1" and rules.reload_errors == 1
+
+def test_swap_listeners_do_not_keep_detectors_alive(tmp_path):
+    path = str(tmp_path / "test.json")
+    write_pack(path, "1", ["urgent"])
+    rules = RulePackManager(path)
+    for _ in range(5):
+        ScamDetector(rules=rules)
+    kept = ScamDetector(rules=rules)
+    kept.cache.put("kyc now", {"is_scam": False})
+    gc.collect()
+    write_pack(path, "2", ["urgent", "kyc"])
+    assert rules.reload() is True
+    assert len(rules._listeners) == 1 and kept.cache.get("kyc now") is None
+
+def test_stale_compiled_form_is_rebuilt(tmp_path):
+    path = str(tmp_path / "test.json")
+    write_pack(path, "1", ["urgent"])
+    # A pickle referring to a module that no longer exists
+    with open(path + COMPILED_SUFFIX, "wb") as f:
+        f.write(b"cscamsafe_gone\nPack\n.")
+    assert load_pack(path).version == "1"
+    with open(path + COMPILED_SUFFIX, "wb") as f:
+        pickle.dump((1, {"digest": "x"}), f)   # old format, wrong shape
+    assert load_pack(path).version == "1"
+    assert load_pack(path).digest == load_pack(path).digest
@@ -0,0 +1,120 @@
+import multiprocessing
+import threading
+import pytest
+from scamsafe_bot.risk import RiskAccumulator
+from scamsafe_bot.session_backend import SessionBusy, SQLiteSessionStore
+
+def _new_state(session_id):
+    return {"session_id": session_id, "turns": 0, "extracted_intel": {"upiIds": []}}
+
+def test_state_persists_across_store_instances(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SQLiteSessionStore(_new_state, path)
+    worker_b = SQLiteSessionStore(_new_state, path)
+    with worker_a.session("s1") as state:
+        state["turns"] += 1
+        state["extracted_intel"]["upiIds"].append("porttrusthr@paytm")
+    with worker_b.session("s1") as state:
+        assert state["extracted_intel"]["upiIds"] == ["porttrusthr@paytm"]
+        state["turns"] += 1
+    # worker_a's cached copy is stale and gets reloaded
+    with worker_a.session("s1") as state:
+        assert state["turns"] == 2
+    assert worker_b.get("s1")["turns"] == 2
+    assert worker_a.stats()["cache_hit_rate"] == 0.0
+
+def test_unchanged_sessions_are_served_from_the_cache(tmp_path):
+    store = SQLiteSessionStore(_new_state, str(tmp_path / "sessions.db"))
+    for _ in range(3):
+        with store.session("s1") as state:
+            state["turns"] += 1
+    stats = store.stats()
+    assert stats["created"] == 1 and stats["cache_hit_rate"] == 1.0 and stats["sessions"] == 1
+
+def test_lease_serializes_turns_of_one_session(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    holder = SQLiteSessionStore(_new_state, path)
+    other = SQLiteSessionStore(_new_state, path, lease_wait=0.1)
+    with holder.session("s1"):
+        with pytest.raises(SessionBusy):
+            with other.session("s1"):
+                pass
+        with other.session("s2") as state:   # other sessions are unaffected
+            state["turns"] += 1
+    with other.session("s1") as state:
+        assert state["turns"] == 0
+    assert other.stats()["lease_waits"] == 1
+
+def test_concurrent_turns_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    stores = [SQLiteSessionStore(_new_state, path) for _ in range(4)]
+
+    def run(store):
+        for _ in range(25):
+            with store.session("s1") as state:
+                state["turns"] += 1
+
+    threads = [threading.Thread(target=run, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert stores[0].get("s1")["turns"] == 100
+
+def _process_turns(path, turns):
+    store = SQLiteSessionStore(_new_state, path)
+    for _ in range(turns):
+        with store.session("s1") as state:
+            state["turns"] += 1
+
+def test_turn_counts_are_consistent_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    processes = [multiprocessing.Process(target=_process_turns, args=(path, 20)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+    assert SQLiteSessionStore(_new_state, path).get("s1")["turns"] == 60
+
+def test_expired_sessions_start_over(tmp_path):
+    store = SQLiteSessionStore(_new_state, str(tmp_path / "sessions.db"), ttl_seconds=0)
+    with store.session("s1") as state:
+        state["turns"] = 5
+    with store.session("s1") as state:
+        assert state["turns"] == 0
+    assert store.sweep() == 1 and len(store) == 0
+
+def test_custom_encoding_round_trips_objects(tmp_path):
+    store = SQLiteSessionStore(lambda sid: RiskAccumulator(), str(tmp_path / "sessions.db"),
+                               encode=RiskAccumulator.to_state, decode=RiskAccumulator.from_state)
+    with store.session("s1") as risk:
+        risk.update("Your KYC is pending, account blocked. Send OTP to porttrusthr@paytm urgently")
+    restored = store.get("s1")
+    assert restored.verdict() == risk.verdict()
+
+def test_long_turns_keep_their_lease(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    holder = SQLiteSessionStore(_new_state, path, lease_seconds=0.3)
+    other = SQLiteSessionStore(_new_state, path, lease_wait=0.6)
+    with holder.session("s1") as state:
+        state["turns"] += 1
+        with pytest.raises(SessionBusy):
+            with other.session("s1"):
+                pass
+    assert other.get("s1")["turns"] == 1
+
+def test_turn_whose_lease_was_taken_over_is_not_saved(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    slow = SQLiteSessionStore(_new_state, path)
+    fast = SQLiteSessionStore(_new_state, path)
+    with pytest.raises(SessionBusy):
+        with slow.session("s1") as state:
+            state["turns"] = 99
+            # The lease lapses (say the worker stalled) and another worker takes over
+            slow._db().execute("UPDATE leases SET expires = 0")
+            with fast.session("s1") as other_state:
+                other_state["turns"] += 1
+    assert fast.get("s1")["turns"] == 1
+    assert slow.stats()["conflicts"] == 1
+    with slow.session("s1") as state:   # the stale copy is not served from the cache
+        assert state["turns"] == 1
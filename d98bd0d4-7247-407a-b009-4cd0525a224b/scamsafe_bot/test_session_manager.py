@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import pytest
+from scamsafe_bot.session_manager import SessionLog, SessionManager
+
+def test_interactions_are_appended_one_line_each(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=0)
+    session = SessionManager(path, session_id="s1", log=log)
+    session.log_interaction("scammer", "Send ₹10 to porttrusthr@paytm")
+    session.log_interaction("deepak", "Which account sir?", {"tier": "fast"})
+    with open(str(tmp_path / "log.000001.jsonl"), encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [r["type"] for r in lines] == ["start", "interaction", "interaction"]
+    assert lines[2]["metadata"] == {"tier": "fast"}
+    # Synchronous mode commits every record
+    assert log.stats()["commits"] == 3
+
+def test_history_is_rebuilt_by_replay(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=60, sync_every=1000)
+    first = SessionManager(path, session_id="s1", log=log)
+    other = SessionManager(path, session_id="s2", log=log)
+    first.log_interaction("scammer", "KYC pending")
+    other.log_interaction("scammer", "unrelated")
+    first.log_interaction("deepak", "KYC again aa sir?")
+    # Not committed yet, but replay still sees it
+    assert log.stats()["commits"] == 0
+    resumed = SessionManager(path, session_id="s1", log=log)
+    assert resumed.get_history() == first.get_history()
+    assert resumed.session_data["start_time"] == first.session_data["start_time"]
+    log.close()
+    assert log.stats()["commits"] == 1
+
+def test_group_commit_batches_fsyncs(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=60, sync_every=10)
+    session = SessionManager(path, session_id="s1", log=log)
+    for i in range(49):
+        session.log_interaction("scammer", f"message {i}")
+    log.sync()
+    stats = log.stats()
+    assert stats["appended"] == 50 and stats["pending"] == 0
+    assert stats["commits"] <= 6
+    log.close()
+
+def test_appends_proceed_while_a_commit_syncs(tmp_path, monkeypatch):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=60, sync_every=1000)
+    session = SessionManager(path, session_id="s1", log=log)
+    syncing, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        syncing.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    committer = threading.Thread(target=log.sync)
+    committer.start()
+    assert syncing.wait(5)
+    # The disk is still busy with the commit; the append must not wait for it
+    appender = threading.Thread(target=session.log_interaction, args=("scammer", "are you there?"))
+    appender.start()
+    appender.join(2)
+    stuck = appender.is_alive()
+    release.set()
+    committer.join()
+    appender.join()
+    assert not stuck
+    assert log.stats()["pending"] == 1
+    log.sync()
+    assert log.stats()["pending"] == 0
+    log.close()
+
+def test_torn_tail_is_dropped_on_recovery(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=0)
+    session = SessionManager(path, session_id="s1", log=log)
+    session.log_interaction("scammer", "first")
+    log.close()
+    with open(str(tmp_path / "log.000001.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"session_id": "s1", "type": "interac')   # crash mid-write
+    recovered = SessionLog(path, sync_interval=0)
+    assert recovered.truncated > 0
+    resumed = SessionManager(path, session_id="s1", log=recovered)
+    resumed.log_interaction("scammer", "second")
+    assert [i["content"] for i in SessionManager(path, session_id="s1", log=recovered).get_history()] == ["first", "second"]
+
+def test_indented_session_dump_is_migrated_not_truncated(tmp_path):
+    path = str(tmp_path / "session_logs.json")
+    dump = {
+        "session_id": "1770223438",
+        "start_time": "2026-02-04T22:13:58.442407",
+        "interactions": [{"timestamp": "2026-02-04T22:15:35", "role": "scammer",
+                          "content": "GPay to deepakhelps@paytm", "metadata": {}}],
+        "status": "active"
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dump, f, indent=2)
+    log = SessionLog(path, sync_interval=0)
+    assert log.truncated == 0
+    history = SessionManager(path, session_id="1770223438", log=log).get_history()
+    assert history == dump["interactions"]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == dump   # original left in place
+
+def test_unparseable_log_is_refused(tmp_path):
+    path = str(tmp_path / "log.000001.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"session_id": "s1", "type": "start", "start_time": "t"}\nnot json\n{"session_id": "s1", "type": "end"}\n')
+    with pytest.raises(ValueError):
+        SessionLog(str(tmp_path / "log.jsonl"), sync_interval=0)
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+def test_segments_rotate_and_sessions_are_read_by_offset(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=0, segment_bytes=400)
+    sessions = [SessionManager(path, session_id=f"s{i}", log=log) for i in range(3)]
+    for turn in range(6):
+        for session in sessions:
+            session.log_interaction("scammer", f"turn {turn} from {session.session_data['session_id']}")
+    assert log.stats()["rotations"] >= 3
+    assert sorted(p.name for p in tmp_path.iterdir())[:2] == ["log.000001.jsonl", "log.000001.jsonl.idx"]
+    assert len({seq for seq, _ in log.index["s1"]}) > 1
+    assert [i["content"] for i in log.session_records("s1")[1:]] == [f"turn {t} from s1" for t in range(6)]
+    log.close()
+    # A fresh process loads the sidecar indexes instead of rescanning
+    reopened = SessionLog(path, sync_interval=0, segment_bytes=400)
+    assert reopened.index == log.index
+    assert SessionManager(path, session_id="s2", log=reopened).get_history() == sessions[2].get_history()
+
+def test_compaction_makes_ended_sessions_contiguous(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=0, segment_bytes=300)
+    done, ongoing = SessionManager(path, session_id="done", log=log), SessionManager(path, session_id="ongoing", log=log)
+    for turn in range(5):
+        done.log_interaction("scammer", f"done {turn}")
+        ongoing.log_interaction("scammer", f"ongoing {turn}")
+    done.end()
+    for turn in range(5, 8):
+        ongoing.log_interaction("scammer", f"ongoing {turn}")
+    before = {sid: log.session_records(sid) for sid in ("done", "ongoing")}
+    segments_before = log.seq
+
+    assert log.compact() == 1
+    entries = log.index["done"]
+    assert len({seq for seq, _ in entries}) == 1
+    offsets = [offset for _, offset in entries]
+    assert offsets == sorted(offsets)
+    assert {sid: log.session_records(sid) for sid in ("done", "ongoing")} == before
+    files = sorted(p.name for p in tmp_path.iterdir() if p.name.endswith(".jsonl"))
+    assert len(files) == 2 and files[-1] == f"log.{segments_before:06d}.jsonl"
+    log.close()
+
+    reopened = SessionLog(path, sync_interval=0)
+    resumed = SessionManager(path, session_id="done", log=reopened)
+    assert resumed.session_data["status"] == "closed"
+    assert [i["content"] for i in resumed.get_history()] == [f"done {t}" for t in range(5)]
+    assert [r.get("content") for r in reopened.records("ongoing")][-1] == "ongoing 7"
+
+def test_compaction_only_rewrites_newly_sealed_segments(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = SessionLog(path, sync_interval=0, segment_bytes=300)
+    first = SessionManager(path, session_id="first", log=log)
+    for turn in range(5):
+        first.log_interaction("scammer", f"first {turn}")
+    first.end()
+    SessionManager(path, session_id="filler", log=log).log_interaction("scammer", "x" * 300)
+    log.compact()
+    compacted = log.compacted_through
+    with open(str(tmp_path / f"log.{compacted:06d}.jsonl"), "rb") as f:
+        first_pass = f.read()
+
+    second = SessionManager(path, session_id="second", log=log)
+    for turn in range(5):
+        second.log_interaction("scammer", f"second {turn}")
+    second.end()
+    SessionManager(path, session_id="filler2", log=log).log_interaction("scammer", "x" * 300)
+    assert log.compact() == 1
+    with open(str(tmp_path / f"log.{compacted:06d}.jsonl"), "rb") as f:
+        assert f.read() == first_pass
+    assert log.compacted_through > compacted
+    assert len({seq for seq, _ in log.index["second"]}) == 1
+    assert [i["content"] for i in log.session_records("first")[1:-1]] == [f"first {t}" for t in range(5)]
+    log.close()
+    assert SessionLog(path, sync_interval=0).compacted_through == log.compacted_through
@@ -0,0 +1,99 @@
+import threading
+import time
+from scamsafe_bot import session_store as session_store_module
+from scamsafe_bot.session_store import SessionStore
+
+def _state(session_id):
+    return {"session_id": session_id, "turns": 0}
+
+def test_sessions_are_independent():
+    store = SessionStore(_state)
+    with store.session("a") as state:
+        state["turns"] += 1
+    with store.session("b") as state:
+        state["turns"] += 1
+    with store.session("a") as state:
+        state["turns"] += 1
+    assert store.get("a")["turns"] == 2
+    assert store.get("b")["turns"] == 1
+    assert store.get("missing") is None
+
+def test_concurrent_turns_are_not_lost():
+    store = SessionStore(_state)
+
+    def talk(sid):
+        for _ in range(200):
+            with store.session(sid) as state:
+                state["turns"] += 1
+
+    threads = [threading.Thread(target=talk, args=(f"s{i % 4}",)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [store.get(f"s{i}")["turns"] for i in range(4)] == [800] * 4
+
+def test_bounded_size_evicts_least_recent():
+    store = SessionStore(_state, max_sessions=2, shards=1)
+    for sid in ("a", "b"):
+        with store.session(sid):
+            pass
+    with store.session("a"):
+        pass
+    with store.session("c"):
+        pass
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evictions"] == 1
+
+def test_session_in_use_is_not_evicted():
+    store = SessionStore(_state, max_sessions=1, shards=1)
+    with store.session("busy") as state:
+        state["turns"] = 5
+        with store.session("other"):
+            pass
+        assert len(store) == 2
+    assert store.get("busy")["turns"] == 5
+
+def test_session_waiting_for_its_lock_is_not_evicted():
+    store = SessionStore(_state, max_sessions=1, shards=1)
+    entry = store._pin("waiting")   # looked up, lock not taken yet
+    for sid in ("other", "third"):
+        with store.session(sid):
+            pass
+    with entry.lock:
+        entry.state["turns"] = 1
+    store._unpin("waiting", entry)
+    assert store.get("waiting")["turns"] == 1
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store_module.time, "monotonic", lambda: now[0])
+    store = SessionStore(_state, ttl_seconds=60)
+    with store.session("a") as state:
+        state["turns"] = 3
+    with store.session("b"):
+        pass
+    now[0] += 30
+    with store.session("b"):
+        pass
+    now[0] += 45
+    assert store.sweep() == 1
+    assert store.get("a") is None and store.get("b") is not None
+    now[0] += 61
+    with store.session("b") as state:
+        assert state["turns"] == 0  # expired on access, started fresh
+    assert store.stats()["expirations"] == 2
+
+def test_sweeper_drops_idle_sessions():
+    store = SessionStore(_state, ttl_seconds=0, sweep_interval=0.01)
+    with store.session("a"):
+        pass
+    store.start_sweeper()
+    try:
+        deadline = time.monotonic() + 5
+        while len(store) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop_sweeper()
+    assert len(store) == 0 and store.stats()["sweeps"] >= 1
@@ -0,0 +1,75 @@
+import sys
+import threading
+import time
+from scamsafe_bot.session_table import SessionRecord, SessionTable
+
+class Turns(SessionRecord):
+    __slots__ = ("turns",)
+
+    def __init__(self):
+        self.turns = 0
+
+def test_records_are_created_once_and_reused():
+    table = SessionTable(Turns, max_sessions=10, ttl_seconds=60)
+    record, created = table.get_or_create("a")
+    record.turns += 1
+    again, created_again = table.get_or_create("a")
+    assert created and not created_again
+    assert again is record and again.turns == 1
+    assert not hasattr(record, "__dict__")
+    assert table.stats()["record_bytes"] < sys.getsizeof({"turns": 0, "intel": {}})
+
+def test_least_recently_used_session_is_evicted():
+    table = SessionTable(Turns, max_sessions=2, ttl_seconds=60)
+    table.get_or_create("a")
+    table.get_or_create("b")
+    table.get_or_create("a")
+    table.get_or_create("c")
+    assert "b" not in table and "a" in table and "c" in table
+    assert table.stats()["evicted"] == 1
+
+def test_idle_sessions_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("scamsafe_bot.session_table.time.monotonic", lambda: clock[0])
+    table = SessionTable(Turns, max_sessions=10, ttl_seconds=60)
+    table.get_or_create("old")[0].turns = 5
+    clock[0] += 50
+    table.get_or_create("recent")
+    clock[0] += 20
+    assert table.sweep() == 1
+    assert "old" not in table and "recent" in table
+    # Expiry also applies on access, sweeper or not
+    clock[0] += 61
+    record, created = table.get_or_create("recent")
+    assert created and record.turns == 0
+    assert table.stats()["expired"] == 2
+
+def test_background_sweeper_runs():
+    table = SessionTable(Turns, max_sessions=10, ttl_seconds=0, sweep_interval=0.01)
+    table.get_or_create("a")
+    table.start_sweeper()
+    try:
+        for _ in range(200):
+            if not len(table):
+                break
+            time.sleep(0.01)
+    finally:
+        table.stop_sweeper()
+    assert len(table) == 0 and table.stats()["sweeps"] >= 1
+
+def test_session_blocks_do_not_interleave():
+    table = SessionTable(Turns, max_sessions=10, ttl_seconds=60)
+
+    def run():
+        for _ in range(200):
+            with table.session("a") as record:
+                turns = record.turns
+                time.sleep(0)
+                record.turns = turns + 1
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert table.get("a").turns == 800
@@ -0,0 +1,43 @@
+import threading
+from scamsafe_bot.streaming import TurnStream, forward_chunk, route_stream, sse_event
+
+OUTPUT = ('```json\n{"extracted_intel": {"upiIds": ["a@paytm"]}, '
+          '"public_response": "Sir \\"EB\\" office aa?\\nWait \\u20b9500 \\ud83d\\ude4f", "turn_count": 3}\n```')
+
+def _streamed_text(chunks):
+    sent = []
+    turn = TurnStream(lambda event, data: sent.append(data["text"]))
+    for chunk in chunks:
+        turn.llm_chunk(chunk)
+    return "".join(sent)
+
+def test_decodes_field_across_any_chunking():
+    expected = 'Sir "EB" office aa?\nWait ₹500 🙏'
+    for size in (1, 2, 3, 7, len(OUTPUT)):
+        assert _streamed_text(OUTPUT[i:i + size] for i in range(0, len(OUTPUT), size)) == expected
+
+def test_ignores_other_fields_and_non_string_values():
+    assert _streamed_text(['{"public_response_draft": "no", "turn": 3, "public_response": "yes"}']) == "yes"
+    assert _streamed_text(['{"public_response": null}']) == ""
+
+def test_chunks_are_routed_by_llm_from_any_thread():
+    sent = []
+    persona_llm, other_llm = object(), object()
+    turn = TurnStream(lambda event, data: sent.append((event, data)))
+
+    def emit():
+        # crewai may deliver events on a thread other than the kickoff's
+        forward_chunk(persona_llm, '{"public_response": "Hel')
+        forward_chunk(other_llm, '{"public_response": "not this turn"}')
+        forward_chunk(persona_llm, 'lo sir"}')
+
+    with route_stream([persona_llm], turn):
+        emitter = threading.Thread(target=emit)
+        emitter.start()
+        emitter.join()
+    forward_chunk(persona_llm, '{"public_response": "after the turn"}')
+    assert sent == [("token", {"text": "Hel"}), ("token", {"text": "lo sir"})]
+    assert turn.tokens == 2
+
+def test_sse_event_format():
+    assert sse_event("token", {"text": "வணக்கம்"}) == 'event: token\ndata: {"text": "வணக்கம்"}\n\n'
@@ -0,0 +1,61 @@
+import threading
+import time
+from scamsafe_bot.turn_scheduler import DeadlineMissed, TurnScheduler, session_value
+
+def test_session_value_grows_with_intel_and_confidence():
+    nothing = {"upiIds": [], "bankAccounts": [], "phishingLinks": [], "phoneNumbers": []}
+    paid = {**nothing, "upiIds": ["porttrusthr@paytm"], "bankAccounts": ["9876543210123456"]}
+    assert session_value(nothing, 0.0) == 0.0
+    assert session_value(paid, 0.9) > session_value(nothing, 0.9) > session_value(nothing, 0.3)
+
+def _queue_behind_busy_slot(scheduler, turns, hold=0.0):
+    """
+    Queues `turns` [(name, value, deadline)] while the only slot is held,
+    keeps holding it `hold` seconds longer, then returns the admission order.
+    """
+    order = []
+
+    def turn(name, value, deadline):
+        try:
+            with scheduler.slot(value, deadline):
+                order.append(name)
+        except DeadlineMissed:
+            order.append(f"{name}:missed")
+
+    threads = [threading.Thread(target=turn, args=turn_args) for turn_args in turns]
+    with scheduler.slot(0, time.monotonic() + 60):
+        for queued, thread in enumerate(threads, 1):
+            thread.start()
+            while scheduler.stats()["queued"] < queued:
+                time.sleep(0.001)
+        time.sleep(hold)
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+def test_valuable_sessions_go_first_under_load():
+    scheduler = TurnScheduler(slots=1, value_priority_ms=1000, min_run_ms=0)
+    now = time.monotonic()
+    order = _queue_behind_busy_slot(scheduler, [
+        ("new", 0.5, now + 10),
+        ("about_to_pay", 2.7, now + 10),
+        ("urgent", 0.5, now + 8),
+    ])
+    assert order == ["about_to_pay", "urgent", "new"]
+    stats = scheduler.stats()
+    assert stats["admitted"] == 4 and stats["queued"] == 3 and stats["running"] == 0
+
+def test_turn_past_its_deadline_gets_deadline_missed():
+    scheduler = TurnScheduler(slots=1, value_priority_ms=0, min_run_ms=50)
+    now = time.monotonic()
+    order = _queue_behind_busy_slot(scheduler, [("late", 1.0, now + 0.1)], hold=0.2)
+    assert order == ["late:missed"]
+    assert scheduler.stats()["deadline_missed"] == 1
+    assert scheduler.stats()["waiting"] == 0
+
+def test_free_slot_is_taken_without_queueing():
+    scheduler = TurnScheduler(slots=2, min_run_ms=0)
+    with scheduler.slot(0, time.monotonic() + 1):
+        with scheduler.slot(0, time.monotonic() + 1):
+            assert scheduler.stats()["running"] == 2
+    assert scheduler.stats()["queued"] == 0
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scamsafe_bot.url_canon import ShortLinkResolver, canonicalize_url
+
+def test_canonical_forms_collapse():
+    assert canonicalize_url("bit.ly/x") == "https://bit.ly/x"
+    assert canonicalize_url("https://BIT.LY/x") == "https://bit.ly/x"
+    assert canonicalize_url("bit.ly/x?utm_source=sms&utm_medium=") == "https://bit.ly/x"
+    assert canonicalize_url("https://bit.ly:443/x#top") == "https://bit.ly/x"
+
+def test_canonical_keeps_path_case_and_real_params():
+    assert canonicalize_url("bit.ly/AbC") == "https://bit.ly/AbC"
+    assert canonicalize_url("http://EB-Refund.co.in/pay?id=7&fbclid=zz&amt=1") == "http://eb-refund.co.in/pay?id=7&amt=1"
+    assert canonicalize_url("www.example.com") == "https://www.example.com/"
+
+def test_canonical_keeps_kept_params_as_written():
+    assert canonicalize_url("bit.ly/x?token&utm_source=sms") == "https://bit.ly/x?token"
+    assert canonicalize_url("pay.in/?to=a%40upi&note=hi+there&gclid=1") == "https://pay.in/?to=a%40upi&note=hi+there"
+    assert canonicalize_url("pay.in/?utm%5Fsource=sms&id=7") == "https://pay.in/?id=7"
+
+def test_canonical_punycodes_unicode_hosts():
+    assert canonicalize_url("https://sbі.co.in/login") == "https://xn--sb-ioc.co.in/login"  # Cyrillic і
+
+class _Shortener(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_HEAD(self):
+        type(self).hits += 1
+        port = self.server.server_address[1]
+        if self.path == "/abc":
+            self.send_response(301)
+            self.send_header("Location", f"http://localhost:{port}/landing?utm_source=sms")
+        elif self.path == "/hop":
+            self.send_response(302)
+            self.send_header("Location", "/abc")
+        else:
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def shortener():
+    _Shortener.hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Shortener)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+def test_resolves_redirect_chain_once(shortener):
+    resolver = ShortLinkResolver(shortener_hosts={"127.0.0.1"})
+    short = f"http://127.0.0.1:{shortener}/hop"
+
+    async def run():
+        return await asyncio.gather(*[resolver.resolve(short) for _ in range(20)])
+
+    results = asyncio.run(run())
+    # 127.0.0.1 -> 127.0.0.1 -> localhost (not a shortener, so not fetched)
+    assert set(results) == {f"http://localhost:{shortener}/landing"}
+    assert _Shortener.hits == 2
+    assert asyncio.run(resolver.resolve(short + "?utm_campaign=x")) == results[0]
+    assert _Shortener.hits == 2
+    assert resolver.stats()["cache"]["hits"] == 1
+    resolver.stop()
+
+def test_unreachable_link_is_cached_as_none():
+    resolver = ShortLinkResolver(shortener_hosts={"127.0.0.1"}, timeout=1.0)
+    assert asyncio.run(resolver.resolve("http://127.0.0.1:1/x")) is None
+    assert asyncio.run(resolver.resolve("http://127.0.0.1:1/x")) is None
+    assert resolver.stats()["failures"] == 1
+    resolver.stop()
+
+def test_failures_are_retried_after_the_negative_ttl():
+    resolver = ShortLinkResolver(shortener_hosts={"127.0.0.1"}, timeout=1.0, failure_ttl_seconds=0)
+    assert asyncio.run(resolver.resolve("http://127.0.0.1:1/x")) is None
+    assert asyncio.run(resolver.resolve("http://127.0.0.1:1/x")) is None
+    assert resolver.stats()["failures"] == 2
+    resolver.stop()
+
+def test_expand_later_calls_back_from_background_loop(shortener):
+    resolver = ShortLinkResolver(shortener_hosts={"127.0.0.1"})
+    done = threading.Event()
+    seen = []
+
+    def callback(short, resolved):
+        seen.append((short, resolved))
+        done.set()
+
+    resolver.expand_later(f"http://127.0.0.1:{shortener}/abc", callback)
+    assert done.wait(5)
+    resolver.stop()
+    assert seen == [(f"http://127.0.0.1:{shortener}/abc", f"http://localhost:{shortener}/landing")]
@@ -0,0 +1,44 @@
+from scamsafe_bot import detector
+from scamsafe_bot.detector import ScamDetector
+from scamsafe_bot.verdict_cache import VerdictCache, message_key
+
+def test_normalized_key():
+    assert message_key("Your KYC is BLOCKED") == message_key("your kyc is blocked")
+    assert message_key("your kyc is blocked") != message_key("your kyc is active")
+    # The scorer matches "click here" literally, so spacing must stay in the key
+    assert message_key("click here") != message_key("click  here")
+
+def test_hit_miss_and_copy():
+    cache = VerdictCache()
+    assert cache.get("urgent kyc") is None
+    cache.put("urgent kyc", {"is_scam": True})
+    verdict = cache.get("URGENT KYC")
+    assert verdict == {"is_scam": True}
+    verdict["is_scam"] = False
+    assert cache.get("urgent kyc") == {"is_scam": True}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+def test_lru_eviction():
+    cache = VerdictCache(max_size=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.get("a")
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = VerdictCache(ttl_seconds=0)
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_detector_skips_scoring_on_hit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(detector, "simulate_latency", lambda *a, **k: calls.append(1))
+    scam_detector = ScamDetector()
+    first = scam_detector.assess_threat("Urgent! KYC blocked, verify at bit.ly/x")
+    second = scam_detector.assess_threat("urgent! kyc blocked, verify at bit.ly/x")
+    assert first == second
+    assert len(calls) == 1
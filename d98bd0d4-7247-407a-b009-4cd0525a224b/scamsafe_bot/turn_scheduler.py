@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from .model_router import intel_yield
+
+# Crew turns allowed to call the LLM at once (the provider's rate limit,
+# not the web worker count)
+LLM_SLOTS = int(os.getenv("SCAMSAFE_LLM_SLOTS", "4"))
+
+# How far one unit of session value moves a turn up the queue, as if its
+# deadline were that much earlier
+VALUE_PRIORITY_MS = float(os.getenv("SCAMSAFE_VALUE_PRIORITY_MS", "1500"))
+
+# A turn that can't start at least this long before its deadline gets the
+# canned reply instead; a crew run won't finish in less
+MIN_RUN_MS = float(os.getenv("SCAMSAFE_MIN_RUN_MS", "1500"))
+
+
+class DeadlineMissed(Exception):
+    """The turn could not get an LLM slot in time to reply before its deadline."""
+
+
+def session_value(extracted_intel: Dict, confidence: float) -> float:
+    """
+    How much a session's next turn is worth: detection confidence times
+    the payment details it has yielded so far (plus one, so a fresh scam
+    still outranks a conversation that is probably benign).
+    """
+    return confidence * (1 + intel_yield(extracted_intel))
+
+
+class TurnScheduler:
+    """
+    Admits crew turns to a fixed number of LLM slots.
+
+    A free slot goes straight to the caller when nobody is waiting.
+    Otherwise waiting turns are served earliest effective deadline first,
+    where a turn's effective deadline is its reply deadline minus
+    value * value_priority_ms: a session about to hand over a mule account
+    goes ahead of a brand-new one with the same deadline. A turn still
+    waiting when it can no longer finish in time leaves the queue with
+    DeadlineMissed, so the caller can send a canned reply instead.
+    """
+
+    def __init__(self, slots: int = LLM_SLOTS, value_priority_ms: float = VALUE_PRIORITY_MS,
+                 min_run_ms: float = MIN_RUN_MS, clock=time.monotonic):
+        self.slots = slots
+        self.value_priority_ms = value_priority_ms
+        self.min_run_ms = min_run_ms
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiting = []   # heap of [effective deadline, seq]
+        self._seq = itertools.count()
+        self.running = 0
+        self.admitted = 0
+        self.queued = 0
+        self.missed = 0
+        self._waited = 0
+        self._wait_ms = 0.0
+
+    @contextmanager
+    def slot(self, value: float, deadline: float):
+        """
+        Holds an LLM slot for the block. `deadline` is when the reply is due,
+        on the scheduler's clock (time.monotonic by default).
+        """
+        self._acquire(value, deadline)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.running -= 1
+                self._cond.notify_all()
+
+    def _acquire(self, value: float, deadline: float):
+        start_by = deadline - self.min_run_ms / 1000
+        with self._cond:
+            if self.running < self.slots and not self._waiting:
+                self.running += 1
+                self.admitted += 1
+                return
+            entry = [deadline - value * self.value_priority_ms / 1000, next(self._seq)]
+            heapq.heappush(self._waiting, entry)
+            self.queued += 1
+            queued_at = self._clock()
+            while not (self.running < self.slots and self._waiting[0] is entry):
+                remaining = start_by - self._clock()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self.missed += 1
+                    # The next waiter may be able to go now
+                    self._cond.notify_all()
+                    raise DeadlineMissed(f"no LLM slot within {(self._clock() - queued_at) * 1000:.0f}ms")
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            self.running += 1
+            self.admitted += 1
+            self._waited += 1
+            self._wait_ms += (self._clock() - queued_at) * 1000
+            # Slots may be left for the new head of the queue
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "running": self.running,
+                "waiting": len(self._waiting),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "deadline_missed": self.missed,
+                "avg_queue_wait_ms": round(self._wait_ms / self._waited, 1) if self._waited else 0.0
+            }
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import ssl
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import unquote_plus, urljoin, urlsplit, urlunsplit
+
+from .verdict_cache import VerdictCache
+
+# Link shorteners worth expanding; anything else is stored as canonicalized
+SHORTENER_HOSTS = frozenset([
+    "bit.ly", "tinyurl.com", "goo.gl", "t.co", "cutt.ly", "is.gd", "rb.gy",
+    "ow.ly", "shorturl.at", "tiny.cc", "rebrand.ly", "t.ly", "s.id",
+])
+
+# Query params that only track the click, never change the destination
+_TRACKING_PARAMS = frozenset(["fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "yclid", "_ga"])
+_TRACKING_PREFIXES = ("utm_",)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_REDIRECT_STATUSES = frozenset([301, 302, 303, 307, 308])
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in _TRACKING_PARAMS or param.startswith(_TRACKING_PREFIXES)
+
+
+def _idna_host(host: str) -> str:
+    host = host.lower().rstrip(".")
+    if host.isascii():
+        return host
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host  # not a valid IDN; keep the raw form rather than lose the link
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a link, so "bit.ly/x", "https://BIT.LY/x" and
+    "bit.ly/x?utm_source=sms" are stored once: scheme defaults to https,
+    host is lowercased and punycoded, default ports, fragments and tracking
+    params are dropped, remaining params keep their order and spelling. Paths keep their
+    case (shortener codes are case-sensitive).
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = _idna_host(parts.hostname or "")
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    # Kept params are copied as written: re-encoding would turn "?token"
+    # into "?token=" or change how values are escaped
+    query = "&".join(piece for piece in parts.query.split("&")
+                     if piece and not _is_tracking(unquote_plus(piece.split("=", 1)[0])))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def _url_key(url: str) -> str:
+    return url  # callers pass canonical URLs, which are already exact keys
+
+
+class ShortLinkResolver:
+    """
+    Expands short links with HEAD requests on a private asyncio loop.
+
+    A semaphore caps outbound connections; concurrent requests for the same
+    link share one in-flight resolution, and results land in a TTL cache so
+    a campaign link is fetched once across sessions. Failures are cached
+    only for failure_ttl_seconds, so a network blip doesn't hide a link for
+    a day. Resolutions always run on the private loop, whichever loop
+    awaits resolve(). Callers on the request path use expand_later(),
+    which never blocks.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 3.0, max_hops: int = 5,
+                 ttl_seconds: float = 24 * 3600, max_size: int = 100000,
+                 shortener_hosts=SHORTENER_HOSTS, failure_ttl_seconds: float = 60.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_hops = max_hops
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self.shortener_hosts = frozenset(shortener_hosts)
+        self.cache = VerdictCache(max_size=max_size, ttl_seconds=ttl_seconds, key_func=_url_key)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+        self.fetches = 0
+        self.failures = 0
+
+    def is_short_link(self, url: str) -> bool:
+        try:
+            return urlsplit(url).hostname in self.shortener_hosts
+        except ValueError:
+            return False
+
+    def _cached(self, url: str) -> Optional[Dict]:
+        cached = self.cache.get(url)
+        if cached is not None and cached["resolved"] is None and time.monotonic() >= cached["retry_at"]:
+            return None
+        return cached
+
+    async def resolve(self, url: str) -> Optional[str]:
+        """Final destination (canonicalized) of a short link, or None if it couldn't be followed."""
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is not loop:
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.resolve(url), loop))
+        url = canonicalize_url(url)
+        cached = self._cached(url)
+        if cached is not None:
+            return cached["resolved"]
+        pending = self._inflight.get(url)
+        if pending is None:
+            pending = self._inflight[url] = asyncio.ensure_future(self._follow(url))
+            pending.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(pending)
+
+    async def _follow(self, url: str) -> Optional[str]:
+        current = url
+        try:
+            async with self._semaphore:
+                for _ in range(self.max_hops):
+                    if not self.is_short_link(current):
+                        break
+                    self.fetches += 1
+                    status, location = await asyncio.wait_for(self._head(current), self.timeout)
+                    if status not in _REDIRECT_STATUSES or not location:
+                        break
+                    current = canonicalize_url(urljoin(current, location))
+            resolved = current
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.failures += 1
+            print(f"⚠️ Short link expansion failed for {url}: {e}")
+            self.cache.put(url, {"resolved": None, "retry_at": time.monotonic() + self.failure_ttl_seconds})
+            return None
+        self.cache.put(url, {"resolved": resolved})
+        return resolved
+
+    async def _head(self, url: str):
+        """Minimal HTTP/1.1 HEAD; returns (status, Location header or None)."""
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        port = parts.port or (443 if https else 80)
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, port, ssl=self._ssl if https else None,
+            server_hostname=parts.hostname if https else None,
+        )
+        try:
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+            writer.write(
+                f"HEAD {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                f"User-Agent: Mozilla/5.0\r\nConnection: close\r\n\r\n".encode("ascii")
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            location = None
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "location":
+                    location = value.strip()
+            return status, location
+        finally:
+            writer.close()
+
+    # Private loop: every resolution runs here, so the semaphore and the
+    # in-flight table belong to one loop and one thread
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="shortlink-resolver", daemon=True)
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._bind_loop(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _bind_loop(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def expand_later(self, url: str, callback: Callable[[str, Optional[str]], None]):
+        """
+        Resolves url in the background and calls callback(short_url, resolved)
+        from the resolver thread. A cached result calls back immediately.
+        """
+        url = canonicalize_url(url)
+        cached = self._cached(url)
+        if cached is not None:
+            callback(url, cached["resolved"])
+            return None
+        future = asyncio.run_coroutine_threadsafe(self.resolve(url), self._ensure_loop())
+        future.add_done_callback(lambda f: None if f.cancelled() or f.exception() else callback(url, f.result()))
+        return future
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def stats(self) -> Dict:
+        return {
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "in_flight": len(self._inflight),
+            "cache": self.cache.stats(),
+        }
+
+
+# Shared across sessions so a campaign's short link is fetched once
+SHORTLINK_CONCURRENCY = int(os.getenv("SCAMSAFE_SHORTLINK_CONCURRENCY", "8"))
+shortlink_resolver = ShortLinkResolver(max_concurrency=SHORTLINK_CONCURRENCY)
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_message(message: str) -> str:
+    """
+    Lowercase, so resent templates hash the same. Nothing coarser: the
+    scorer matches multi-word keywords literally on the lowercased text, so
+    e.g. collapsing whitespace could serve one message another's verdict.
+    """
+    return message.lower()
+
+
+def message_key(message: str) -> str:
+    return hashlib.blake2b(normalize_message(message).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class VerdictCache:
+    """
+    Bounded LRU cache of detection verdicts keyed by normalized-message hash.
+    Entries older than ttl_seconds are treated as misses and dropped.
+    Thread-safe; get() returns a copy so callers can't mutate cached verdicts.
+    key_func can replace the message hash for other kinds of keys.
+    """
+
+    def __init__(self, max_size: int = 50000, ttl_seconds: float = 6 * 3600, key_func=message_key):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.key_func = key_func
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, verdict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, message: str) -> Optional[Dict]:
+        key = self.key_func(message)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, verdict = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(verdict)
+
+    def put(self, message: str, verdict: Dict):
+        key = self.key_func(message)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(verdict))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
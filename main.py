@@ -3,6 +3,16 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict
 import re
 import random
+import os
+import sys
+
+# Shared detection code lives in the scamsafe_bot package of the workspace folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'd98bd0d4-7247-407a-b009-4cd0525a224b'))
+from scamsafe_bot.risk import RiskAccumulator
+from scamsafe_bot.detector import DETECTOR_RULES
+from scamsafe_bot.rule_packs import RulePackManager, pack_path
+from scamsafe_bot.session_table import SessionRecord, SessionTable, SESSION_TTL_SECONDS
+from scamsafe_bot.session_backend import SESSION_BACKEND, SessionBusy, SQLiteSessionStore
 
 app = FastAPI()
 
@@ -21,76 +31,98 @@ class Response(BaseModel):
     status: str
     reply: str
 
-sessions = {}
+class RiskSession(SessionRecord):
+    __slots__ = ('turns', 'risk_score', 'risk')
+
+    def __init__(self, risk: Optional[RiskAccumulator] = None):
+        self.turns = 0
+        self.risk_score = 0.0
+        self.risk = risk or RiskAccumulator()
+
+    def to_state(self) -> Dict:
+        return {'turns': self.turns, 'risk_score': self.risk_score, 'risk': self.risk.to_state()}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'RiskSession':
+        session = cls(RiskAccumulator.from_state(state['risk']))
+        session.turns = state['turns']
+        session.risk_score = state['risk_score']
+        return session
+
+# Bounded by SCAMSAFE_MAX_SESSIONS, idle sessions expire after SCAMSAFE_SESSION_TTL_SECONDS.
+# SCAMSAFE_SESSION_BACKEND=sqlite shares sessions between worker processes.
+if SESSION_BACKEND == 'sqlite':
+    sessions = SQLiteSessionStore(lambda sid: RiskSession(), encode=RiskSession.to_state,
+                                  decode=RiskSession.from_state, ttl_seconds=SESSION_TTL_SECONDS)
+else:
+    sessions = SessionTable(RiskSession)
 API_KEY = 'secret123'
 
+# Risk-manager keywords and canned replies, hot-reloaded from the rule pack
+RISK_MANAGER_RULES = RulePackManager(pack_path('risk_manager'))
+
 def verify_key(x_api_key: str = Header(None)):
     if x_api_key != API_KEY:
         raise HTTPException(401, 'Invalid key')
 
 def get_risk_manager_reply(scammer_text: str, turn: int) -> str:
+    # One pack per call, so a hot swap mid-request can't mix two rule versions
+    pack = RISK_MANAGER_RULES.current
     text_lower = scammer_text.lower()
     
     # HIGH RISK - EVASIVE RESPONSES (Never shares details)
-    if any(word in text_lower for word in ['account', 'ac', 'number']):
-        return random.choice([
-            "I don't share account details over SMS. Please call SBI customer care.",
-            "Bank never asks for account numbers via SMS as per RBI guidelines.",
-            "This seems like a phishing attempt. I'll report to cybercrime portal."
-        ])
-    
-    if any(word in text_lower for word in ['otp', 'one time', 'code']):
-        return random.choice([
-            "SBI never asks for OTP via SMS. This violates RBI security policy.",
-            "Never share OTP with anyone. Forwarding this to SBI fraud team.",
-            "RBI mandated - OTPs are never requested through unsolicited messages."
-        ])
-    
-    if any(word in text_lower for word in ['gpay', 'upi', 'phonepe']):
-        return random.choice([
-            "Legitimate banks don't ask for UPI IDs via SMS. Please verify.",
-            "NPCI guidelines prohibit UPI sharing through unknown numbers.",
-            "This UPI request looks suspicious. Checking with SBI branch."
-        ])
-    
-    if 'link' in text_lower or 'http' in text_lower:
-        return random.choice([
-            "I never click unknown links. Please provide official SBI link.",
-            "Phishing links detected. Reporting to CERT-In immediately.",
-            "SBI verification never uses third-party links per policy."
-        ])
+    # Categories are in priority order in rules/risk_manager.json
+    hit_categories = {pack.matcher.terms[term_id][0] for _, term_id in pack.matcher.scan(text_lower)}
+    for category in pack.categories:
+        if category in hit_categories:
+            return random.choice(pack.replies[category])
     
     # RISK MANAGER FALLBACK - Always suspicious
-    risk_replies = [
-        "This message format doesn't match SBI official communication.",
-        "SBI customer care number is 1800-11-2211. Why this number?",
-        "Urgent account issues are handled through official SBI app only.",
-        "Multiple red flags detected. Escalating to SBI security team.",
-        "RBI banned such communication methods. Please identify yourself."
-    ]
-    
-    return random.choice(risk_replies)
+    return random.choice(pack.fallback_replies)
+
+@app.on_event('startup')
+def watch_rule_packs():
+    RISK_MANAGER_RULES.start_watching()
+    DETECTOR_RULES.start_watching()
+    sessions.start_sweeper()
 
 @app.get('/health')
 async def health():
-    return {'status': 'healthy'}
+    return {'status': 'healthy', 'rules': [RISK_MANAGER_RULES.stats(), DETECTOR_RULES.stats()]}
+
+@app.get('/stats')
+def stats():
+    return {'sessions': sessions.stats()}
 
+# Plain def: FastAPI runs it in its threadpool, so SQLite I/O and lease
+# waits (SCAMSAFE_SESSION_BACKEND=sqlite) never block the event loop
 @app.post('/webhook')
-async def webhook(request: Request = Body(...), api_key: str = Depends(verify_key)):
+def webhook(request: Request = Body(...), api_key: str = Depends(verify_key)):
     sid = request.sessionId
     text = request.message.text
     
-    if sid not in sessions:
-        sessions[sid] = {'turns': 0, 'risk_score': 0}
-    
-    sessions[sid]['turns'] += 1
-    sessions[sid]['risk_score'] += 1  # Every message increases suspicion
+    try:
+        with sessions.session(sid) as session:
+            if session.turns == 0:
+                # First time we see this session: fold in any earlier scammer turns once
+                session.risk.update_many(m.text for m in request.conversationHistory if m.sender == 'scammer')
+            
+            session.turns += 1
+            # Incremental: only the new message is scanned, never the whole history
+            verdict = session.risk.update(text)
+            session.risk_score = verdict['risk_score']
+            turns, risk_score = session.turns, session.risk_score
+    except SessionBusy:
+        # Another worker is still on this conversation's previous turn
+        raise HTTPException(409, 'Session busy, retry shortly', headers={'Retry-After': '2'})
     
-    reply = get_risk_manager_reply(text, sessions[sid]['turns'])
+    reply = get_risk_manager_reply(text, turns)
     
     print(f"Scammer: {text}")
     print(f"Risk Manager: {reply}")
-    print(f"Risk Score: {sessions[sid]['risk_score']}")
+    print(f"Risk Score: {risk_score} | Categories: {verdict['category_counts']}")
+    if verdict['category_counts'].get('blocklist'):
+        print("Blocklisted mule account / phishing domain in this conversation")
     print("---")
     
     return Response(status='success', reply=reply)